@@ -0,0 +1,163 @@
+# coding: utf-8
+
+'''Benchmark of final_table() against its previous per-cell implementation on large synthetic tables.
+
+Usage: python benchmark_final_table.py [--rows 500] [--tables 20] [--repeat 3]
+'''
+
+import re
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from information_retrieval import final_table
+
+
+def final_table_loop(tabledata, test_pdf):
+
+    '''final_table() as it was before the column-wise rewrite, kept as the benchmark baseline.'''
+
+    final_tabledata =pd.DataFrame(columns=['Dow_id','matrix','component','precision','unit','precision_type','distribution','condition'])
+    frames = []
+
+    for table in range(0,len(tabledata[0])):
+
+        data = tabledata[0][table]
+        data.columns = data.iloc[0]
+        data =data.drop(0,0).reset_index().drop('index',1)
+        final_data = pd.DataFrame(columns=['Dow_id','matrix','component','precision','unit','precision_type','distribution','condition'],index=range(0,len(data)))
+
+        precision_list = ['precision','standarddeviation',"standardvalue"]
+        condition_list = ['averangeconcentration','average']
+        component_list = ['sample','analyte','resin','analysis','resin#']
+        actual_columns = data.columns
+
+        columns = []
+        for i in range(0,len(data.columns)):
+            columns.append(re.sub(r"\r|\s","",str(data.columns[i])).lower())
+        data.columns =columns
+        cols=[]
+        if str(data.columns).count("standarddeviation")>1:
+            for i in range(0,len(data.columns)):
+                col=data.columns[i]
+                if "standarddeviation" in col and col != "standarddeviation":
+                    cols.append(col)
+        data = data.drop(cols,1)
+        for col in data.columns:
+            if "95%confidence" in col:
+                data = data.drop(col,1)
+
+        for k in range(0,len(final_data)):
+            final_data["component"][k]=re.sub(r"\r"," ",str(data[data.columns[0]][k]))
+
+        for k in range(0,len(final_data)):
+            final_data["matrix"][k] = data.columns[0].upper()
+        for col in data.columns:
+            if "distribution" in col:
+                for k in range(0,len(final_data)):
+                    final_data["distribution"][k]=col
+            else:
+                for k in range(0,len(final_data)):
+                    final_data["distribution"][k]= "normal(if Null)"
+        for col in data.columns:
+            for name in precision_list:
+                if name in col:
+                    if col == "standarddeviation":
+                        for k in range(0,len(final_data)):
+                            final_data["precision_type"][k]="absolute"
+                        for k in range(0,len(final_data)):
+                            final_data["precision"][k]=data[col][k]
+                    else:
+                        temp = re.sub(r"standarddeviation","",col)
+                        if len(temp) < 2:
+                            temp = "absolute"
+                        for k in range(0,len(final_data)):
+                            final_data["precision_type"][k]=temp
+                        for k in range(0,len(final_data)):
+                            final_data["precision"][k]=data[col][k]
+
+            precision_unit = final_data['precision'].values
+            precision_unit = re.search(r"\[(.+?)\]",str(precision_unit))
+            if precision_unit != None:
+                precision_unit = precision_unit.group(0)
+                precision_unit = re.sub(r"(N|n)ote(s|)|\d|\.|\\r|\'|\[|\]|\(|\)","",str(precision_unit))
+            for k in range(0,len(final_data)):
+                final_data['unit'][k] = precision_unit
+
+            for name in condition_list:
+                if name in col:
+                    for k in range(0,len(final_data)):
+                        final_data["condition"][k]=data[col][k]
+                    condition_unit = final_data['condition'].values
+                    condition_unit = re.search(r"\[(.+?)\]",str(condition_unit))
+                    if condition_unit != None:
+                        condition_unit = condition_unit.group(0)
+                        condition_unit = re.sub(r"\d|\.|\\r|\'|\[|\]","",str(condition_unit))
+                    for k in range(0,len(final_data)):
+                        final_data["condition"][k]= str(final_data['condition'][k]) + " " +str(condition_unit)+" " + str(col)
+
+        final_data = final_data.drop(0,0)
+        frames.append(final_data)
+
+    final_tabledata = pd.concat([final_tabledata]+frames,axis=0)
+    final_tabledata.index = range(0,len(final_tabledata))
+    if len(final_tabledata) > 0:
+        final_tabledata['Dow_id'] = re.sub(r"\/home/cdsw/data/MethodsForSoothsayer_181105/","",test_pdf)
+
+    return final_tabledata
+
+
+def synthetic_tables(rows, tables, seed=0):
+
+    '''Returns table_data() shaped input: a list holding tables of rows rows in the layout tabula gives for
+    precision tables (header in the first row, text cells, empty cells as NaN).'''
+
+    random = np.random.RandomState(seed)
+    headers = [['Sample', 'Average\rConcentration [wt. %]', 'Standard\rDeviation [wt. %]', 'Relative Standard\rDeviation'],
+               ['Analyte', 'Average [ppm]', 'Pooled Standard\rDeviation [ppm]', 'Normal Distribution'],
+               ['Resin', 'Precision [mg/kg]', '95% Confidence\rInterval', 'Notes']]
+    frames = []
+    for table in range(0, tables):
+        header = headers[table % len(headers)]
+        body = [['Sample ' + str(row) + '\rA'] + ['%.3f' % value for value in random.uniform(0, 100, len(header) - 1)]
+                for row in range(0, rows)]
+        frame = pd.DataFrame([header] + body)
+        frame[frame.columns[-1]] = frame[frame.columns[-1]].where(random.uniform(size=rows + 1) > 0.1, np.nan)
+        frames.append(frame)
+    return [frames]
+
+
+def _copy(tabledata):
+    return [[table.copy() for table in tabledata[0]]]
+
+
+def benchmark(rows=500, tables=20, repeat=3):
+
+    '''Times both implementations on the same synthetic tables and checks that their outputs are equal.'''
+
+    tabledata = synthetic_tables(rows, tables)
+    test_pdf = "/home/cdsw/data/MethodsForSoothsayer_181105/synthetic.pdf"
+    results = {}
+    for name, function in [('final_table_loop', final_table_loop), ('final_table', final_table)]:
+        timings = []
+        for run in range(0, repeat):
+            data = _copy(tabledata)
+            started = time.perf_counter()
+            output = function(data, test_pdf)
+            timings.append(time.perf_counter() - started)
+        results[name] = (min(timings), output)
+
+    pd.testing.assert_frame_equal(results['final_table_loop'][1].astype(object), results['final_table'][1].astype(object))
+    loop_seconds, vector_seconds = results['final_table_loop'][0], results['final_table'][0]
+    return {'rows': rows, 'tables': tables, 'final_table_loop_seconds': loop_seconds,
+            'final_table_seconds': vector_seconds, 'speedup': loop_seconds / vector_seconds}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--tables', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    arguments = parser.parse_args()
+    print(benchmark(arguments.rows, arguments.tables, arguments.repeat))
@@ -0,0 +1,365 @@
+# coding: utf-8
+
+'''Benchmark suite of the extraction stages on synthetic method documents.
+
+Generates method pdfs offline (numbered Scope and Precision sections, ruled tables in the Precision section,
+"Table N" tables in an appendix, optional image-only pages), times every stage on its own and final_precision()
+end to end, and saves the timings as JSON so runs of different releases can be compared.
+
+Usage: python benchmark_suite.py [--pages 4 16 64] [--repeat 3] [--output benchmark_results.json] [--compare old.json]
+       [--tabula-server [PYTHON]] also checks the tables of a TabulaServer against the in-process tabula
+'''
+
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+
+import information_retrieval as ir
+from benchmark_final_table import synthetic_tables, _copy
+
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+LINE_HEIGHT, ROW_HEIGHT, COLUMN_WIDTH = 14, 16, 118
+
+TABLE_HEADER = ['Sample', 'Average [wt. %]', 'Standard Deviation [wt. %]', 'Relative Standard Deviation']
+
+FILLER = ("The sample is weighed into a clean vial and dissolved in the solvent before the analysis. "
+          "The solution is filtered and transferred to the autosampler tray of the instrument. "
+          "Calibration standards are prepared at five levels covering the working range of the method. "
+          "Each standard is analysed in duplicate and the response is plotted against the concentration. ")
+
+
+def _pdf_string(text):
+    return '(' + text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') + ')'
+
+
+def _wrap(text, width=90):
+    lines, line = [], ''
+    for word in text.split(' '):
+        if len(line) + len(word) + 1 > width:
+            lines.append(line)
+            line = ''
+        line = line + word + ' '
+    if line.strip():
+        lines.append(line)
+    return lines
+
+
+def _text_block(lines, y):
+    # the trailing space keeps the words of two lines apart once the preprocessing removes the line breaks
+    commands = ["BT /F1 10 Tf %d TL 72 %d Td" % (LINE_HEIGHT, y)]
+    for line in lines:
+        commands.append(_pdf_string(line.rstrip() + ' ') + " Tj T*")
+    commands.append("ET")
+    return "\n".join(commands), y - LINE_HEIGHT * len(lines) - LINE_HEIGHT
+
+
+def _table_block(rows, y):
+    commands = ["0.5 w"]
+    for row_number, row in enumerate(rows):
+        top = y - ROW_HEIGHT * row_number
+        for column, cell in enumerate(row):
+            left = 72 + COLUMN_WIDTH * column
+            commands.append("%d %d %d %d re S" % (left, top - ROW_HEIGHT, COLUMN_WIDTH, ROW_HEIGHT))
+            commands.append("BT /F1 7 Tf %d %d Td %s Tj ET" % (left + 3, top - ROW_HEIGHT + 5, _pdf_string(cell + ' ')))
+    return "\n".join(commands), y - ROW_HEIGHT * len(rows) - 2 * LINE_HEIGHT
+
+
+def _table_rows(rows, generator):
+    body = []
+    for row in range(0, rows):
+        average = generator.uniform(0.5, 50)
+        deviation = average * generator.uniform(0.01, 0.1)
+        body.append(['Resin ' + chr(65 + row % 26), '%.3f' % average, '%.4f' % deviation, '%.2f' % (100 * deviation / average)])
+    return [TABLE_HEADER] + body
+
+
+def _render_page(blocks):
+    y, commands = PAGE_HEIGHT - 52, []
+    for kind, content in blocks:
+        if kind == 'text':
+            command, y = _text_block(content, y)
+        else:
+            command, y = _table_block(content, y)
+        commands.append(command)
+    return "\n".join(commands).encode('latin-1')
+
+
+def _write_pdf(path, pages):
+
+    '''Writes a pdf of the pages, each page either ('content', content stream) or ('image', None) for a page that
+    only holds a scanned image.'''
+
+    objects = [None, None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    page_numbers = []
+    image = bytes(bytearray((x * y) % 256 for y in range(0, 64) for x in range(0, 64)))
+
+    def add(data):
+        objects.append(data)
+        return len(objects)
+
+    def stream(dictionary, data):
+        return dictionary + (" /Length %d >>\nstream\n" % len(data)).encode('latin-1') + data + b"\nendstream"
+
+    for kind, content in pages:
+        if kind == 'image':
+            image_number = add(stream(b"<< /Type /XObject /Subtype /Image /Width 64 /Height 64 /ColorSpace /DeviceGray "
+                                      b"/BitsPerComponent 8 /Filter /FlateDecode", zlib.compress(image)))
+            content = b"q 468 0 0 600 72 96 cm /Im0 Do Q"
+            resources = "<< /XObject << /Im0 %d 0 R >> >>" % image_number
+        else:
+            resources = "<< /Font << /F1 3 0 R >> >>"
+        content_number = add(stream(b"<<", content))
+        page_numbers.append(add(("<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources %s /Contents %d 0 R >>"
+                                 % (PAGE_WIDTH, PAGE_HEIGHT, resources, content_number)).encode('latin-1')))
+
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = ("<< /Type /Pages /Kids [%s] /Count %d >>"
+                  % (" ".join("%d 0 R" % number for number in page_numbers), len(page_numbers))).encode('latin-1')
+
+    output, offsets = [b"%PDF-1.4\n"], []
+    size = len(output[0])
+    for number, data in enumerate(objects):
+        offsets.append(size)
+        chunk = ("%d 0 obj\n" % (number + 1)).encode('latin-1') + data + b"\nendobj\n"
+        output.append(chunk)
+        size += len(chunk)
+    xref = ["xref", "0 %d" % (len(objects) + 1), "0000000000 65535 f "] + ["%010d 00000 n " % offset for offset in offsets]
+    output.append(("\n".join(xref) + "\ntrailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                   % (len(objects) + 1, size)).encode('latin-1'))
+    with open(path, 'wb') as pdf_file:
+        pdf_file.write(b"".join(output))
+    return path
+
+
+def synthetic_pdf(path, pages=8, section_tables=1, appendix_tables=2, image_pages=1, table_rows=6, seed=0):
+
+    '''This function writes a synthetic method document and returns its path.
+
+    Parameters:
+
+    path(str): Path of the pdf to write
+
+    pages(number): Total number of pages, filled up with procedure text (at least the pages the sections need)
+
+    section_tables(number): Ruled tables under the Precision header
+
+    appendix_tables(number): "Table N" tables in the appendix, referenced from the Precision text
+
+    image_pages(number): Pages that only hold an image (no text layer), placed after the Calculation section
+
+    table_rows(number): Body rows of every table
+
+    seed(number): Seed of the table values
+
+    returns:
+
+    path(str): Path of the pdf
+
+    '''
+
+    generator = random.Random(seed)
+    references = " and ".join("Table " + str(table) for table in range(1, appendix_tables + 1))
+    precision = ("The precision of the method was determined by analysing three resin samples on six different days. "
+                 "The standard deviation is 0.05 wt. % at an average concentration of 2.5 wt. % of ethylene in polyethylene. "
+                 "The results follow a normal distribution. ")
+    if appendix_tables:
+        precision = precision + "The results of the study are summarized in " + references + " in the appendix. "
+
+    first = [('text', ["Method " + os.path.basename(path).split('.')[0], ""] +
+              _wrap("1. Scope This method determines the ethylene content of polyethylene resin samples by infrared "
+                    "spectroscopy. The working range is 0.5 to 50 wt. %. ") +
+              _wrap("2. Principle The absorbance of the sample is measured and compared with calibration standards. ") +
+              _wrap("3. Apparatus Infrared spectrometer, analytical balance, press and sample holders. "))]
+    precision_page = [('text', _wrap("5. Precision " + precision))]
+    for table in range(0, section_tables):
+        precision_page.append(('table', _table_rows(table_rows, generator)))
+    precision_page.append(('text', _wrap("6. Calculation The concentration is calculated from the calibration curve "
+                                         "and reported to two decimals. ")))
+    appendix = []
+    for table in range(1, appendix_tables + 1):
+        caption = ("Appendix " if table == 1 else "") + "Table " + str(table) + " Precision of the ethylene content"
+        appendix.append([('text', [caption]), ('table', _table_rows(table_rows, generator))])
+    appendix.append([('text', _wrap("The information herein is presented in good faith and is believed to be accurate. "))])
+
+    filler_pages = max(1, pages - 2 - image_pages - len(appendix))
+    filler = [[('text', _wrap(("4. Procedure " if page == 0 else "") + FILLER * 6))] for page in range(0, filler_pages)]
+
+    layout = [first] + filler + [precision_page]
+    pdf_pages = [('content', _render_page(blocks)) for blocks in layout]
+    pdf_pages += [('image', None)] * image_pages
+    pdf_pages += [('content', _render_page(blocks)) for blocks in appendix]
+    return _write_pdf(path, pdf_pages)
+
+
+def time_stage(function, repeat=3):
+
+    '''Runs function repeat times and returns its timings and last result. The first run is reported on its own
+    since it pays for the caches (compiled patterns, spaCy models) the following runs reuse.'''
+
+    seconds, result, error = [], None, None
+    for run in range(0, repeat):
+        started = time.perf_counter()
+        try:
+            result = function()
+        except Exception as exception:
+            error = type(exception).__name__ + ": " + str(exception)
+            break
+        seconds.append(time.perf_counter() - started)
+    timing = {'first': seconds[0] if seconds else None, 'min': min(seconds) if seconds else None,
+              'mean': sum(seconds) / len(seconds) if seconds else None, 'runs': len(seconds), 'error': error}
+    return timing, result
+
+
+def benchmark_document(test_pdf, repeat=3, table_rows=6, tables=3):
+
+    '''This function times every stage of the extraction on one pdf. A stage whose input could not be computed
+    (for example tabula or a spaCy model is not installed) is reported with its error instead of timings.
+
+    returns:
+
+    stages(dict): stage name -> timing as returned by time_stage()
+
+    '''
+
+    ir.set_page_text_cache(None)
+    ir.set_table_cache(None)
+    stages, results = {}, {}
+
+    def stage(name, function, requires=()):
+        missing = [required for required in requires if required not in results]
+        if missing:
+            stages[name] = {'first': None, 'min': None, 'mean': None, 'runs': 0,
+                            'error': "skipped: no result of " + ", ".join(missing)}
+            return
+        stages[name], result = time_stage(function, repeat)
+        if stages[name]['error'] is None:
+            results[name] = result
+
+    stage('extract_page_texts', lambda: ir.extract_page_texts(test_pdf))
+    stage('pdf_processor', lambda: ir.pdf_processor(test_pdf, "Precision"))
+    if 'pdf_processor' in results:
+        preprocessed_text, start, end, pdf_name, corpus, header, pages = results['pdf_processor']
+    stage('section_index', lambda: ir.section_index(preprocessed_text, [header]), ['pdf_processor'])
+    stage('text_data', lambda: ir.text_data(preprocessed_text, start, end, results['section_index']), ['section_index'])
+    stage('out_tables_list', lambda: ir.out_tables_list(results['text_data']), ['text_data'])
+    stage('table_data', lambda: ir.table_data(test_pdf, preprocessed_text, results['text_data'], pdf_name, start,
+                                              header, results['section_index']), ['text_data'])
+    stage('out_tables', lambda: ir.out_tables(test_pdf, results['text_data'], preprocessed_text, header, corpus, pages,
+                                              results['out_tables_list'][0], results['out_tables_list'][1],
+                                              results['section_index']), ['out_tables_list'])
+    tabledata = synthetic_tables(table_rows, tables)
+    stage('final_table', lambda: ir.final_table(_copy(tabledata), test_pdf))
+    for extractor in [ir.value_unit_spacy, ir.precision_type_spacy, ir.distribution_spacy, ir.condition_spacy]:
+        stage(extractor.__name__, lambda: extractor(results['text_data']), ['text_data'])
+    stage('final_precision', lambda: ir.final_precision(test_pdf))
+    return stages
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def _versions():
+    versions = {}
+    for name in ['pandas', 'numpy', 'PyPDF2', 'spacy', 'tabula']:
+        module = sys.modules.get(name)
+        versions[name] = getattr(module, '__version__', None) if module is not None else None
+    return versions
+
+
+def run_suite(page_counts=(4, 16, 64), section_tables=1, appendix_tables=2, image_pages=1, table_rows=6, repeat=3,
+              workdir=None, tabula_server=None):
+
+    '''This function generates one synthetic pdf per page count, benchmarks it and returns the results.
+
+    tabula_server(str): Python of a TabulaServer whose tables are compared with the in-process tabula on the
+    generated pdfs (see tabula_server_report), None to skip the check
+
+    returns:
+
+    results(dict): run metadata (revision, versions, configuration), the stage timings of every document and per
+    stage the sum of the fastest runs over the documents
+
+    '''
+
+    workdir = workdir or tempfile.mkdtemp(prefix="ir-benchmark-")
+    documents = []
+    for pages in page_counts:
+        test_pdf = synthetic_pdf(os.path.join(workdir, "synthetic-%dp.pdf" % pages), pages, section_tables,
+                                 appendix_tables, image_pages, table_rows)
+        documents.append({'pdf': test_pdf, 'pages': pages,
+                          'stages': benchmark_document(test_pdf, repeat, table_rows, section_tables + appendix_tables)})
+
+    summary = {}
+    for document in documents:
+        for name, timing in document['stages'].items():
+            if timing['min'] is not None:
+                summary[name] = summary.get(name, 0.0) + timing['min']
+    results = {'created': time.strftime("%Y-%m-%dT%H:%M:%S"), 'revision': _git_revision(),
+               'python': platform.python_version(), 'platform': platform.platform(), 'versions': _versions(),
+               'config': {'page_counts': list(page_counts), 'section_tables': section_tables,
+                          'appendix_tables': appendix_tables, 'image_pages': image_pages, 'table_rows': table_rows,
+                          'repeat': repeat},
+               'documents': documents, 'summary': summary}
+    if tabula_server:
+        try:
+            report, server_summary = ir.tabula_server_report([document['pdf'] for document in documents], tabula_server)
+            server_summary['mismatches'] = report[~report['equal']][['file', 'page', 'mode']].to_dict('records')
+        except Exception as error:
+            server_summary = {'error': "%s: %s" % (type(error).__name__, error)}
+        results['tabula_server'] = server_summary
+    return results
+
+
+def compare(previous, current):
+
+    '''Returns the lines comparing the per stage summary of two run_suite() results.'''
+
+    lines = []
+    for name in current['summary']:
+        now, before = current['summary'][name], previous['summary'].get(name)
+        if before:
+            lines.append("%-22s %10.4fs -> %10.4fs  x%.2f" % (name, before, now, before / now if now else float('inf')))
+        else:
+            lines.append("%-22s %10s -> %10.4fs" % (name, '-', now))
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, nargs='+', default=[4, 16, 64])
+    parser.add_argument('--section-tables', type=int, default=1)
+    parser.add_argument('--appendix-tables', type=int, default=2)
+    parser.add_argument('--image-pages', type=int, default=1)
+    parser.add_argument('--table-rows', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workdir', default=None, help="Directory of the generated pdfs (a temporary one by default)")
+    parser.add_argument('--output', default="benchmark_results.json")
+    parser.add_argument('--compare', default=None, help="Results of an earlier run to compare with")
+    parser.add_argument('--tabula-server', nargs='?', const=sys.executable, default=None, metavar='PYTHON',
+                        help="Check that a TabulaServer run by PYTHON (this one by default) reads the same tables")
+    arguments = parser.parse_args()
+
+    results = run_suite(arguments.pages, arguments.section_tables, arguments.appendix_tables, arguments.image_pages,
+                        arguments.table_rows, arguments.repeat, arguments.workdir, arguments.tabula_server)
+    with open(arguments.output, 'w') as output:
+        json.dump(results, output, indent=2)
+    for name, seconds in results['summary'].items():
+        print("%-22s %10.4fs" % (name, seconds))
+    if 'tabula_server' in results:
+        print("tabula server: %s" % json.dumps(results['tabula_server']))
+    if arguments.compare:
+        with open(arguments.compare) as previous:
+            print("\n".join(compare(json.load(previous), results)))
@@ -6,545 +6,2380 @@
 
 import re
 import glob
-import pandas as pd
-import numpy as np
-import PyPDF2
-import roman
-from tabula.wrapper import read_pdf
-import spacy
+import time
+import resource
+import threading
+import traceback
+import multiprocessing
+import os
+import json
+import zlib
+import sqlite3
+import hashlib
+import functools
+import sys
+import pickle
+import atexit
+import subprocess
+import select
+import gzip
+import argparse
+import importlib
+import collections
+import contextlib
+import asyncio
+import tempfile
+import urllib.parse
+import concurrent.futures
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
-def pdf_text_pre_processor(header, text):
 
-    ''' This function takes the heading and text from pdf and returns required preprocessed text for further process.
+class _LazyModule(object):
 
-    Parameters:
+    '''Stands in for a heavy module (pandas, spaCy, ...) and imports it on first use, so importing this module and
+    starting the command line stay fast and a stage only pays for the libraries it needs.'''
 
-    header(str): The heading of interest
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
 
-    text(str): Any text data which is in string format
+    def _load(self):
+        if self.__dict__['_module'] is None:
+            self.__dict__['_module'] = importlib.import_module(self.__dict__['_name'])
+        return self.__dict__['_module']
 
-    returns:
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
 
-    preprocessed_text(str): Required preprocessed text from pdf
+    def __repr__(self):
+        return "<lazy module '%s'>" % self.__dict__['_name']
 
-    '''
 
-    temp = re.sub(r'\n|Section \d{1,2}|Note \d{1,2}|\.[0-9][0-9] '+ header + '|\.[0-9] ' + header , '' , str(text)) 
-    temp = re.sub(r'Notes \d{1,2}', 'Notes', temp) 
-    temp = re.sub(r'Method ' + header + '|Accuracy, '+ header + '|' + header.upper(), header, temp)
-    temp = re.sub(r'\)', ' ', temp) 
-    pre_processed_text = re.sub(r'\(', ' ', temp)
+pd = _LazyModule('pandas')
+np = _LazyModule('numpy')
+PyPDF2 = _LazyModule('PyPDF2')
+roman = _LazyModule('roman')
+spacy = _LazyModule('spacy')
 
-    return pre_processed_text
 
+def read_pdf(file, **kwargs):
 
-def pdf_processor(file_path, header):
+    '''tabula's read_pdf(), imported (with tabula's own pandas and java checks) on the first call.'''
 
-    '''This function takes the file path and header as inputs and returns heading start , end patterns 
-    and also preprocessed text by calling pdf_text_pre_processor().
+    from tabula.wrapper import read_pdf as tabula_read_pdf
+    return tabula_read_pdf(file, **kwargs)
 
-    Parameters:
 
-    file_path(str): Path to read a pdf file from a directory.
+TEXT_MODEL = "./text_final_1"
+DISTRIBUTION_MODEL = "./text_model_1"
+SCOPE_MODEL = "./scope_model_1"
+SPACY_MODELS = [TEXT_MODEL, DISTRIBUTION_MODEL, SCOPE_MODEL]
 
-    header(str): The heading of interest
+_spacy_models = {}
+_spacy_model_stats = {}
+_spacy_models_lock = threading.Lock()
 
-    returns:
 
-    preprocessed_text(list): Required preprocessed text from pdf
+def _memory_usage_mb():
 
-    start(str): Start pattern of the header, the text under which we are interested in
+    '''Returns the current resident memory of the process in MB (peak memory where /proc is not available).'''
 
-    end(str): End pattern of the header,the text under which we are interested in
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() / (1024 * 1024)
+    except (OSError, IndexError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
 
-    pdf_name(str): filename or the DOWID of the document (without file extension)
 
-    corpus(object): PyPDF2.corpus object file can be used to read the pdf later
+def get_spacy_model(name):
 
-    header(str): String pattern of the header, for example 'Precision'
+    '''This function returns the spaCy model saved at the given path, loading it at most once per process.
 
-    pages(number): total number of pages in the document
+    Parameters:
 
-    '''
+    name(str): Path of the spaCy model, for example TEXT_MODEL ("./text_final_1")
 
-    pdf_name = file_path.split('/')[-1].split('\\')[-1].split('.')[0]
+    returns:
 
-    corpus = PyPDF2.PdfFileReader(file_path)
+    nlp(object): The loaded spaCy language object
 
-    pages = corpus.getNumPages()
+    '''
 
-    preprocessed_text = [pdf_text_pre_processor(header, corpus.getPage(page_num).extractText()) for page_num in range(0, pages)]
+    nlp = _spacy_models.get(name)
+    if nlp is None:
+        with _spacy_models_lock:
+            nlp = _spacy_models.get(name)
+            if nlp is None:
+                memory_before = _memory_usage_mb()
+                load_start = time.perf_counter()
+                profile_count('spacy.load')
+                with profile_stage('spacy_load'):
+                    nlp = spacy.load(name)
+                _spacy_model_stats[name] = {'model': name,
+                                            'load_seconds': time.perf_counter() - load_start,
+                                            'memory_mb': _memory_usage_mb() - memory_before}
+                _spacy_models[name] = nlp
+    return nlp
 
-    text = ' '.join(preprocessed_text)
 
-    if all([header not in text for text in preprocessed_text]):
-        start, end = np.nan, np.nan
+def warm_spacy_models(names=SPACY_MODELS):
 
-    else:
-        start = re.search(r'[0-9][0-9] '+ header +'|[0-9] ' + 
-                          header + '|[0-9][0-9].' + header + 
-                          '|[0-9].' + header + '|[0-9][0-9]. ' + 
-                          header + '|[0-9]. ' + header + '|[0-9][0-9].  ' +  
-                          header + '|[0-9].  ' + header , text)
+    '''Loads the given spaCy models up front (for example at process start) so later calls do not pay the load cost.
 
-        if(start == None):
-            start, end = np.nan, np.nan
+    Parameters:
 
+    names(list): Paths of the spaCy models to load
 
-        else:
+    returns:
 
-            if '.' in start.group(0):
-                start1 = start.group(0).split('.')[0]
-                end = str(int(start1) + 1) + "\."
+    stats(DataFrame): Load timings and memory use of the loaded models
 
-            else:
-                start1 = start.group(0).split(' ')[0]
-                end = str(int(start1) + 1) + " "
+    '''
 
-            start = start.group(0)
+    for name in names:
+        get_spacy_model(name)
+    return spacy_model_stats()
 
-    return preprocessed_text, start, end, pdf_name,corpus,header,pages
 
+def spacy_model_stats():
 
-# In[4]:
+    '''Returns a dataframe with the load time (seconds) and memory use (MB) of every model loaded in this process.'''
 
+    return pd.DataFrame(list(_spacy_model_stats.values()), columns=['model', 'load_seconds', 'memory_mb'])
 
-def text_data(preprocessed_text, start, end):
-    '''This is a function that returns the text in between the given start and end patterns.
 
-    Parameters:
+_document_profile = None
 
-    preprocessed_text(list): The list of preprocessed text in a list
 
-    start(str): This is a start pattern 
+def _reset_peak_memory():
 
-    end (str): This is an end pattern
+    '''Resets the peak resident memory (VmHWM) of the process, returns False where this is not possible (not Linux).'''
 
-    Returns:
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
 
-    text_between(str): The output is the text between the given patterns
 
-    ''' 
-    text_between=''
-    if str(start) != 'nan':
-        text = ' '.join(preprocessed_text)
-        end1= re.sub(r'\\\.','',end)
-        pattern1 = r'' + start + "(.+?)" + end + "\s*[A-Z]"
-        pattern2 = r'' + start + "(.+?)" + end1 + "\s+[A-Z]"
-        pattern3 = r'' + start + "(.+?)" + end + "\s*[a-z]"
-        pattern4 = r'' + start + "(.+?)" + "THE INFORMATION HEREIN"
-        pattern5 = r'' + start + "(.+?)" + "The information herein"
-        pattern6 = r'' + start + "(.+?)" + "Appendix"
-        patterns= [pattern1,pattern2,pattern3,pattern4,pattern5,pattern6]
-
-        for pattern in patterns:
-            temp = re.findall(pattern,text)
-            if temp!=[]:
-                text_between = temp[0]
-                break
-        return text_between
+def _peak_memory_mb():
 
+    '''Returns the peak resident memory of the process in MB since the last _reset_peak_memory().'''
 
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, IndexError, ValueError):
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
 
-def tabula_table_generator(file, start_page, pdf_name_data, pdf_name_count, page_break_count):
 
-    '''This function generates the list of tables from the pages where required heading (like 'Precision') data presented in pdf
+class DocumentProfile(object):
 
-    Parameters:
+    '''Wall time, stage timings, call counts and peak memory of the processing of one pdf, filled by the profiled()
+    stages and profile_count() while it is the profile of the current document (see profile_document()).
+    Stage times are inclusive, so nested stages (tabula inside table_data, spacy_load inside ner) are also part of
+    the stage around them. Memory of other processes (the TabulaServer JVM) is not included.
 
-    file(str): filename or the DOWID of the document
+    Parameters:
 
-    start_page(number): Page number of pdf from where heading (like 'Precision') data started
+    test_pdf(str): Path of the pdf
 
-    pdf_name_data(list): This is the set of pdf id along with some texts presented in the extracted heading text
+    '''
 
-    pdf_name_count(number): Count that represents how many times the pdf name occurred in the extracted heading text
+    def __init__(self, test_pdf):
+        self.test_pdf = test_pdf
+        self.seconds = 0.0
+        self.stages = collections.OrderedDict()
+        self.counts = collections.Counter()
+        self.page_seconds = {}
+        self.error = None
+        self._peak_reset = _reset_peak_memory()
+        self.peak_memory_mb = _memory_usage_mb()
 
-    page_break_count(number): Count of pages having required heading (like 'Precision') data
+    def sample_memory(self):
+        self.peak_memory_mb = max(self.peak_memory_mb, _memory_usage_mb())
+        if self._peak_reset:
+            self.peak_memory_mb = max(self.peak_memory_mb, _peak_memory_mb())
 
-    returns:
+    def to_dict(self):
+        return {'pdf': self.test_pdf, 'seconds': self.seconds, 'peak_memory_mb': self.peak_memory_mb,
+                'stages': {name: dict(stage) for name, stage in self.stages.items()}, 'counts': dict(self.counts),
+                'slowest_pages': sorted(self.page_seconds.items(), key=lambda page: page[1], reverse=True)[0:5],
+                'error': self.error}
 
-    tabledata(list): List of tables presented in the pages of pdf in which required heading (like 'Precision') data presented
 
-    '''
+@contextlib.contextmanager
+def profile_document(test_pdf):
 
-    tabledata = []
+    '''Makes a new DocumentProfile the profile of the current document while the block runs, for example
+    with profile_document(test_pdf) as profile: final_precision(test_pdf)'''
+
+    global _document_profile
+    profile = DocumentProfile(test_pdf)
+    previous, _document_profile = _document_profile, profile
+    started = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        profile.seconds = time.perf_counter() - started
+        profile.sample_memory()
+        _document_profile = previous
 
-    if (pdf_name_data != []) and (pdf_name_count != 0):
-        new_pages = str(str(start_page + 1) + "-" + str(start_page + pdf_name_count + 1))
 
-    elif page_break_count!= 0:
-        new_pages = str(str(start_page + 1) + "-" + str(start_page + page_break_count + 1))
+@contextlib.contextmanager
+def profile_stage(name):
 
-    else:     
-        new_pages = str(start_page + 1)
+    '''Adds the wall time of the block to the stage name of the current document profile, if there is one.'''
 
-    tabledata = read_pdf(file, output_format = "dataframe", pages = new_pages, lattice=True,
-                         multiple_tables = True, encoding = 'latin-1', position = "absolute")
+    profile = _document_profile
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage = profile.stages.setdefault(name, {'seconds': 0.0, 'calls': 0})
+        stage['seconds'] += time.perf_counter() - started
+        stage['calls'] += 1
+        profile.sample_memory()
 
-    if tabledata == []:
-        tabledata = read_pdf(file, output_format = "dataframe", pages = new_pages, lattice = False,
-                             multiple_tables = True, encoding = 'latin-1', position = "absolute")
 
-    return tabledata
+def profiled(name):
 
+    '''Decorator timing every call of the function as the stage name of the current document profile.'''
 
-def string_comp_match(text_between, tabledata):
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _document_profile is None:
+                return function(*args, **kwargs)
+            with profile_stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
 
-    '''This is a function that returns the tables which are having the information provided in the required text data.
 
-    Parameters:
-    text_between(str): The text in between the start and end patterns in the text of the pdf
+def profile_count(name, count=1):
 
-    tabledata(list): The list of table data sets which are in the pdf
+    '''Adds count to the counter name (for example 'read_pdf' or 'spacy.load') of the current document profile.'''
 
-    Returns:
+    if _document_profile is not None:
+        _document_profile.counts[name] += count
 
-    tabledata(list): List of table data sets in which the table values matched with text between start and end patterns. 
 
-    '''
+def profile_page(page, seconds):
 
-    final_table = []
-    textdata1 = re.sub(r"\n\s+|TM", "", str(text_between))
-    textdata1 = re.sub(r"[^0-9a-zA-Z]+", "", str(textdata1))       
-    for i in range(0, len(tabledata)):
-        tabledata1 = tabledata[i].dropna(how='all')
-        temp_table = tabledata1.values
-        for row in range(2, len(temp_table)):
-            string = str(temp_table[row])
-            string = re.sub(r"\\r|nan|NaN|[^0-9a-zA-Z]+|TM","", string)
-            string = string.replace("x80x9c","")
-            string = string.replace("x80x93","")
+    '''Keeps the text extraction time of page (0-based) in the current document profile.'''
 
-            if string in textdata1:
-                final_table = final_table + [tabledata1]
-                break
-    return final_table
+    if _document_profile is not None:
+        _document_profile.page_seconds[page] = seconds
 
 
+class ProfileReport(object):
 
-def table_data(file, preprocessed_text, text_between, pdf_name, start, header):
+    '''Collects the document profiles of a run (see run_corpus(profile=...)) and summarizes them, with the slowest
+    documents and the stages that took the most time over all documents, as a JSON report.'''
 
-    '''
+    def __init__(self):
+        self.documents = []
 
-    file(str): filename or the DOWID of the document
+    def add(self, profile):
+        if isinstance(profile, DocumentProfile):
+            profile = profile.to_dict()
+        self.documents.append(profile)
 
-    preprocessed_text(list): Whole pdf text data which is already pre processed 
+    def summary(self, top=10):
+        stages, counts = {}, collections.Counter()
+        for document in self.documents:
+            counts.update(document['counts'])
+            for name, stage in document['stages'].items():
+                total = stages.setdefault(name, {'stage': name, 'seconds': 0.0, 'calls': 0, 'documents': 0,
+                                                 'max_seconds': 0.0, 'max_pdf': None})
+                total['seconds'] += stage['seconds']
+                total['calls'] += stage['calls']
+                total['documents'] += 1
+                if stage['seconds'] > total['max_seconds']:
+                    total['max_seconds'], total['max_pdf'] = stage['seconds'], document['pdf']
 
-    text_between(str): The text in between the start and end patterns in the text of the pdf
+        slowest_documents = []
+        for document in sorted(self.documents, key=lambda document: document['seconds'], reverse=True)[0:top]:
+            slowest_stage = max(document['stages'].items(), key=lambda stage: stage[1]['seconds'], default=(None, None))[0]
+            slowest_documents.append({'pdf': document['pdf'], 'seconds': document['seconds'],
+                                      'peak_memory_mb': document['peak_memory_mb'], 'slowest_stage': slowest_stage,
+                                      'error': document['error'] is not None})
 
-    pdf_name(str): filename or the DOWID of the document (without file extension)
+        return {'documents': len(self.documents), 'seconds': sum(document['seconds'] for document in self.documents),
+                'peak_memory_mb': max([document['peak_memory_mb'] for document in self.documents], default=None),
+                'errors': sum(document['error'] is not None for document in self.documents), 'counts': dict(counts),
+                'slowest_documents': slowest_documents,
+                'slowest_stages': sorted(stages.values(), key=lambda stage: stage['seconds'], reverse=True)[0:top]}
 
-    start(str): Start pattern of the header, the tables under which we are interested in
+    def to_dict(self, top=10):
+        return {'created': time.strftime("%Y-%m-%dT%H:%M:%S"), 'summary': self.summary(top), 'documents': self.documents}
 
-    header(str): String pattern of the header, for example 'Precision'
+    def write(self, path, top=10):
+        with open(path, 'w') as report:
+            json.dump(self.to_dict(top), report, indent=2, default=str)
 
-    '''
-    tabledata=[]
-    if str(start) != 'nan':
-        ##finding pagebreaks in the pdf
-        pages = len(preprocessed_text)
-        pattern = "Page \d{1,2} of " + str(pages)
-        page_break = re.findall(pattern, str(text_between))
-        page_break_count = len(page_break)
-        pattern = pdf_name + "(.+?)"
-        pdf_name_data = re.findall(pattern, str(text_between))
-        pdf_name_count = str(text_between).count(str(pdf_name))
-
-        for i in range(0, pages): 
-            temp = preprocessed_text[i]
-            if start in str(temp):
-                tabledata1 = tabula_table_generator(file, i, pdf_name_data, pdf_name_count, page_break_count) 
-                tabledata1 = string_comp_match(text_between, tabledata1)
-                if tabledata1 != []:
-                    tabledata = tabledata+[tabledata1]       
-        return tabledata
 
+_NOTES_NUMBER = re.compile(r'Notes \d{1,2}')
+_PARENTHESES = str.maketrans('()', '  ')
 
 
-def out_tables_list(text_between):
+@functools.lru_cache(maxsize=None)
+def header_patterns(header):
 
-    '''This function takes the text between start and end patterns of heading as input and returns 
-    the list of table names referenced in the text but presented some where else in pdf.
+    '''This function compiles the regex patterns that embed the header once and caches them by header.
 
     Parameters:
 
-    text_between(str): The text in between the start and end patterns in the text of the pdf
+    header(str): The heading of interest
 
     returns:
 
-    table_start_list(list): List of tables referenced in the heading (like 'Precision') text
-
-    table_end_list(list): List of table names which are expected as the end patterns for table_start_list
+    patterns(dict): 'remove' and 'rename' patterns of pdf_text_pre_processor() and the 'start' pattern of pdf_processor()
 
     '''
 
-    integers = list(range(1,50))
-    roman_num = list(range(1,50))
+    return {'remove': re.compile(r'\n|Section \d{1,2}|Note \d{1,2}|\.[0-9][0-9] '+ header + '|\.[0-9] ' + header),
+            'rename': re.compile(r'Method ' + header + '|Accuracy, '+ header + '|' + header.upper()),
+            'start': re.compile(r'[0-9][0-9] '+ header +'|[0-9] ' + 
+                                header + '|[0-9][0-9].' + header + 
+                                '|[0-9].' + header + '|[0-9][0-9]. ' + 
+                                header + '|[0-9]. ' + header + '|[0-9][0-9].  ' +  
+                                header + '|[0-9].  ' + header)}
 
-    for integer in range(0, len(roman_num)):
-        roman_num[integer] = roman.toRoman(int(roman_num[integer]))
 
-    table_start, table_start1, table_end, table_end1="","","",""  
-    textdata_temp = str(text_between).split(" ")       
+@functools.lru_cache(maxsize=1024)
+def compiled_pattern(pattern):
 
-    for word in range(0,len(textdata_temp)):    
-        textdata_temp[word]=re.sub('\'|\"|\,|\.|\\\\|\[|\]',"",textdata_temp[word])
+    '''Returns re.compile(pattern), cached for the patterns built from table names and section patterns.'''
 
-        for number in range(0, len(roman_num)):
+    return re.compile(pattern)
 
-            if textdata_temp[word] == roman_num[number] or textdata_temp[word]==str(integers[number]) and "ble" in textdata_temp[word-1]:   
-                table_start=table_start+",Table "+roman_num[number]    
-                table_end=table_end+",Table "+roman_num[number+1]    
-                table_start1=table_start1+",Table "+str((integers[number]))    
-                table_end1=table_end1+",Table "+str(integers[number+1])
 
-    table_start=pd.DataFrame(table_start[1:len(table_start)].split(","))[0].unique() 
-    table_start1=pd.DataFrame(table_start1[1:len(table_start1)].split(","))[0].unique()  
-    table_end=pd.DataFrame(table_end[1:len(table_end)].split(","))[0].unique()     
-    table_end1=pd.DataFrame((table_end1[1:len(table_end1)].split(",")))[0].unique()
+def pdf_text_pre_processor(header, text):
 
-    table_start=table_start+","+table_start1
-    table_end=table_end+","+table_end1
+    ''' This function takes the heading and text from pdf and returns required preprocessed text for further process.
 
-    for tablename in range(0,len(table_start)):     
-        table_start[tablename]=table_start[tablename].split(",")
-        table_end[tablename]=table_end[tablename].split(",")
+    Parameters:
 
-    table_start=re.sub(r'\)|\(|\[|\]|\'',"",str(table_start))    
-    table_start=re.sub(r'list|\n',",",str(table_start))    
-    table_start=re.sub(r"\s*T|\s*able \d{1,2}T",'T',str(table_start))   
-    table_start=re.sub(r"\s\,",',',str(table_start))   
-    table_start_list=table_start.split(",")[1:len(table_start)]
-    table_end=re.sub(r'\)|\(|\[|\]|\'',"",str(table_end))
-    table_end=re.sub(r'list|\n',",",str(table_end))
-    table_end=re.sub(r"\s*T",'T',str(table_end)) 
-    table_end=re.sub(r"\s\,",',',str(table_end))
-    table_end_list=table_end.split(",")[1:len(table_end)]
+    header(str): The heading of interest
 
-    return table_start_list,table_end_list
+    text(str): Any text data which is in string format
 
+    returns:
 
+    preprocessed_text(str): Required preprocessed text from pdf
 
-def out_tables(file,text_between,preprocessed_text,header,corpus,pages,table_start_list,table_end_list):
+    '''
 
-    '''This takes table names list as input and returns the tables related to the table names list.
+    patterns = header_patterns(header)
+    temp = patterns['remove'].sub('' , str(text)) 
+    temp = _NOTES_NUMBER.sub('Notes', temp) 
+    temp = patterns['rename'].sub(header, temp)
+    # both parentheses become spaces in a single pass
+    pre_processed_text = temp.translate(_PARENTHESES)
 
-    Parameters:
+    return pre_processed_text
 
-    file(str): filename or the DOWID of the document
 
-    text_between(str): The text in between the start and end patterns in the text of the pdf
+EXTRACTOR_VERSION = "PyPDF2.extractText/1"
 
-    preprocessed_text(list)e pdf text data which is already pre processed 
 
-    header(str):String pattern of the header, for example 'Precision'
+class TextDocument(object):
 
-    corpus(object): PyPDF2.corpus object file can be used to read the pdf later
+    '''The pages of one pdf opened by a TextBackend. text(page) extracts the text of a page (0-based) and keeps
+    its extraction time in page_seconds.'''
 
-    pages(number): total number of pages in the document
+    def __init__(self, pages, reader=None):
+        self.pages = pages
+        self.reader = reader
+        self.page_seconds = {}
 
-    table_start_list(list): List of tables referenced in the heading (like 'Precision') text
+    def text(self, page):
+        started = time.perf_counter()
+        text = self._text(page)
+        self.page_seconds[page] = time.perf_counter() - started
+        profile_page(page, self.page_seconds[page])
+        return text
 
-    table_end_list(list): List of table names which are expected as the end patterns for table_start_list
+    def _text(self, page):
+        raise NotImplementedError
 
-    returns:
+    def close(self):
+        self.reader = None
 
-    tabledata(list): List of tables presented in the pages of pdf in which required heading (like 'Table I') data presented.
 
-    '''
+class TextBackend(object):
 
-    tabledata=[]
-    remove_text=r"\.\.|following tab|table(|s) be|Metablen|in the table(|s)(|\.)|(T|t)able(|s) (be|of)|[a-z][a-z]table|table according"
-    textdata=re.sub(remove_text,"",str(text_between))
+    '''Text extraction engine of pdf_processor() (see set_text_backend). version names the engine and its settings,
+    it is part of the page text cache and manifest keys so that texts of different engines are never mixed.'''
 
-    preprocessed_text1=(re.sub(r'see Appendix|'+remove_text,"",temp) for temp in preprocessed_text)
+    name = None
+    version = None
 
-    if " Table " or " table " or " tables " or " Tables " or " TABLE " or " TABLES " in str(textdata):
-        table_start_list,table_end_list=out_tables_list(text_between)
+    def open(self, file_path):
+        raise NotImplementedError
 
-        if table_end_list!=['', ' ']:
 
-            table_start=re.search("Table(|s)\s*\-*\s*\w*",str(text_between))
+class _PyPDF2Document(TextDocument):
 
-            if table_start!=None:
-                j=0
-                find=''
-                find_list=['THE IFORMATION HEREIN','THE INFORMATION HEREIN','The information herein','Appendix']
-                text_at_end=''   
-                for word in range(0,len(find_list)):
+    def __init__(self, reader):
+        TextDocument.__init__(self, reader.getNumPages(), reader)
 
-                    for page in range(0,len(preprocessed_text)):
+    def _text(self, page):
+        return self.reader.getPage(page).extractText()
 
-                        if find_list[word] in preprocessed_text[page]:
-                            tablepage=page
-                            text_at_end=preprocessed_text[tablepage:len(preprocessed_text)]
-                            find=find_list[word]
-                            break
 
-                if find!='' and table_start!=' ' or '':
+class PyPDF2Backend(TextBackend):
 
-                    for table in range(0,len(table_start_list)):                        
-                        table_start=table_start_list[table]
-                        table_end=table_end_list[table]
+    '''PyPDF2's extractText(), the text the patterns of this module were written against (the default).'''
 
-                        if str(table_end) in str(text_at_end):
-                            pattern=str(table_start)+"(.+?)"+str(table_end)
+    name, version = 'pypdf2', EXTRACTOR_VERSION
 
-                        else:
-                            table_end=str(text_at_end)[len(str(text_at_end))-8:len(str(text_at_end))]
-                            pattern=str(table_start)+"(.+?)"+table_end
+    def open(self, file_path):
+        return _PyPDF2Document(PyPDF2.PdfFileReader(file_path))
 
-                        text_between=str(re.findall(pattern,str(text_at_end)))
 
-                        for k in range(tablepage,len(preprocessed_text)):
+class _PdfiumDocument(TextDocument):
 
-                            if table_start in preprocessed_text[k]:
-                                new_pages=str(k+1)+"-"+str(k+2)
-                                if k+1==pages:
-                                    new_pages=str(pages) 
-                                tabledata=read_pdf(file,output_format="dataframe",pages=new_pages,lattice=True,
-                                                   multiple_tables=True,encoding = 'latin-1',position="absolute")
-                        tabledata = string_comp_match(text_between=str(text_at_end),tabledata=tabledata)
+    def __init__(self, document):
+        TextDocument.__init__(self, len(document), document)
 
-                        if tabledata !=[]:
-                            break
-    return tabledata
+    def _text(self, page):
+        pdf_page = self.reader[page]
+        text_page = pdf_page.get_textpage()
+        try:
+            return text_page.get_text_range().replace("\r\n", "\n").replace("\r", "\n")
+        finally:
+            text_page.close()
+            pdf_page.close()
 
+    def close(self):
+        if self.reader is not None:
+            self.reader.close()
+        self.reader = None
 
-def value_unit_spacy(text_data):
-    '''To extract the value and unit of the precision in text_data
-    Parameters:
-    text_data(str): The extracted data under precision
 
-    Returns:
-    value(int): The precision value
-    unit(str): The unit type of precision value
-    len_value(int): Number of precision values in the text_data'''
+class PdfiumBackend(TextBackend):
 
+    '''PDFium through pypdfium2, several times faster than PyPDF2 on large documents. Line breaks are turned into
+    "\\n" as PyPDF2 gives them.'''
 
+    name, version = 'pdfium', "pypdfium2.get_text_range/1"
 
+    def open(self, file_path):
+        import pypdfium2
+        return _PdfiumDocument(pypdfium2.PdfDocument(file_path))
 
-    nlp=spacy.load("./text_final_1")
 
-    value_unit=[]
-    value_list=[]
-    unit_list=[]
+class _PdfminerDocument(TextDocument):
 
-    define_words = 'standard'
-    match_sentence =re.findall(r"([^.]*?%s.*?\.)(?!\d)" % define_words,str(text_data))
-    doc_value_unit=nlp(str(match_sentence))
+    def __init__(self, file_path):
+        from io import StringIO
+        from pdfminer.pdfparser import PDFParser
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+        from pdfminer.converter import TextConverter
 
-    for ent in doc_value_unit.ents:
-        if ent.label_=='value_unit':
-            value_unit.append(ent.text)
-            value_unit=''.join(value_unit)
-            value_temp=re.findall(r'(\d+?\.*\d*)',value_unit)
-            unit_temp=re.sub(r'\d+?\.*\d*',"",value_unit)
+        self._file = open(file_path, 'rb')
+        pdf_pages = list(PDFPage.create_pages(PDFDocument(PDFParser(self._file))))
+        TextDocument.__init__(self, len(pdf_pages), pdf_pages)
+        manager = PDFResourceManager()
+        self._output = StringIO()
+        self._interpreter = PDFPageInterpreter(manager, TextConverter(manager, self._output, laparams=None))
 
-            if '/' in str(unit_temp) and len(value_temp)>1:
-                uni=unit_temp.split('/')
-                val_1=value_temp
-                value_temp=value_temp[0]
-                unit_temp=str(uni[0]+'/'+str(val_1[1]+unit_temp[1]))
-            value_list.append(value_temp)    
-            unit_list.append(unit_temp)    
-            value_unit=[]
+    def _text(self, page):
+        self._output.seek(0)
+        self._output.truncate(0)
+        self._interpreter.process_page(self.reader[page])
+        return self._output.getvalue()
 
-    if value_list==[]:
-        value_list.append("No Value")
+    def close(self):
+        if self.reader is not None:
+            self._file.close()
+        self.reader = None
 
-    if unit_list==[]:
-        unit_list.append("No Unit")
 
-    value=pd.Series(value_list)
-    unit=pd.Series(unit_list)
+class PdfminerBackend(TextBackend):
 
-    temp_unit=re.search(r'wt\.(.+?)(\.|\%)',str(text_data))
-    if temp_unit != None and "wt/wt" not in str(text_data):
-        temp_unit=temp_unit.group(0)
-        for uni_1 in range(0,len(unit)):
-            unit[uni_1]=temp_unit
+    '''pdfminer.six without layout analysis (laparams=None): the text in content stream order as with PyPDF2,
+    with pdfminer's font decoding.'''
 
-    len_value=len(value)        
+    name, version = 'pdfminer', "pdfminer.TextConverter.nolayout/1"
 
-    return value,unit,len_value
+    def open(self, file_path):
+        return _PdfminerDocument(file_path)
 
 
+TEXT_BACKENDS = {'pypdf2': PyPDF2Backend, 'pdfium': PdfiumBackend, 'pdfminer': PdfminerBackend}
 
-def precision_type_spacy(text_data):
-    '''To extract the precision type 
-    Parameters:
-    text_data(str): The extracted data under precision
+_text_backend = PyPDF2Backend()
 
-    Returns:
-    precision_type(str): List of precision types for the precision values'''
 
-    precision_type=[]
+def set_text_backend(backend):
 
-    type_list=['relative','absolute','pooled','arelative']
+    '''Sets the TextBackend pdf_processor() extracts page texts with, by name (a TEXT_BACKENDS key) or as an object.'''
 
-    define_words = 'standard'
-    match_sentence =re.findall(r"([^.]*?%s.*?\.)(?!\d)" % define_words,str(text_data))
-    match_precision_type= re.findall(r'((?:\w+\s+){0,2}\bstandard\b\s*(?:\w+\s+){0})',str(match_sentence))
-    for match in match_precision_type:
-        temp=match.split( )
-        if len(temp) !=1 and temp[1] != 'ASTM':
-            if ((temp[0] in type_list) and (temp[1] in type_list)):
-                precision_type.append(temp[0]+temp[1])
-            elif temp[1] in type_list:
-                if temp[1]=='pooled':
-                    temp[1]='pooled absolute'
-                if temp[1]=='arelative':
-                    temp[1]='relative'
-                precision_type.append(temp[1])
-            else:
-                precision_type.append('nan')   
+    global _text_backend
+    if isinstance(backend, str):
+        backend = TEXT_BACKENDS[backend]()
+    _text_backend = backend
 
-    if precision_type==[]:
-        precision_type.append("No Precision type")
-    precision_type_list=pd.Series(precision_type)   
-    precision_type_list=precision_type_list.replace('nan','absolute')
 
-    length_value=value_unit_spacy(text_data)[2]
+def text_backend():
 
-    precision_type_list=precision_type_list.tolist()
-    if length_value==2 and len(precision_type_list)==1:
-        precision_type_list.extend([0] * (length_value-1))
-        precision_type_list[1]=precision_type_list[0]
+    '''Returns the TextBackend of this process.'''
 
-    precision_type_list=pd.Series(precision_type_list)
+    return _text_backend
 
-    return precision_type_list
 
+def file_content_hash(file_path):
 
-def distribution_spacy(text_data):
-    '''To extract the distribution of the component(s) or matrix 
-    Parameters:
-    text_data(str): The extracted data under precision
+    '''Returns the sha256 hex digest of the content of a file.'''
 
-    Returns:
-    distribution: List of distribution(s) for the component(s) or matrix'''
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as pdf_file:
+        for chunk in iter(lambda: pdf_file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 
-    nlp=spacy.load("./text_model_1")
+class PageTextCache(object):
 
-    distribution=[]
+    '''On-disk cache (SQLite) of the raw page texts of pdfs, keyed by (file content hash, extractor version).
+    A changed file has a new content hash, so it is never served stale texts. Entries are zlib-compressed and
+    the least recently used ones are evicted once the cache grows beyond max_bytes.
 
-    length_value=value_unit_spacy(text_data)[2]
-    match_distribution = re.findall(r'((?:\w+\s+){0,5}\bnormal\b\s*(?:\S+\s+){1})',str(text_data))
+    Parameters:
 
-    for dist in range(0,len(match_distribution)):
-        if match_distribution[dist] == 'did not originate from a normal distribution.  ':
-            match_distribution[dist]='assumes a non- normal distribution'
+    path(str): Path of the SQLite database file
 
-    doc_distribution=nlp(str(match_distribution))
+    max_bytes(number): Maximum total size of the compressed page texts
 
-    for ent in doc_distribution.ents:
-        distribution.append(ent.text)
+    '''
 
-    if len(distribution)==0:
+    def __init__(self, path, max_bytes=2 * 1024 ** 3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._connection = None
+        self._pid = None
+
+    def _connect(self):
+        # sqlite connections must not cross a fork, every corpus worker opens its own
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=60)
+            self._pid = os.getpid()
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS page_texts (content_hash TEXT, extractor TEXT, "
+                                     "pages BLOB, size INTEGER, last_used REAL, "
+                                     "PRIMARY KEY (content_hash, extractor))")
+            self._connection.commit()
+        return self._connection
+
+    def get(self, content_hash, extractor=None):
+        extractor = extractor or _text_backend.version
+        connection = self._connect()
+        row = connection.execute("SELECT pages FROM page_texts WHERE content_hash=? AND extractor=?",
+                                 (content_hash, extractor)).fetchone()
+        if row is None:
+            return None
+        with connection:
+            connection.execute("UPDATE page_texts SET last_used=? WHERE content_hash=? AND extractor=?",
+                               (time.time(), content_hash, extractor))
+        return json.loads(zlib.decompress(row[0]).decode('utf-8'))
+
+    def put(self, content_hash, page_texts, extractor=None):
+        extractor = extractor or _text_backend.version
+        connection = self._connect()
+        blob = zlib.compress(json.dumps(page_texts).encode('utf-8'))
+        with connection:
+            connection.execute("INSERT OR REPLACE INTO page_texts VALUES (?, ?, ?, ?, ?)",
+                               (content_hash, extractor, blob, len(blob), time.time()))
+        self.evict()
+
+    def size(self):
+        return self._connect().execute("SELECT COALESCE(SUM(size), 0) FROM page_texts").fetchone()[0]
+
+    def evict(self):
+
+        '''Removes the least recently used entries until the cache fits in max_bytes.'''
+
+        connection = self._connect()
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return
+        with connection:
+            for content_hash, extractor, size in connection.execute(
+                    "SELECT content_hash, extractor, size FROM page_texts ORDER BY last_used").fetchall():
+                if excess <= 0:
+                    break
+                connection.execute("DELETE FROM page_texts WHERE content_hash=? AND extractor=?",
+                                   (content_hash, extractor))
+                excess -= size
+
+
+_page_text_cache = None
+
+
+def set_page_text_cache(cache):
+
+    '''Sets the PageTextCache used by pdf_processor(). cache can be a PageTextCache, the path of its
+    database or None to read every pdf again.'''
+
+    global _page_text_cache
+    if isinstance(cache, str):
+        cache = PageTextCache(cache)
+    _page_text_cache = cache
+
+
+@profiled('pdf_text')
+def extract_page_texts(file_path):
+
+    '''This function returns the raw text of every page of a pdf, from the page text cache when it has them.
+
+    Parameters:
+
+    file_path(str): Path to read a pdf file from a directory.
+
+    returns:
+
+    page_texts(list): Raw text of each page
+
+    corpus(object): PyPDF2.corpus object of the pdf, None when the texts came from the cache or from another
+    text backend than PyPDF2 (see set_text_backend)
+
+    '''
+
+    cache = _page_text_cache
+    if cache is not None:
+        content_hash = file_content_hash(file_path)
+        page_texts = cache.get(content_hash)
+        if page_texts is not None:
+            return page_texts, None
+
+    document = _text_backend.open(file_path)
+    page_texts = [document.text(page_num) for page_num in range(0, document.pages)]
+    profile_count('pdf_pages', len(page_texts))
+    corpus = document.reader if isinstance(document, _PyPDF2Document) else None
+    if corpus is None:
+        document.close()
+
+    if cache is not None:
+        cache.put(content_hash, page_texts)
+    return page_texts, corpus
+
+
+_stream_pages = False
+
+
+def set_page_streaming(enabled):
+
+    '''Turns the streaming mode of pdf_processor() and pdf_multi_processor() on or off for this process. The table
+    stages read the remaining pages (see complete_pages), so only the text stages read less.'''
+
+    global _stream_pages
+    _stream_pages = enabled
+
+
+class PageStream(object):
+
+    '''Reads the raw page texts of a pdf one page at a time, as they are asked for, with the text backend of the
+    process. The document is closed (and the texts put in the page text cache) once the last page is read, and a pdf
+    already in the page text cache is not opened at all.
+
+    Parameters:
+
+    file_path(str): Path to read a pdf file from a directory.
+
+    '''
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.texts = []
+        self._document = None
+        self._content_hash = None
+        cache = _page_text_cache
+        if cache is not None:
+            self._content_hash = file_content_hash(file_path)
+            page_texts = cache.get(self._content_hash)
+            if page_texts is not None:
+                self.texts = page_texts
+                self.pages = len(page_texts)
+                return
+        self._document = _text_backend.open(file_path)
+        self.pages = self._document.pages
+
+    def text(self, page):
+
+        '''Returns the raw text of page (0-based), reading the pages up to it.'''
+
+        while len(self.texts) <= page:
+            with profile_stage('pdf_text'):
+                self.texts.append(self._document.text(len(self.texts)))
+            profile_count('pdf_pages')
+            if len(self.texts) == self.pages:
+                self.close()
+        return self.texts[page]
+
+    def close(self):
+        if self._document is not None:
+            if len(self.texts) == self.pages and _page_text_cache is not None:
+                _page_text_cache.put(self._content_hash, self.texts)
+            self._document.close()
+        self._document = None
+
+
+class PageList(list):
+
+    '''The preprocessed pages of one header that have been read from a PageStream so far. It is the list of those
+    pages for every stage; a stage that needs the whole document calls read_all() (see complete_pages()).
+
+    Parameters:
+
+    stream(object): PageStream of the pdf
+
+    header(str): The heading the pages are preprocessed for
+
+    '''
+
+    def __init__(self, stream, header):
+        list.__init__(self)
+        self.stream = stream
+        self.header = header
+
+    @property
+    def total_pages(self):
+        return self.stream.pages
+
+    def read_page(self):
+
+        '''Appends the next preprocessed page, returns False when all pages were already read.'''
+
+        if len(self) >= self.stream.pages:
+            return False
+        self.append(pdf_text_pre_processor(self.header, self.stream.text(len(self))))
+        return True
+
+    def read_all(self):
+        while self.read_page():
+            pass
+
+
+def complete_pages(preprocessed_text, index=None):
+
+    '''Reads the pages a PageList has not read yet and adds them to its section_index() (for stages that look at
+    the whole document). A plain list is left as it is.'''
+
+    if isinstance(preprocessed_text, PageList) and len(preprocessed_text) < preprocessed_text.total_pages:
+        preprocessed_text.read_all()
+        if index is not None:
+            extend_section_index(index, preprocessed_text)
+    return preprocessed_text
+
+
+def page_count(preprocessed_text):
+
+    '''Returns the number of pages of the document, also of a PageList that has not read them all.'''
+
+    return getattr(preprocessed_text, 'total_pages', len(preprocessed_text))
+
+
+def pdf_processor(file_path, header, stream=None):
+
+    '''This function takes the file path and header as inputs and returns heading start , end patterns 
+    and also preprocessed text by calling pdf_text_pre_processor().
+
+    Parameters:
+
+    file_path(str): Path to read a pdf file from a directory.
+
+    header(str): The heading of interest
+
+    returns:
+
+    preprocessed_text(list): Required preprocessed text from pdf
+
+    start(str): Start pattern of the header, the text under which we are interested in
+
+    end(str): End pattern of the header,the text under which we are interested in
+
+    pdf_name(str): filename or the DOWID of the document (without file extension)
+
+    corpus(object): PyPDF2.corpus object file can be used to read the pdf later (None when the page texts
+    came from the page text cache, see set_page_text_cache)
+
+    header(str): String pattern of the header, for example 'Precision'
+
+    pages(number): total number of pages in the document
+
+    With stream (default: set_page_streaming()), preprocessed_text is a PageList that stops reading once the
+    section has its end and a SECTION_ANCHORS anchor was found after it (see _stream_header_processor()), and
+    corpus is None.
+
+    '''
+
+    pdf_name = file_path.split('/')[-1].split('\\')[-1].split('.')[0]
+
+    if _stream_pages if stream is None else stream:
+        return _stream_header_processor(PageStream(file_path), pdf_name, header)
+
+    page_texts, corpus = extract_page_texts(file_path)
+
+    return _header_processor(page_texts, corpus, pdf_name, header)
+
+
+@profiled('preprocess')
+def _header_processor(page_texts, corpus, pdf_name, header):
+
+    pages = len(page_texts)
+
+    preprocessed_text = [pdf_text_pre_processor(header, page_text) for page_text in page_texts]
+
+    start, end = _header_start_end(preprocessed_text, header)
+
+    return preprocessed_text, start, end, pdf_name,corpus,header,pages
+
+
+def _header_start_end(preprocessed_text, header):
+
+    text = ' '.join(preprocessed_text)
+
+    if all([header not in text for text in preprocessed_text]):
+        start, end = np.nan, np.nan
+
+    else:
+        start = header_patterns(header)['start'].search(text)
+
+        if(start == None):
+            start, end = np.nan, np.nan
+
+
+        else:
+
+            if '.' in start.group(0):
+                start1 = start.group(0).split('.')[0]
+                end = str(int(start1) + 1) + "\."
+
+            else:
+                start1 = start.group(0).split(' ')[0]
+                end = str(int(start1) + 1) + " "
+
+            start = start.group(0)
+
+    return start, end
+
+
+@profiled('preprocess')
+def _stream_header_processor(stream, pdf_name, header):
+
+    '''pdf_processor() on the pages of a PageStream, reading pages only until the section can be cut out of them:
+    the header start pattern was found on them, the first section pattern of text_data() (start ... end followed
+    by a capital) matches after it and one of the SECTION_ANCHORS comes after the section end. One more page is
+    read after that, so that no pattern is cut at the last page read. When one of them is missing every page is read.'''
+
+    preprocessed_text = PageList(stream, header)
+    start_pattern = header_patterns(header)['start']
+    margin = len(header) + 16
+    joined, header_seen, found, end_position, look_ahead = '', False, None, None, False
+
+    while preprocessed_text.read_page():
+        if look_ahead:
+            break
+        previous = len(joined)
+        joined = ' '.join(preprocessed_text)
+        header_seen = header_seen or header in preprocessed_text[-1]
+        if not header_seen:
+            continue
+        if found is None:
+            found = start_pattern.search(joined, max(0, previous - margin))
+            if found is None:
+                continue
+            previous = found.end()
+            start, end = _header_start_end(preprocessed_text, header)
+            pattern, terminator = section_patterns(start, end)[0]
+        if end_position is None:
+            if terminator.search(joined, max(found.start(), previous - margin)) is None:
+                continue
+            match = _boundary_search(joined, start, pattern, terminator, found.start(),
+                                     time.monotonic() + SECTION_SEARCH_BUDGET)
+            if match is None:
+                continue
+            end_position, previous = match.end(), match.end()
+        look_ahead = any(joined.find(anchor, max(end_position, previous - margin)) != -1 for anchor in SECTION_ANCHORS)
+
+    start, end = _header_start_end(preprocessed_text, header)
+    return preprocessed_text, start, end, pdf_name,None,header,stream.pages
+
+
+def pdf_multi_processor(file_path, headers, stream=None):
+
+    '''This function parses the pdf once and returns the pdf_processor() outputs of every header in headers,
+    all computed from the same raw page texts.
+
+    Parameters:
+
+    file_path(str): Path to read a pdf file from a directory.
+
+    headers(list): The headings of interest, for example ['Precision', 'Scope', 'Accuracy']
+
+    returns:
+
+    processed(dict): header -> (preprocessed_text, start, end, pdf_name, corpus, header, pages) as returned by pdf_processor()
+
+    With stream (default: set_page_streaming()) the headers share one PageStream, each reading as far as it needs.
+
+    '''
+
+    pdf_name = file_path.split('/')[-1].split('\\')[-1].split('.')[0]
+
+    if _stream_pages if stream is None else stream:
+        page_stream = PageStream(file_path)
+        return {header: _stream_header_processor(page_stream, pdf_name, header) for header in headers}
+
+    page_texts, corpus = extract_page_texts(file_path)
+
+    return {header: _header_processor(page_texts, corpus, pdf_name, header) for header in headers}
+
+
+SECTION_ANCHORS = ['THE IFORMATION HEREIN','THE INFORMATION HEREIN','The information herein','Appendix']
+
+
+@profiled('section_index')
+def section_index(preprocessed_text, headers=()):
+
+    '''This function builds the page-level index of a document used for header, table caption and anchor lookups.
+
+    Parameters:
+
+    preprocessed_text(list): The list of preprocessed text in a list
+
+    headers(list): Headers whose occurrences are indexed, for example ['Precision']
+
+    returns:
+
+    index(dict): 'offsets' maps each indexed string (headers, SECTION_ANCHORS and every "Table <number>" caption
+    prefix) to all its (page, offset) occurrences, 'page_starts' is the offset of each page in ' '.join(preprocessed_text)
+
+    '''
+
+    index = {'offsets': {}, 'headers': list(headers), 'page_starts': []}
+    return extend_section_index(index, preprocessed_text)
+
+
+def extend_section_index(index, preprocessed_text):
+
+    '''Adds the pages of preprocessed_text after the ones the section_index() already has (for example the pages
+    a PageList read later) to the index, and returns it.'''
+
+    offsets, page_starts = index['offsets'], index['page_starts']
+    keys = index['headers'] + SECTION_ANCHORS
+    position = 0
+    if page_starts:
+        position = page_starts[-1] + len(str(preprocessed_text[len(page_starts) - 1])) + 1
+
+    for page in range(len(page_starts), len(preprocessed_text)):
+        text = str(preprocessed_text[page])
+        page_starts.append(position)
+        position += len(text) + 1
+
+        for key in keys:
+            offset = text.find(key)
+            while offset != -1:
+                offsets.setdefault(key, []).append((page, offset))
+                offset = text.find(key, offset + 1)
+
+        # every prefix of the caption number is indexed, so that "Table 1" also finds pages with "Table 12"
+        offset = text.find("Table ")
+        while offset != -1:
+            number = re.match(r"[0-9A-Za-z]{1,8}", text[offset + 6:])
+            if number is not None:
+                for length in range(1, len(number.group(0)) + 1):
+                    offsets.setdefault("Table " + number.group(0)[:length], []).append((page, offset))
+            offset = text.find("Table ", offset + 1)
+
+    return index
+
+
+def index_pages(index, preprocessed_text, needle):
+
+    '''This function returns the numbers of the pages that contain needle, same as scanning every page with
+    "needle in page". Only the pages where the most selective indexed string contained in needle occurs are checked.
+
+    Parameters:
+
+    index(dict): section_index() of preprocessed_text, None to scan every page
+
+    preprocessed_text(list): The list of preprocessed text in a list
+
+    needle(str): The text to look for
+
+    returns:
+
+    pages(list): Page numbers in increasing order
+
+    '''
+
+    needle = str(needle)
+    candidates = None
+    if index is not None:
+        occurrences = [index['offsets'].get(key, []) for key in index['offsets'] if key in needle]
+        if occurrences:
+            candidates = sorted(set(page for page, offset in min(occurrences, key=len)))
+    if candidates is None:
+        candidates = range(0, len(preprocessed_text))
+    return [page for page in candidates if needle in str(preprocessed_text[page])]
+
+
+def _section_search_start(index, start):
+
+    '''Returns the offset in the joined text before which no match of the start pattern can begin, using the first
+    indexed occurrence of the header that ends start. 0 when the index cannot tell.'''
+
+    if index is None:
+        return 0
+    for header in index['headers']:
+        prefix = start[0:len(start) - len(header)]
+        if start.endswith(header) and ' ' not in header and re.match(r"[0-9A-Za-z .]*$", prefix):
+            occurrences = index['offsets'].get(header)
+            if not occurrences:
+                return 0
+            page, offset = occurrences[0]
+            return max(0, index['page_starts'][page] + offset - len(prefix))
+    return 0
+
+
+# In[4]:
+
+
+SECTION_SEARCH_BUDGET = 5.0
+
+
+@functools.lru_cache(maxsize=256)
+def section_patterns(start, end):
+
+    '''Returns the compiled start(.+?)end patterns text_data() tries in order, each paired with its compiled end
+    part (the terminator), cached by (start, end).'''
+
+    end1= re.sub(r'\\\.','',end)
+    terminators = [end + "\s*[A-Z]", end1 + "\s+[A-Z]", end + "\s*[a-z]",
+                   "THE INFORMATION HEREIN", "The information herein", "Appendix"]
+    return [(re.compile(r'' + start + "(.+?)" + terminator), re.compile(terminator)) for terminator in terminators]
+
+
+def _boundary_search(text, start, pattern, terminator, search_start, deadline):
+
+    '''This function returns the same match as pattern.search(text, search_start) for a start(.+?)terminator pattern
+    without scanning to the end of the text from every start occurrence.
+
+    The start occurrences are visited left to right, and the pattern is only tried at one of them when the terminator
+    still occurs after it. The earliest terminator is found once and reused until the start occurrences pass it, so a
+    missing terminator costs one scan of the text instead of one per start occurrence.
+
+    returns:
+
+    match(object): The match, None when there is none or when the deadline passed
+
+    '''
+
+    start_pattern = compiled_pattern(start)
+    position, found = search_start, None
+    while time.monotonic() < deadline:
+        candidate = start_pattern.search(text, position)
+        if candidate is None:
+            return None
+        if found is None or found.start() < candidate.start():
+            found = terminator.search(text, candidate.start())
+            if found is None:
+                return None
+        match = pattern.match(text, candidate.start())
+        if match is not None:
+            return match
+        position = candidate.start() + 1
+    return None
+
+
+@profiled('text_data')
+def text_data(preprocessed_text, start, end, index=None, time_budget=SECTION_SEARCH_BUDGET):
+    '''This is a function that returns the text in between the given start and end patterns.
+
+    Parameters:
+
+    preprocessed_text(list): The list of preprocessed text in a list
+
+    start(str): This is a start pattern 
+
+    end (str): This is an end pattern
+
+    index(dict): section_index() of preprocessed_text, used to skip the text before the first header occurrence
+
+    time_budget(float): Seconds the boundary search may take for the document, after which the patterns left are
+    not tried and the text found so far ('') is returned
+
+    Returns:
+
+    text_between(str): The output is the text between the given patterns
+
+    ''' 
+    text_between=''
+    if str(start) != 'nan':
+        text = ' '.join(preprocessed_text)
+        search_start = _section_search_start(index, start)
+        patterns= section_patterns(start, end)
+        deadline = time.monotonic() + time_budget
+        # an alternation in start would split the pattern somewhere else than at (.+?)
+        scan = '|' not in start
+
+        for pattern, terminator in patterns:
+            if time.monotonic() >= deadline:
+                break
+            if scan:
+                temp = _boundary_search(text, start, pattern, terminator, search_start, deadline)
+            else:
+                temp = pattern.search(text, search_start)
+            if temp is not None:
+                text_between = temp.group(1)
+                break
+        return text_between
+
+
+
+_TABULA_SERVER_CODE = '''
+import sys, pickle, inspect
+requests, responses = sys.stdin.buffer, sys.stdout.buffer
+# java and tabula messages must not end up in the response stream
+sys.stdout = sys.stderr
+try:
+    import tabula
+    # tabula-py 2.8 and later run tabula-java in a jpype JVM that stays up between calls, the earlier versions
+    # start java for every call, which is what the server is there to avoid
+    try:
+        import tabula.io
+        persistent = hasattr(tabula.io, "TabulaVm")
+    except ImportError:
+        persistent = False
+    if not persistent:
+        raise RuntimeError("the tabula server needs tabula-py >= 2.8 (with jpype1), found tabula-py " +
+                           str(getattr(tabula, "__version__", "1.x")))
+    from tabula.io import read_pdf
+    known_options = set(inspect.signature(read_pdf).parameters)
+    # the pipeline passes position, which tabula-py 1.x ignores (as all the options it does not know) and 2.x refuses
+    ignored_options = set(["position"])
+    ready = ("ready", tabula.__version__)
+except Exception as error:
+    ready = ("error", RuntimeError(str(error)))
+responses.write(pickle.dumps(ready))
+responses.flush()
+if ready[0] != "ready":
+    sys.exit(1)
+while True:
+    try:
+        file, kwargs = pickle.load(requests)
+    except EOFError:
+        break
+    try:
+        unknown = sorted(key for key in kwargs if key not in known_options and key not in ignored_options)
+        if unknown:
+            raise ValueError("tabula-py %s does not support the options %s" % (tabula.__version__, ", ".join(unknown)))
+        kwargs = dict((key, value) for key, value in kwargs.items() if key in known_options)
+        response = pickle.dumps(('ok', read_pdf(file, **kwargs)))
+    except Exception as error:
+        try:
+            response = pickle.dumps(('error', error))
+        except Exception:
+            response = pickle.dumps(('error', RuntimeError(repr(error))))
+    responses.write(response)
+    responses.flush()
+'''
+
+
+class TabulaServer(object):
+
+    '''Long-lived helper process that runs tabula's read_pdf for this process, so the JVM is started once and kept
+    warm instead of once per call. The helper needs tabula-py 2.8 or later (with jpype1), which keeps tabula-java in
+    a JVM inside the helper between requests. As this pipeline uses tabula-py 1.x, the helper is usually run by the
+    python of a separate environment. start() raises RuntimeError when the helper's tabula-py starts java per call,
+    and read_pdf() raises ValueError for an option the helper's tabula-py does not support. The helper is restarted
+    when it crashes or does not answer within timeout seconds, and it exits when stop() is called or this process
+    dies. tabula_server_report() checks that its tables are the same as the ones of the tabula-py of this process.
+
+    Parameters:
+
+    python(str): Python interpreter (with tabula-py >= 2.8) that runs the helper, the current one by default
+
+    timeout(number): Seconds to wait for the helper to start or to answer a request, None to wait forever
+
+    '''
+
+    def __init__(self, python=sys.executable, timeout=300):
+        self.python = python
+        self.timeout = timeout
+        self.restarts = 0
+        self.tabula_version = None
+        self._process = None
+
+    def start(self):
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen([self.python, "-c", _TABULA_SERVER_CODE],
+                                             stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            try:
+                status, result = self._response("to start")
+            except (EOFError, pickle.UnpicklingError):
+                status, result = 'error', RuntimeError("the tabula server did not start")
+            if status != 'ready':
+                self.stop()
+                raise result
+            self.tabula_version = result
+        return self
+
+    def stop(self):
+        process, self._process = self._process, None
+        if process is not None and process.poll() is None:
+            process.stdin.close()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+    def kill(self):
+        process, self._process = self._process, None
+        if process is not None:
+            process.kill()
+            process.wait()
+            process.stdin.close()
+            process.stdout.close()
+
+    def restart(self):
+        self.stop()
+        self.restarts += 1
+        return self.start()
+
+    def _response(self, what):
+
+        '''Reads the next response of the helper. A helper that sends nothing within timeout seconds (for example
+        a hung JVM) is killed and TimeoutError is raised.'''
+
+        if self.timeout is not None:
+            readable, writable, failed = select.select([self._process.stdout], [], [], self.timeout)
+            if not readable:
+                self.kill()
+                raise TimeoutError("the tabula server took more than %s seconds %s" % (self.timeout, what))
+        return pickle.load(self._process.stdout)
+
+    def read_pdf(self, file, **kwargs):
+
+        '''Same as tabula's read_pdf(file, **kwargs), run in the helper process. A request that finds the helper
+        dead is retried once on a restarted helper. A request the helper does not answer in time raises
+        TimeoutError, after the helper is restarted for the next requests.'''
+
+        for attempt in range(0, 2):
+            self.start()
+            try:
+                pickle.dump((file, kwargs), self._process.stdin)
+                self._process.stdin.flush()
+                status, result = self._response("reading " + str(file))
+            except TimeoutError:
+                # the same request would hang the new helper too, so it is not retried
+                self.restarts += 1
+                self.start()
+                raise
+            except (EOFError, OSError, pickle.UnpicklingError):
+                self.restart()
+                continue
+            if status == 'error':
+                raise result
+            return result
+        raise RuntimeError("tabula server crashed while reading " + str(file))
+
+
+_table_backend = None
+
+
+def set_table_backend(backend):
+
+    '''Sets the object whose read_pdf() runs all table extraction (for example a started TabulaServer),
+    None to call tabula directly. A previous TabulaServer backend is stopped.'''
+
+    global _table_backend
+    if isinstance(_table_backend, TabulaServer) and _table_backend is not backend:
+        _table_backend.stop()
+    _table_backend = backend
+
+
+def start_tabula_server(python=sys.executable):
+
+    '''Starts a TabulaServer run by python, makes it the table backend of this process and stops it at exit.'''
+
+    server = TabulaServer(python).start()
+    set_table_backend(server)
+    atexit.register(server.stop)
+    return server
+
+
+def tabula_server_report(test_pdfs, python=sys.executable, max_pages=None):
+
+    '''This function checks that a TabulaServer run by python reads the same tables as the tabula-py of this process.
+    Every page is read in both modes with the TABULA_OPTIONS of the pipeline, by the server and by read_pdf() here
+    (without any cache), and the tables are compared.
+
+    Parameters:
+
+    test_pdfs(list): Paths of the pdf files
+
+    python(str): Python interpreter (with tabula-py >= 2.8) that runs the TabulaServer
+
+    max_pages(number): Only the first max_pages pages of each pdf are checked when given
+
+    returns:
+
+    report(DataFrame): One row per page and mode with the number of tables of each side and whether they are equal
+
+    summary(dict): Number of reads, the share of equal ones and the tabula-py version of each side
+
+    '''
+
+    rows = []
+    server = TabulaServer(python).start()
+    try:
+        for test_pdf in test_pdfs:
+            pages = PyPDF2.PdfFileReader(test_pdf).getNumPages()
+            if max_pages is not None:
+                pages = min(pages, max_pages)
+            for page in range(1, pages + 1):
+                for lattice in [True, False]:
+                    tables = read_pdf(test_pdf, pages=str(page), lattice=lattice, **TABULA_OPTIONS)
+                    server_tables = server.read_pdf(test_pdf, pages=str(page), lattice=lattice, **TABULA_OPTIONS)
+                    equal = len(tables) == len(server_tables) and all(
+                        table.equals(server_table) for table, server_table in zip(tables, server_tables))
+                    rows.append({'file': test_pdf, 'page': page, 'mode': 'lattice' if lattice else 'stream',
+                                 'tables': len(tables), 'server_tables': len(server_tables), 'equal': equal})
+    finally:
+        server.stop()
+
+    report = pd.DataFrame(rows, columns=['file', 'page', 'mode', 'tables', 'server_tables', 'equal'])
+    summary = {'reads': len(report),
+               'equal': float(report['equal'].mean()) if len(report) else None,
+               'tabula': getattr(sys.modules.get('tabula'), '__version__', None),
+               'server_tabula': server.tabula_version}
+    return report, summary
+
+
+def _backend_read_pdf(file, **kwargs):
+    profile_count('read_pdf')
+    profile_count('read_pdf.lattice' if kwargs.get('lattice') else 'read_pdf.stream')
+    with profile_stage('tabula'):
+        if _table_backend is None:
+            return read_pdf(file, **kwargs)
+        return _table_backend.read_pdf(file, **kwargs)
+
+
+@functools.lru_cache(maxsize=None)
+def _tabula_json_converter():
+
+    '''Returns tabula-py's json to dataframes conversion, None when this tabula version does not have it.'''
+
+    try:
+        from tabula.io import _extract_from
+    except ImportError:
+        try:
+            from tabula.wrapper import _extract_from
+        except ImportError:
+            return None
+    return _extract_from
+
+
+def tabula_json_to_dataframes(tables):
+    return _tabula_json_converter()(tables)
+
+
+def page_numbers(pages):
+
+    '''Returns the list of page numbers of a tabula pages option such as 3, "3", "3-4" or "1,3-4".'''
+
+    numbers = []
+    for part in str(pages).split(','):
+        if '-' in part:
+            first, last = part.split('-')
+            numbers.extend(range(int(first), int(last) + 1))
+        else:
+            numbers.append(int(part))
+    return numbers
+
+
+class TableCache(object):
+
+    '''Memoized tabula results per (document, page, options). tabula reads the tables of every page on its own, so a
+    range request is answered with the cached tables of each page in order and the missing pages of the request are
+    sent to tabula with one call per set of options (lattice or stream). Tables are copied on the way out because the
+    pipeline modifies them.
+
+    Parameters:
+
+    directory(str): Optional directory of gzip pickles keyed by pdf content hash, shared across runs
+
+    max_documents(number): Number of documents whose tables are kept in memory
+
+    '''
+
+    def __init__(self, directory=None, max_documents=4):
+        self.directory = directory
+        self.max_documents = max_documents
+        self.requests = 0
+        self.tabula_calls = 0
+        # unknown until the first prefetch, which imports tabula to find out
+        self.json_page_numbers = None
+        self._documents = collections.OrderedDict()
+
+    def _document(self, file):
+        stat = os.stat(file)
+        key = (os.path.abspath(file), stat.st_mtime, stat.st_size)
+        if key not in self._documents:
+            content_hash = file_content_hash(file) if self.directory is not None else None
+            self._documents[key] = (content_hash, {})
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+        self._documents.move_to_end(key)
+        return self._documents[key]
+
+    def _disk_path(self, content_hash, page, options):
+        options_hash = hashlib.sha1(repr(options).encode('utf-8')).hexdigest()[0:16]
+        return os.path.join(self.directory, "%s-%d-%s.pkl.gz" % (content_hash, page, options_hash))
+
+    def _cached(self, file, page, options):
+        content_hash, tables = self._document(file)
+        if (page, options) not in tables and self.directory is not None:
+            disk_path = self._disk_path(content_hash, page, options)
+            if os.path.exists(disk_path):
+                with gzip.open(disk_path, 'rb') as cached:
+                    tables[(page, options)] = pickle.load(cached)
+        return tables.get((page, options))
+
+    def _store(self, file, page, options, page_tables):
+        content_hash, tables = self._document(file)
+        tables[(page, options)] = page_tables
+        if self.directory is not None:
+            disk_path = self._disk_path(content_hash, page, options)
+            os.makedirs(self.directory, exist_ok=True)
+            with gzip.open(disk_path + '.tmp', 'wb') as cached:
+                pickle.dump(page_tables, cached)
+            os.replace(disk_path + '.tmp', disk_path)
+
+    def _fetch(self, file, pages, options, kwargs):
+
+        '''Reads the tables of pages with one tabula call and caches them per page. The call asks tabula for json,
+        splits the tables by their page_number and converts them with tabula-py's own json to dataframe conversion,
+        so they are the same as a "dataframe" read_pdf. Returns False when this tabula version does not report
+        page numbers, and nothing was cached.'''
+
+        if self.json_page_numbers is None:
+            self.json_page_numbers = _tabula_json_converter() is not None
+        if not self.json_page_numbers:
+            return False
+        json_kwargs = dict(kwargs, output_format="json")
+        self.tabula_calls += 1
+        raw_tables = _backend_read_pdf(file, pages=",".join(str(page) for page in pages), **json_kwargs)
+        if any('page_number' not in table for table in raw_tables):
+            self.json_page_numbers = False
+            return False
+        page_json = {page: [] for page in pages}
+        for table in raw_tables:
+            page_json.setdefault(int(table['page_number']), []).append(table)
+        for page in pages:
+            self._store(file, page, options, tabula_json_to_dataframes(page_json[page]))
+        return True
+
+    @staticmethod
+    def _options(kwargs):
+        return tuple(sorted((key, repr(value)) for key, value in kwargs.items()))
+
+    def read_pdf(self, file, pages, **kwargs):
+        self.requests += 1
+        options = self._options(kwargs)
+        numbers = page_numbers(pages)
+        missing = sorted(set(page for page in numbers if self._cached(file, page, options) is None))
+        if missing and not self._fetch(file, missing, options, kwargs):
+            # the tables can not be split by page, so the range is read as it was asked for
+            self.tabula_calls += 1
+            return _backend_read_pdf(file, pages=pages, **kwargs)
+        tabledata = []
+        for page in numbers:
+            tabledata = tabledata + [table.copy() for table in self._cached(file, page, options)]
+        return tabledata
+
+    def prefetch(self, file, pages, **kwargs):
+
+        '''Reads the tables of all the missing pages with one tabula call (see _fetch) and caches them per page.
+        Returns the pages that had no table, or None when this tabula version does not report page numbers
+        (the pages are then read on request).'''
+
+        if self.json_page_numbers is False:
+            return None
+        options = self._options(kwargs)
+        pages = sorted(set(pages))
+        missing = [page for page in pages if self._cached(file, page, options) is None]
+        if missing and not self._fetch(file, missing, options, kwargs):
+            return None
+        return [page for page in pages if self._cached(file, page, options) == []]
+
+
+_table_cache = None
+
+
+def set_table_cache(cache):
+
+    '''Sets the TableCache used by tabula_read_pdf(). cache can be a TableCache, True for an in-memory cache,
+    the path of a directory for a cache also kept on disk, or None to send every request to tabula.'''
+
+    global _table_cache
+    if cache is True:
+        cache = TableCache()
+    elif isinstance(cache, str):
+        cache = TableCache(cache)
+    _table_cache = cache
+
+
+def tabula_read_pdf(file, **kwargs):
+
+    '''Runs tabula's read_pdf(file, **kwargs) through the table cache (see set_table_cache) and the table backend
+    of this process (see set_table_backend).'''
+
+    if _table_cache is not None and kwargs.get('output_format') == "dataframe" and 'pages' in kwargs:
+        return _table_cache.read_pdf(file, **kwargs)
+    return _backend_read_pdf(file, **kwargs)
+
+
+_RECTANGLE_OPERATOR = re.compile(rb"(?:-?[0-9.]+\s+){4}re\b")
+_LINE_OPERATOR = re.compile(rb"(?:-?[0-9.]+\s+){2}l\b")
+_NUMBER_TOKEN = re.compile(r"-?\d+(?:\.\d+)?")
+
+RULING_OPERATORS = 4
+NUMERIC_ROWS = 3
+
+_predict_table_modes = False
+_page_features = collections.OrderedDict()
+
+
+def _page_content_bytes(page):
+    content = page.getContents()
+    if content is None:
+        return b''
+    if isinstance(content, PyPDF2.generic.ArrayObject):
+        return b'\n'.join(part.getObject().getData() for part in content)
+    return content.getData()
+
+
+def page_table_features(file, page):
+
+    '''This function returns the cheap features used to predict whether a page has a table: the number of rectangle
+    ("re") and line ("l") drawing operators in the page content stream and the number of text rows with two or more numbers.
+
+    Parameters:
+
+    file(str): filename or the DOWID of the document
+
+    page(number): Page number (1-based)
+
+    returns:
+
+    features(dict): 'rectangles', 'lines' and 'numeric_rows' of the page, None when the pdf has no such page
+
+    '''
+
+    stat = os.stat(file)
+    key = (os.path.abspath(file), stat.st_mtime, stat.st_size)
+    if key not in _page_features:
+        _page_features[key] = (PyPDF2.PdfFileReader(file), {})
+        while len(_page_features) > 4:
+            _page_features.popitem(last=False)
+    corpus, features = _page_features[key]
+
+    if page not in features:
+        if page < 1 or page > corpus.getNumPages():
+            features[page] = None
+        else:
+            pdf_page = corpus.getPage(page - 1)
+            content = _page_content_bytes(pdf_page)
+            rows = str(pdf_page.extractText()).split('\n')
+            features[page] = {'rectangles': len(_RECTANGLE_OPERATOR.findall(content)),
+                              'lines': len(_LINE_OPERATOR.findall(content)),
+                              'numeric_rows': sum(1 for row in rows if len(_NUMBER_TOKEN.findall(row)) >= 2)}
+    return features[page]
+
+
+def predict_table_mode(features):
+
+    '''Returns 'lattice' for a page with ruling lines, 'stream' for a page whose text has table rows without ruling
+    lines and None for a page predicted to have no table.'''
+
+    if features is None:
+        return None
+    if features['rectangles'] + features['lines'] >= RULING_OPERATORS:
+        return 'lattice'
+    if features['numeric_rows'] >= NUMERIC_ROWS:
+        return 'stream'
+    return None
+
+
+def predict_pages_mode(file, pages):
+
+    '''Returns the predicted tabula mode of a pages option: 'lattice' when any page is predicted lattice, else
+    'stream' when any page is predicted stream, else None (no table expected).'''
+
+    modes = [predict_table_mode(page_table_features(file, page)) for page in page_numbers(pages)]
+    if 'lattice' in modes:
+        return 'lattice'
+    if 'stream' in modes:
+        return 'stream'
+    return None
+
+
+def set_table_prediction(enabled):
+
+    '''Turns the page pre-classification on or off. When on, tabula_table_generator() skips pages predicted to
+    have no table and runs tabula once in the predicted mode, and out_tables() skips pages without a table.'''
+
+    global _predict_table_modes
+    _predict_table_modes = enabled
+
+
+def table_prediction_report(test_pdfs, max_pages=None):
+
+    '''This function measures how often the page pre-classification is right. Every page is read by tabula in both
+    modes (without any cache) and the actual mode is 'lattice' when lattice finds a table, else 'stream' when
+    stream finds one, else None.
+
+    Parameters:
+
+    test_pdfs(list): Paths of the pdf files
+
+    max_pages(number): Only the first max_pages pages of each pdf are checked when given
+
+    returns:
+
+    report(DataFrame): One row per page with the features, predicted and actual mode
+
+    summary(dict): Accuracy overall and per predicted mode, and the share of tabula calls the prediction saves
+
+    '''
+
+    rows = []
+    options = dict(TABULA_OPTIONS)
+    for test_pdf in test_pdfs:
+        pages = PyPDF2.PdfFileReader(test_pdf).getNumPages()
+        if max_pages is not None:
+            pages = min(pages, max_pages)
+        for page in range(1, pages + 1):
+            features = page_table_features(test_pdf, page)
+            lattice_tables = _backend_read_pdf(test_pdf, pages=str(page), lattice=True, **options)
+            stream_tables = [] if lattice_tables != [] else _backend_read_pdf(test_pdf, pages=str(page), lattice=False, **options)
+            actual = 'lattice' if lattice_tables != [] else 'stream' if stream_tables != [] else None
+            row = {'file': test_pdf, 'page': page, 'predicted': predict_table_mode(features), 'actual': actual}
+            row.update(features)
+            rows.append(row)
+
+    report = pd.DataFrame(rows, columns=['file', 'page', 'rectangles', 'lines', 'numeric_rows', 'predicted', 'actual'])
+    correct = report['predicted'].fillna('none') == report['actual'].fillna('none')
+    report['correct'] = correct
+    # without prediction a page costs 1 call when lattice finds a table and 2 otherwise, with it 1 or 0
+    calls_before = (report['actual'].fillna('none') != 'lattice').sum() + len(report)
+    calls_after = report['predicted'].notna().sum()
+    summary = {'pages': len(report),
+               'accuracy': float(correct.mean()) if len(report) else None,
+               'accuracy_by_prediction': {str(mode): float(group.mean()) for mode, group in correct.groupby(report['predicted'].fillna('none'))},
+               'missed_tables': int((report['predicted'].isna() & report['actual'].notna()).sum()),
+               'tabula_calls_saved': float(1 - calls_after / calls_before) if calls_before else None}
+    return report, summary
+
+
+TABULA_OPTIONS = {'output_format': "dataframe", 'multiple_tables': True, 'encoding': 'latin-1', 'position': "absolute"}
+
+
+def generator_pages(start_page, pdf_name_data, pdf_name_count, page_break_count):
+
+    '''Returns the tabula pages option tabula_table_generator() reads for the header found on start_page.'''
+
+    if (pdf_name_data != []) and (pdf_name_count != 0):
+        new_pages = str(str(start_page + 1) + "-" + str(start_page + pdf_name_count + 1))
+
+    elif page_break_count!= 0:
+        new_pages = str(str(start_page + 1) + "-" + str(start_page + page_break_count + 1))
+
+    else:     
+        new_pages = str(start_page + 1)
+
+    return new_pages
+
+
+def tabula_table_generator(file, start_page, pdf_name_data, pdf_name_count, page_break_count):
+
+    '''This function generates the list of tables from the pages where required heading (like 'Precision') data presented in pdf
+
+    Parameters:
+
+    file(str): filename or the DOWID of the document
+
+    start_page(number): Page number of pdf from where heading (like 'Precision') data started
+
+    pdf_name_data(list): This is the set of pdf id along with some texts presented in the extracted heading text
+
+    pdf_name_count(number): Count that represents how many times the pdf name occurred in the extracted heading text
+
+    page_break_count(number): Count of pages having required heading (like 'Precision') data
+
+    returns:
+
+    tabledata(list): List of tables presented in the pages of pdf in which required heading (like 'Precision') data presented
+
+    '''
+
+    tabledata = []
+
+    new_pages = generator_pages(start_page, pdf_name_data, pdf_name_count, page_break_count)
+
+    if _predict_table_modes:
+        mode = predict_pages_mode(file, new_pages)
+        if mode is not None:
+            tabledata = tabula_read_pdf(file, pages = new_pages, lattice = mode == 'lattice', **TABULA_OPTIONS)
+        return tabledata
+
+    tabledata = tabula_read_pdf(file, output_format = "dataframe", pages = new_pages, lattice=True,
+                         multiple_tables = True, encoding = 'latin-1', position = "absolute")
+
+    if tabledata == []:
+        tabledata = tabula_read_pdf(file, output_format = "dataframe", pages = new_pages, lattice = False,
+                             multiple_tables = True, encoding = 'latin-1', position = "absolute")
+
+    return tabledata
+
+
+_TEXT_NOISE = re.compile(r"\n\s+|TM")
+_NON_ALPHANUMERIC = re.compile(r"[^0-9a-zA-Z]+")
+_ROW_NOISE = re.compile(r"\\r|nan|NaN|[^0-9a-zA-Z]+|TM")
+
+
+def _row_strings(table):
+
+    '''Returns the normalised strings string_comp_match() compares for the rows of table (from the third row on),
+    built column by column. The normalisation of str(row) is applied to each cell's repr, which gives the same
+    string for text and NaN cells (the cells tabula produces). None for tables with other cells.'''
+
+    rows = table.iloc[2:]
+    strings = pd.Series([''] * len(rows), index=rows.index, dtype=object)
+    for position in range(0, rows.shape[1]):
+        column = rows.iloc[:, position].astype(object)
+        missing = column.isna()
+        if not (column[missing].map(type) == float).all() or not (column[~missing].map(type) == str).all():
+            return None
+        cells = pd.Series([''] * len(column), index=column.index, dtype=object)
+        if (~missing).any():
+            cells[~missing] = column[~missing].map(repr).str.replace(_ROW_NOISE, "", regex=True)
+        strings = strings + cells
+    return strings.str.replace("x80x9c", "", regex=False).str.replace("x80x93", "", regex=False)
+
+
+def _strings_in_text(strings, text):
+
+    '''Returns the set of strings that occur in text, scanning text once with an Aho-Corasick automaton
+    (pyahocorasick) when it is installed.'''
+
+    strings = set(strings)
+    found = set(string for string in strings if string == '')
+    strings.discard('')
+    if strings and ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for string in strings:
+            automaton.add_word(string, string)
+        automaton.make_automaton()
+        found.update(string for end, string in automaton.iter(text))
+    else:
+        found.update(string for string in strings if string in text)
+    return found
+
+
+def string_comp_match(text_between, tabledata):
+
+    '''This is a function that returns the tables which are having the information provided in the required text data.
+
+    Parameters:
+    text_between(str): The text in between the start and end patterns in the text of the pdf
+
+    tabledata(list): The list of table data sets which are in the pdf
+
+    Returns:
+
+    tabledata(list): List of table data sets in which the table values matched with text between start and end patterns. 
+
+    '''
+
+    final_table = []
+    textdata1 = _TEXT_NOISE.sub("", str(text_between))
+    textdata1 = _NON_ALPHANUMERIC.sub("", str(textdata1))       
+
+    tables = [tabledata[i].dropna(how='all') for i in range(0, len(tabledata))]
+    row_strings = [_row_strings(tabledata1) for tabledata1 in tables]
+    found = _strings_in_text([string for strings in row_strings if strings is not None for string in strings], textdata1)
+
+    for tabledata1, strings in zip(tables, row_strings):
+        if strings is not None:
+            if any(string in found for string in strings):
+                final_table = final_table + [tabledata1]
+            continue
+
+        temp_table = tabledata1.values
+        for row in range(2, len(temp_table)):
+            string = str(temp_table[row])
+            string = _ROW_NOISE.sub("", string)
+            string = string.replace("x80x9c","")
+            string = string.replace("x80x93","")
+
+            if string in textdata1:
+                final_table = final_table + [tabledata1]
+                break
+    return final_table
+
+
+
+def _section_page_counts(preprocessed_text, text_between, pdf_name):
+    ##finding pagebreaks in the pdf
+    pages = page_count(preprocessed_text)
+    pattern = "Page \d{1,2} of " + str(pages)
+    page_break = re.findall(pattern, str(text_between))
+    page_break_count = len(page_break)
+    pattern = pdf_name + "(.+?)"
+    pdf_name_data = re.findall(pattern, str(text_between))
+    pdf_name_count = str(text_between).count(str(pdf_name))
+
+    return pdf_name_data, pdf_name_count, page_break_count
+
+
+@profiled('table_data')
+def table_data(file, preprocessed_text, text_between, pdf_name, start, header, index=None):
+
+    '''
+
+    file(str): filename or the DOWID of the document
+
+    preprocessed_text(list): Whole pdf text data which is already pre processed 
+
+    text_between(str): The text in between the start and end patterns in the text of the pdf
+
+    pdf_name(str): filename or the DOWID of the document (without file extension)
+
+    start(str): Start pattern of the header, the tables under which we are interested in
+
+    header(str): String pattern of the header, for example 'Precision'
+
+    index(dict): section_index() of preprocessed_text, used to find the pages having the start pattern
+
+    '''
+    tabledata=[]
+    if str(start) != 'nan':
+        # the start pattern can repeat on any later page (for example in the appendix)
+        complete_pages(preprocessed_text, index)
+        pdf_name_data, pdf_name_count, page_break_count = _section_page_counts(preprocessed_text, text_between, pdf_name)
+
+        for i in index_pages(index, preprocessed_text, start): 
+            tabledata1 = tabula_table_generator(file, i, pdf_name_data, pdf_name_count, page_break_count) 
+            tabledata1 = string_comp_match(text_between, tabledata1)
+            if tabledata1 != []:
+                tabledata = tabledata+[tabledata1]       
+        return tabledata
+
+
+
+_TABLE_WORD_NOISE = re.compile('\'|\"|\,|\.|\\\\|\[|\]')
+
+
+@functools.lru_cache(maxsize=None)
+def table_numerals():
+
+    '''This function returns the lookup of the table numbers 1-49 by their roman and integer spelling.'''
+
+    roman_numerals, integers = {}, {}
+    for number in range(1,50):
+        roman_numerals[roman.toRoman(number)] = number
+        integers[str(number)] = number
+    return roman_numerals, integers
+
+
+def table_reference_pairs(text_between):
+
+    '''This function scans the text once and returns the (start, end) table name pairs referenced in it.
+
+    Parameters:
+
+    text_between(str): The text in between the start and end patterns in the text of the pdf
+
+    returns:
+
+    pairs(list): (table name, next table name) tuples in the order the tables are first referenced,
+    the roman spelling of a table followed by its integer spelling
+
+    '''
+
+    roman_numerals, integers = table_numerals()
+    words = str(text_between).split(" ")
+    numbers = {}
+    previous = words[-1]
+
+    for position in range(0,len(words)):
+        word = _TABLE_WORD_NOISE.sub("",words[position])
+        if position == 0 and len(words) == 1:
+            previous = word
+        number = roman_numerals.get(word)
+        if number is None and "ble" in previous:
+            number = integers.get(word)
+        if number is not None:
+            numbers.setdefault(number, None)
+        previous = word
+
+    pairs = []
+    for number in numbers:
+        pairs.append(("Table "+roman.toRoman(number), "Table "+roman.toRoman(number+1)))
+        pairs.append(("Table "+str(number), "Table "+str(number+1)))
+    return pairs
+
+
+def out_tables_list(text_between):
+
+    '''This function takes the text between start and end patterns of heading as input and returns 
+    the list of table names referenced in the text but presented some where else in pdf.
+
+    Parameters:
+
+    text_between(str): The text in between the start and end patterns in the text of the pdf
+
+    returns:
+
+    table_start_list(list): List of tables referenced in the heading (like 'Precision') text
+
+    table_end_list(list): List of table names which are expected as the end patterns for table_start_list
+
+    '''
+
+    pairs = table_reference_pairs(text_between)
+    if pairs == []:
+        return ['', ' '], ['', ' ']
+
+    table_start_list = [start for start, end in pairs]
+    table_end_list = [end for start, end in pairs]
+
+    return table_start_list,table_end_list
+
+
+
+_REMOVE_TABLE_TEXT = re.compile(r"\.\.|following tab|table(|s) be|Metablen|in the table(|s)(|\.)|(T|t)able(|s) (be|of)|[a-z][a-z]table|table according")
+_TABLE_REFERENCE = re.compile(r"Table(|s)\s*\-*\s*\w*")
+
+
+@profiled('out_tables')
+def out_tables(file,text_between,preprocessed_text,header,corpus,pages,table_start_list,table_end_list,index=None):
+
+    '''This takes table names list as input and returns the tables related to the table names list.
+
+    Parameters:
+
+    file(str): filename or the DOWID of the document
+
+    text_between(str): The text in between the start and end patterns in the text of the pdf
+
+    preprocessed_text(list)e pdf text data which is already pre processed 
+
+    header(str):String pattern of the header, for example 'Precision'
+
+    corpus(object): PyPDF2.corpus object file can be used to read the pdf later
+
+    pages(number): total number of pages in the document
+
+    table_start_list(list): List of tables referenced in the heading (like 'Precision') text
+
+    table_end_list(list): List of table names which are expected as the end patterns for table_start_list
+
+    index(dict): section_index() of preprocessed_text, used to find the pages of the anchors and table captions
+
+    returns:
+
+    tabledata(list): List of tables presented in the pages of pdf in which required heading (like 'Table I') data presented.
+
+    '''
+
+    tabledata=[]
+    remove_text=_REMOVE_TABLE_TEXT.pattern
+    textdata=_REMOVE_TABLE_TEXT.sub("",str(text_between))
+
+    preprocessed_text1=(re.sub(r'see Appendix|'+remove_text,"",temp) for temp in preprocessed_text)
+
+    if " Table " or " table " or " tables " or " Tables " or " TABLE " or " TABLES " in str(textdata):
+        table_start_list,table_end_list=out_tables_list(text_between)
+
+        if table_end_list!=['', ' ']:
+
+            table_start=_TABLE_REFERENCE.search(str(text_between))
+
+            if table_start!=None:
+                # the referenced tables are looked for after the anchors, up to the end of the document
+                complete_pages(preprocessed_text, index)
+                j=0
+                find=''
+                find_list=SECTION_ANCHORS
+                text_at_end=''   
+                for word in range(0,len(find_list)):
+
+                    anchor_pages=index_pages(index, preprocessed_text, find_list[word])
+
+                    if anchor_pages!=[]:
+                        tablepage=anchor_pages[0]
+                        text_at_end=preprocessed_text[tablepage:len(preprocessed_text)]
+                        find=find_list[word]
+
+                if find!='' and table_start!=' ' or '':
+
+                    for table in range(0,len(table_start_list)):                        
+                        table_start=table_start_list[table]
+                        table_end=table_end_list[table]
+
+                        if str(table_end) in str(text_at_end):
+                            pattern=str(table_start)+"(.+?)"+str(table_end)
+
+                        else:
+                            table_end=str(text_at_end)[len(str(text_at_end))-8:len(str(text_at_end))]
+                            pattern=str(table_start)+"(.+?)"+table_end
+
+                        text_between=str(compiled_pattern(pattern).findall(str(text_at_end)))
+
+                        for k in index_pages(index, preprocessed_text, table_start):
+
+                            if k>=tablepage:
+                                new_pages=str(k+1)+"-"+str(k+2)
+                                if k+1==pages:
+                                    new_pages=str(pages) 
+                                if _predict_table_modes and predict_pages_mode(file, new_pages) is None:
+                                    tabledata=[]
+                                    continue
+                                tabledata=tabula_read_pdf(file,output_format="dataframe",pages=new_pages,lattice=True,
+                                                   multiple_tables=True,encoding = 'latin-1',position="absolute")
+                        tabledata = string_comp_match(text_between=str(text_at_end),tabledata=tabledata)
+
+                        if tabledata !=[]:
+                            break
+    return tabledata
+
+
+def section_table_pages(preprocessed_text, text_between, pdf_name, start, index=None):
+
+    '''This function lists, before any table is read, the pages table_data() and out_tables() ask tabula for.
+
+    Parameters:
+
+    preprocessed_text(list): Whole pdf text data which is already pre processed 
+
+    text_between(str): The text in between the start and end patterns in the text of the pdf
+
+    pdf_name(str): filename or the DOWID of the document (without file extension)
+
+    start(str): Start pattern of the header
+
+    index(dict): section_index() of preprocessed_text
+
+    returns:
+
+    section_ranges(list): Pages (1-based) of each tabula_table_generator() call of table_data()
+
+    reference_ranges(list): Pages (1-based) of each out_tables() tabula call for the tables referenced in the header text
+
+    '''
+
+    section_ranges, reference_ranges = [], []
+    if str(start) != 'nan':
+        # the start pattern can repeat on any later page (for example in the appendix)
+        complete_pages(preprocessed_text, index)
+        pdf_name_data, pdf_name_count, page_break_count = _section_page_counts(preprocessed_text, text_between, pdf_name)
+        for i in index_pages(index, preprocessed_text, start):
+            section_ranges.append(page_numbers(generator_pages(i, pdf_name_data, pdf_name_count, page_break_count)))
+
+    # the same checks as out_tables(), which reads no table without them
+    table_start_list, table_end_list = out_tables_list(text_between)
+    if table_end_list == ['', ' '] or _TABLE_REFERENCE.search(str(text_between)) is None:
+        return section_ranges, []
+    complete_pages(preprocessed_text, index)
+    pages = page_count(preprocessed_text)
+    tablepage = None
+    for anchor in SECTION_ANCHORS:
+        anchor_pages = index_pages(index, preprocessed_text, anchor)
+        if anchor_pages != []:
+            tablepage = anchor_pages[0]
+    if tablepage is None:
+        return section_ranges, []
+    for table_start in table_start_list:
+        for k in index_pages(index, preprocessed_text, table_start):
+            if k >= tablepage:
+                reference_ranges.append([pages] if k + 1 == pages else [k + 1, k + 2])
+
+    return section_ranges, reference_ranges
+
+
+@profiled('table_prefetch')
+def prefetch_section_tables(file, preprocessed_text, text_between, pdf_name, start, index=None, references=True):
+
+    '''This function reads all the tables a section needs with one lattice tabula call over the union of the pages,
+    plus one stream call for the header pages of the tabula_table_generator() ranges where lattice found nothing,
+    and keeps them in the table cache (see set_table_cache) from which table_data() and out_tables() then take
+    their slices.
+
+    Parameters:
+
+    file(str): filename or the DOWID of the document
+
+    preprocessed_text, text_between, pdf_name, start, index: As given to table_data()
+
+    references(bool): Also read the pages of the tables referenced in the header text, False when out_tables()
+    is not run
+
+    '''
+
+    if _table_cache is None:
+        return
+    section_ranges, reference_ranges = section_table_pages(preprocessed_text, text_between, pdf_name, start, index)
+    if not references:
+        reference_ranges = []
+    if section_ranges == [] and reference_ranges == []:
+        return
+    if _predict_table_modes:
+        # a header range is read in its predicted mode, a reference range with lattice unless no table is predicted
+        section_modes = [(pages, predict_pages_mode(file, ",".join(str(page) for page in pages))) for pages in section_ranges]
+        lattice_pages = [page for pages, mode in section_modes if mode == 'lattice' for page in pages]
+        lattice_pages += [page for pages in reference_ranges
+                          if predict_pages_mode(file, ",".join(str(page) for page in pages)) is not None for page in pages]
+        stream_pages = [page for pages, mode in section_modes if mode == 'stream' for page in pages]
+        if lattice_pages != []:
+            _table_cache.prefetch(file, lattice_pages, lattice=True, **TABULA_OPTIONS)
+        if stream_pages != []:
+            _table_cache.prefetch(file, stream_pages, lattice=False, **TABULA_OPTIONS)
+        return
+    lattice_pages = [page for pages in section_ranges + reference_ranges for page in pages]
+    empty_pages = _table_cache.prefetch(file, lattice_pages, lattice=True, **TABULA_OPTIONS)
+    if empty_pages is not None:
+        # tabula_table_generator() reads a range in stream mode only when lattice finds no table on any of its pages
+        stream_pages = [page for pages in section_ranges if set(pages) <= set(empty_pages) for page in pages]
+        if stream_pages != []:
+            _table_cache.prefetch(file, stream_pages, lattice=False, **TABULA_OPTIONS)
+
+
+def extraction_context(text_data):
+    '''This function creates the extraction context of one precision section. The context caches the "standard"
+    sentence match, the spaCy docs and the value/unit results, so the extractors run each model only once per section.
+
+    Parameters:
+
+    text_data(str): The extracted data under precision
+
+    returns:
+
+    context(dict): Cache shared by value_unit_spacy, precision_type_spacy, distribution_spacy and condition_spacy
+
+    '''
+
+    return {'text_data': text_data}
+
+
+def _context_value(context, key, compute):
+
+    '''Returns context[key], computing it with compute(context) the first time it is asked for.'''
+
+    if key not in context:
+        context[key] = compute(context)
+    return context[key]
+
+
+def _standard_sentences(context):
+    define_words = 'standard'
+    return re.findall(r"([^.]*?%s.*?\.)(?!\d)" % define_words,str(context['text_data']))
+
+
+def _value_unit_input(context):
+    return str(_context_value(context, 'match_sentence', _standard_sentences))
+
+
+def _distribution_input(context):
+    match_distribution = re.findall(r'((?:\w+\s+){0,5}\bnormal\b\s*(?:\S+\s+){1})',str(context['text_data']))
+
+    for dist in range(0,len(match_distribution)):
+        if match_distribution[dist] == 'did not originate from a normal distribution.  ':
+            match_distribution[dist]='assumes a non- normal distribution'
+
+    return str(match_distribution)
+
+
+def _condition_input(context):
+    return context['text_data']
+
+
+# context key of each spaCy doc -> (model, function building the text given to the model)
+_CONTEXT_DOCS = {'doc_value_unit': (TEXT_MODEL, _value_unit_input),
+                 'doc_distribution': (DISTRIBUTION_MODEL, _distribution_input),
+                 'doc_condition': (TEXT_MODEL, _condition_input)}
+
+
+def _context_doc(context, key):
+    model, make_input = _CONTEXT_DOCS[key]
+    return _context_value(context, key, lambda context: _ner(model, make_input(context)))
+
+
+def _ner(model, text):
+    nlp = get_spacy_model(model)
+    with profile_stage('ner'):
+        return nlp(text)
+
+
+def _value_unit(context):
+
+    value_unit=[]
+    value_list=[]
+    unit_list=[]
+
+    text_data = context['text_data']
+    doc_value_unit=_context_doc(context, 'doc_value_unit')
+
+    for ent in doc_value_unit.ents:
+        if ent.label_=='value_unit':
+            value_unit.append(ent.text)
+            value_unit=''.join(value_unit)
+            value_temp=re.findall(r'(\d+?\.*\d*)',value_unit)
+            unit_temp=re.sub(r'\d+?\.*\d*',"",value_unit)
+
+            if '/' in str(unit_temp) and len(value_temp)>1:
+                uni=unit_temp.split('/')
+                val_1=value_temp
+                value_temp=value_temp[0]
+                unit_temp=str(uni[0]+'/'+str(val_1[1]+unit_temp[1]))
+            value_list.append(value_temp)    
+            unit_list.append(unit_temp)    
+            value_unit=[]
+
+    if value_list==[]:
+        value_list.append("No Value")
+
+    if unit_list==[]:
+        unit_list.append("No Unit")
+
+    value=pd.Series(value_list)
+    unit=pd.Series(unit_list)
+
+    temp_unit=re.search(r'wt\.(.+?)(\.|\%)',str(text_data))
+    if temp_unit != None and "wt/wt" not in str(text_data):
+        temp_unit=temp_unit.group(0)
+        for uni_1 in range(0,len(unit)):
+            unit[uni_1]=temp_unit
+
+    len_value=len(value)        
+
+    return value,unit,len_value
+
+
+def value_unit_spacy(text_data, context=None):
+    '''To extract the value and unit of the precision in text_data
+    Parameters:
+    text_data(str): The extracted data under precision
+    context(dict): Extraction context of text_data (see extraction_context), created when not given
+
+    Returns:
+    value(int): The precision value
+    unit(str): The unit type of precision value
+    len_value(int): Number of precision values in the text_data'''
+
+    if context is None:
+        context = extraction_context(text_data)
+
+    value,unit,len_value = _context_value(context, 'value_unit', _value_unit)
+
+    return value.copy(),unit.copy(),len_value
+
+
+
+def precision_type_spacy(text_data, context=None):
+    '''To extract the precision type 
+    Parameters:
+    text_data(str): The extracted data under precision
+    context(dict): Extraction context of text_data (see extraction_context), created when not given
+
+    Returns:
+    precision_type(str): List of precision types for the precision values'''
+
+    if context is None:
+        context = extraction_context(text_data)
+
+    precision_type=[]
+
+    type_list=['relative','absolute','pooled','arelative']
+
+    match_sentence = _context_value(context, 'match_sentence', _standard_sentences)
+    match_precision_type= re.findall(r'((?:\w+\s+){0,2}\bstandard\b\s*(?:\w+\s+){0})',str(match_sentence))
+    for match in match_precision_type:
+        temp=match.split( )
+        if len(temp) !=1 and temp[1] != 'ASTM':
+            if ((temp[0] in type_list) and (temp[1] in type_list)):
+                precision_type.append(temp[0]+temp[1])
+            elif temp[1] in type_list:
+                if temp[1]=='pooled':
+                    temp[1]='pooled absolute'
+                if temp[1]=='arelative':
+                    temp[1]='relative'
+                precision_type.append(temp[1])
+            else:
+                precision_type.append('nan')   
+
+    if precision_type==[]:
+        precision_type.append("No Precision type")
+    precision_type_list=pd.Series(precision_type)   
+    precision_type_list=precision_type_list.replace('nan','absolute')
+
+    length_value=value_unit_spacy(text_data, context)[2]
+
+    precision_type_list=precision_type_list.tolist()
+    if length_value==2 and len(precision_type_list)==1:
+        precision_type_list.extend([0] * (length_value-1))
+        precision_type_list[1]=precision_type_list[0]
+
+    precision_type_list=pd.Series(precision_type_list)
+
+    return precision_type_list
+
+
+def distribution_spacy(text_data, context=None):
+    '''To extract the distribution of the component(s) or matrix 
+    Parameters:
+    text_data(str): The extracted data under precision
+    context(dict): Extraction context of text_data (see extraction_context), created when not given
+
+    Returns:
+    distribution: List of distribution(s) for the component(s) or matrix'''
+
+
+    if context is None:
+        context = extraction_context(text_data)
+
+    distribution=[]
+
+    length_value=value_unit_spacy(text_data, context)[2]
+
+    doc_distribution=_context_doc(context, 'doc_distribution')
+
+    for ent in doc_distribution.ents:
+        distribution.append(ent.text)
+
+    if len(distribution)==0:
         distribution.append('normal(if null)')
 
     if length_value>1 and len(distribution)==1:
@@ -560,7 +2395,7 @@ def distribution_spacy(text_data):
     distribution=[x for x in distribution['dist'] if str(x) != 'non']
     distribution=pd.Series(distribution)
 
-    value=value_unit_spacy(text_data)[0]
+    value=value_unit_spacy(text_data, context)[0]
     value_list=pd.Series(value)
     frames=[distribution,value_list]
     distribution_df=pd.concat(frames,axis=1)
@@ -589,18 +2424,21 @@ def distribution_spacy(text_data):
     return distribution
 
 
-def condition_spacy(text_data):
+def condition_spacy(text_data, context=None):
     '''To extract the condition of the component(s) 
     Parameters:
     text_data(str): The extracted data under precision
+    context(dict): Extraction context of text_data (see extraction_context), created when not given
 
     Returns:
     condition: List of condition(s) for the component(s)'''
 
+    if context is None:
+        context = extraction_context(text_data)
+
     con = []
     condition = []
-    nlp = spacy.load("./text_final_1")
-    doc_con=nlp(text_data)
+    doc_con=_context_doc(context, 'doc_condition')
     for ent in doc_con.ents:
         if ent.label_=='condition':
             con.append(ent.text)
@@ -611,7 +2449,7 @@ def condition_spacy(text_data):
         del con[1]
         del con[2]
 
-    len_of_value=value_unit_spacy(text_data)[2]
+    len_of_value=value_unit_spacy(text_data, context)[2]
     if len_of_value>len(con):
         con.extend([0] * (len_of_value-1))
         for x in range(0,len(con)-1):
@@ -630,12 +2468,20 @@ def condition_spacy(text_data):
     return condition
 
 
-def component_matrix(scope_text,precision_data,precision_text,test_pdf):
-    nlp=spacy.load("./scope_model_1")
+def component_matrix_text(scope_text,precision_text,test_pdf):
+
+    '''Returns the text given to the scope model by component_matrix().'''
+
+    test_pdf = test_pdf.replace("./data/","")
+    return "[  "+test_pdf+"  HEADING and SCOPE:  "+scope_text+"]  PRECISION:  ["+ precision_text+"  ]" 
+
+
+@profiled('component_matrix')
+def component_matrix(scope_text,precision_data,precision_text,test_pdf,doc=None):
+    if doc is None:
+        doc = _ner(SCOPE_MODEL, component_matrix_text(scope_text,precision_text,test_pdf))
     test_pdf = test_pdf.replace("./data/","")
     data = pd.DataFrame()
-    text ="[  "+test_pdf+"  HEADING and SCOPE:  "+scope_text+"]  PRECISION:  ["+ precision_text+"  ]" 
-    doc = nlp(text)
     component_precision,component_scope,matrix=[],[],[]
     for ent in doc.ents:
 #         print(ent.text,ent.label_)
@@ -685,10 +2531,12 @@ def component_matrix(scope_text,precision_data,precision_text,test_pdf):
     return data
 
 
-def precision_dataframe_spacy(text_data,test_pdf):
+@profiled('precision_extraction')
+def precision_dataframe_spacy(text_data,test_pdf,context=None):
     '''To get a dataframe returning precision value, unit, precision_type, distribution
     Parameters:
     text_data(str): The extracted data under precision
+    context(dict): Extraction context of text_data (see extraction_context), created when not given
 
     Returns:
     data: A dataftrame with columns of value,unit,precision_type,distribution
@@ -700,38 +2548,122 @@ def precision_dataframe_spacy(text_data,test_pdf):
     col=col=['Dow_id','precision','unit','distribution','precision_type']
     data=pd.DataFrame(columns=col)
 
-    value=value_unit_spacy(text_data)[0]
-    unit=value_unit_spacy(text_data)[1]
-    prec_type=precision_type_spacy(text_data)
-    dis=distribution_spacy(text_data)
-    len_of_val=value_unit_spacy(text_data)[2]
-    id1=re.sub(r'\/home/cdsw/data/MethodsForSoothsayer_181105/','',test_pdf)
-    condition = condition_spacy(text_data)
+    if context is None:
+        context = extraction_context(text_data)
+
+    value,unit,len_of_val=value_unit_spacy(text_data, context)
+    prec_type=precision_type_spacy(text_data, context)
+    dis=distribution_spacy(text_data, context)
+    id1=re.sub(r'\/home/cdsw/data/MethodsForSoothsayer_181105/','',test_pdf)
+    condition = condition_spacy(text_data, context)
+
+    data_frame={'precision': pd.Series(value),'unit': pd.Series(unit), 'precision_type': pd.Series(prec_type),'distribution':pd.Series(dis),'condition':condition}
+    data_frame =pd.DataFrame(data_frame)
+    dataframe_final=data_frame.dropna()
+    frames=[data,dataframe_final]
+    data=pd.concat(frames,axis=0)
+    data.index=range(0,len(data))
+    for i in range(0,len(data)):
+        dowid.append(id1)
+    data['Dow_id']=dowid
+
+    return data
+
+# fast paths the sections of the current document took, reported per document by run_corpus(fast_paths=...)
+_fast_paths = set()
+
+
+def section_fast_path(preprocessed_text, start, header):
+
+    '''This function runs the cheap checks that decide the outcome of a section before any section stage runs.
+
+    Parameters:
+
+    preprocessed_text(list): Whole pdf text data which is already pre processed
+
+    start(str): Start pattern of the header, nan when the header was not found
+
+    header(str): The heading of interest, for example 'Precision'
+
+    returns:
+
+    fast_path(str): 'image_format' when the pdf has no text, 'no_header.<header>' when the header is missing and None
+    when the section has to be extracted
+
+    '''
+
+    if preprocessed_text.count('  ')==len(preprocessed_text):
+        fast_path = 'image_format'
+    elif str(start)=='nan':
+        fast_path = 'no_header.' + header
+    else:
+        return None
+    _fast_paths.add(fast_path)
+    profile_count('fast_path.' + fast_path)
+    return fast_path
+
+
+def header_section(test_pdf, header, processed=None):
+
+    '''This function runs the text and table stages of the pipeline for one header of a pdf.
+
+    Parameters:
+
+    test_pdf(str): Path to read a pdf file from a directory.
+
+    header(str): The heading of interest, for example 'Precision'
+
+    processed(tuple): pdf_processor() output of the header (for example from pdf_multi_processor()), computed when not given
+
+    returns:
+
+    section(dict): pdf_processor() outputs along with the section_index() of the text, text_between, tabledata1 (tables under the header),
+    out_tabledata (tables referenced in the header text) and fast_path (see section_fast_path)
+
+    '''
+
+    if processed is None:
+        processed = pdf_processor(file_path=test_pdf, header=header)
+    preprocessed_text, start, end, pdf_name,corpus,header,pages=processed
+    fast_path = section_fast_path(preprocessed_text, start, header)
+    if fast_path is not None:
+        # what the stages return for a section without a header, without running them
+        return {'preprocessed_text': preprocessed_text, 'start': start, 'end': end, 'pdf_name': pdf_name,
+                'corpus': corpus, 'header': header, 'pages': pages, 'index': None, 'text_between': None,
+                'tabledata1': None, 'out_tabledata': [], 'fast_path': fast_path}
+    index=section_index(preprocessed_text, [header])
+    text_between=text_data(preprocessed_text, start, end, index)
+    prefetch_section_tables(test_pdf, preprocessed_text, text_between, pdf_name, start, index)
+    tabledata1=table_data(test_pdf, preprocessed_text, text_between, pdf_name, start, header, index)
+    table_start_list,table_end_list=out_tables_list(text_between)
+    out_tabledata=out_tables(test_pdf,text_between,preprocessed_text,header,corpus,pages,table_start_list,table_end_list,index)
+
+    return {'preprocessed_text': preprocessed_text, 'start': start, 'end': end, 'pdf_name': pdf_name,
+            'corpus': corpus, 'header': header, 'pages': pages, 'index': index, 'text_between': text_between,
+            'tabledata1': tabledata1, 'out_tabledata': out_tabledata, 'fast_path': None}
+
+
+def section_needs_ner(section):
+
+    '''Returns True when the metadata of the section has to come from its text (no tables found) and not from tables.'''
 
-    data_frame={'precision': pd.Series(value),'unit': pd.Series(unit), 'precision_type': pd.Series(prec_type),'distribution':pd.Series(dis),'condition':condition}
-    data_frame =pd.DataFrame(data_frame)
-    dataframe_final=data_frame.dropna()
-    frames=[data,dataframe_final]
-    data=pd.concat(frames,axis=0)
-    data.index=range(0,len(data))
-    for i in range(0,len(data)):
-        dowid.append(id1)
-    data['Dow_id']=dowid
+    return (section['fast_path'] is None and section['tabledata1']==[] and section['out_tabledata']==[]
+            and section['text_between'] != '')
 
-    return data
 
-def final_scope(test_pdf,precision_data,precision_text):
+@profiled('final_scope')
+def final_scope(test_pdf,precision_data,precision_text,section=None,doc=None):
 
     tabledata=[]
     table_data1=[]
     scope_data = "This is tabledata"
     data = pd.DataFrame(columns = ["filename",'matrix','component'])
-    preprocessed_text, start, end, pdf_name,corpus,header,pages=pdf_processor(file_path=test_pdf, header="Scope")
-    text_between=text_data(preprocessed_text, start, end)
+    if section is None:
+        section = header_section(test_pdf, "Scope")
+    preprocessed_text, start, header = section['preprocessed_text'], section['start'], section['header']
+    text_between = section['text_between']
     scope_text = text_between
-    tabledata1=table_data(test_pdf, preprocessed_text, text_between, pdf_name, start, header)
-    table_start_list,table_end_list=out_tables_list(text_between)
-    out_tabledata=out_tables(test_pdf,text_between,preprocessed_text,header,corpus,pages,table_start_list,table_end_list)
+    tabledata1, out_tabledata = section['tabledata1'], section['out_tabledata']
 
     if preprocessed_text.count('  ')==len(preprocessed_text):
         scope_data="Input file is in Image format"
@@ -754,13 +2686,35 @@ def final_scope(test_pdf,precision_data,precision_text):
         elif tabledata1==[] and text_between != '':
             scope_data=text_between
             scope_text=text_between
-    data = component_matrix(scope_text,precision_data,precision_text,test_pdf)
+    data = component_matrix(scope_text,precision_data,precision_text,test_pdf,doc)
 
     return scope_data,data
 
 
 
-def final_precision(test_pdf):
+def final_precision(test_pdf,section=None,scope_section=None,context=None,scope_doc=None):
+
+    '''This function returns the precision metadata of a pdf.
+
+    Parameters:
+
+    test_pdf(str): Path to read a pdf file from a directory.
+
+    section, scope_section(dict): Precision and Scope header_section() outputs, computed when not given
+
+    context(dict): Extraction context of the precision text, used when the metadata comes from the text
+
+    scope_doc(object): spaCy doc of component_matrix_text() for the pdf, computed when not given
+
+    returns:
+
+    precision_data: Precision tables, precision dataframe or a message when nothing could be extracted
+
+    data(DataFrame): Matrix and component of the precision values
+
+    final_data(DataFrame): Precision metadata extracted from the text
+
+    '''
 
     tabledata=[]
     table_data1=[]
@@ -768,11 +2722,14 @@ def final_precision(test_pdf):
     precision_data = "This is table data"
     data = "This is tabledata"
     final_data = "This is tabledata"
-    preprocessed_text, start, end, pdf_name,corpus,header,pages=pdf_processor(file_path=test_pdf, header="Precision")
-    text_between=text_data(preprocessed_text, start, end)
-    tabledata1=table_data(test_pdf, preprocessed_text, text_between, pdf_name, start, header)
-    table_start_list,table_end_list=out_tables_list(text_between)
-    out_tabledata=out_tables(test_pdf,text_between,preprocessed_text,header,corpus,pages,table_start_list,table_end_list)
+    if section is None:
+        processed = pdf_multi_processor(test_pdf, ["Precision", "Scope"])
+        section = header_section(test_pdf, "Precision", processed["Precision"])
+        if scope_section is None and section_needs_ner(section):
+            scope_section = header_section(test_pdf, "Scope", processed["Scope"])
+    preprocessed_text, start, header = section['preprocessed_text'], section['start'], section['header']
+    text_between = section['text_between']
+    tabledata1, out_tabledata = section['tabledata1'], section['out_tabledata']
 
     if preprocessed_text.count('  ')==len(preprocessed_text):
         precision_data="Input file is in Image format"
@@ -794,159 +2751,1227 @@ def final_precision(test_pdf):
             precision_data=tabledata1
         elif tabledata1==[] and text_between != '':
             precision_text= text_between
-            precision_data=precision_dataframe_spacy(text_between,test_pdf)
+            precision_data=precision_dataframe_spacy(text_between,test_pdf,context)
             precision_data.index=range(0,len(precision_data)) 
-            scope_data,data = final_scope(test_pdf,precision_data,precision_text)
-            frames = [precision_data['Dow_id'],data['matrix'],data['component'],precision_data.drop('Dow_id',axis=1)]
-            final_data = pd.concat(frames,axis=1)
-            final_data = final_data.fillna(" ")  
+            scope_data,data = final_scope(test_pdf,precision_data,precision_text,scope_section,scope_doc)
+            with profile_stage('dataframe'):
+                frames = [precision_data['Dow_id'],data['matrix'],data['component'],precision_data.drop('Dow_id',axis=1)]
+                final_data = pd.concat(frames,axis=1)
+                final_data = final_data.fillna(" ")  
 
     return precision_data,data,final_data
 
 
+def pipe_extraction_contexts(contexts, batch_size=64, n_process=1):
+
+    '''This function fills the spaCy docs of many extraction contexts by sending their texts through each model with nlp.pipe.
+
+    Parameters:
+
+    contexts(list): Extraction contexts (see extraction_context)
+
+    batch_size(number): Number of texts buffered per nlp.pipe batch
+
+    n_process(number): Number of processes nlp.pipe uses
+
+    returns:
+
+    contexts(list): The same contexts, with every doc already computed
+
+    '''
+
+    for key, (model, make_input) in _CONTEXT_DOCS.items():
+        pending = [context for context in contexts if key not in context]
+        if pending:
+            docs = get_spacy_model(model).pipe([make_input(context) for context in pending],
+                                               batch_size=batch_size, n_process=n_process)
+            for context, doc in zip(pending, docs):
+                context[key] = doc
+    return contexts
+
+
+def final_precision_batch(test_pdfs, batch_size=64, n_process=1, return_exceptions=False, fast_paths=None):
+
+    '''This function is the corpus-level batch mode of final_precision(). The section texts of all pdfs are collected
+    first, then sent through each spaCy model with nlp.pipe, and the entities are mapped back to each pdf.
+
+    Parameters:
+
+    test_pdfs(list): Paths of the pdf files
+
+    batch_size(number): Number of texts buffered per nlp.pipe batch
+
+    n_process(number): Number of processes nlp.pipe uses
+
+    return_exceptions(bool): Return the exception of a failing pdf as its result instead of raising it, so the
+    other pdfs of the batch are still extracted
+
+    fast_paths(list): Receives the list of fast paths (see section_fast_path) each pdf took, in the order of test_pdfs
+
+    returns:
+
+    results(list): final_precision() output (precision_data, data, final_data) of each pdf, in the order of test_pdfs
+
+    '''
+
+    errors = {}
+    document_fast_paths = [set() for test_pdf in test_pdfs]
+
+    def document_stage(pdf, stage, *args):
+        _fast_paths.clear()
+        try:
+            return stage(*args)
+        except Exception as error:
+            if not return_exceptions:
+                raise
+            errors[pdf] = error
+        finally:
+            document_fast_paths[pdf].update(_fast_paths)
+
+    processed, sections = {}, {}
+    for pdf in range(0,len(test_pdfs)):
+        processed[pdf] = document_stage(pdf, pdf_multi_processor, test_pdfs[pdf], ["Precision", "Scope"])
+        if pdf not in errors:
+            sections[pdf] = document_stage(pdf, header_section, test_pdfs[pdf], "Precision", processed[pdf]["Precision"])
+    ner_pdfs = [pdf for pdf in range(0,len(test_pdfs)) if pdf not in errors and section_needs_ner(sections[pdf])]
+
+    contexts, scope_sections = {}, {}
+    for pdf in ner_pdfs:
+        contexts[pdf] = extraction_context(sections[pdf]['text_between'])
+        scope_sections[pdf] = document_stage(pdf, header_section, test_pdfs[pdf], "Scope", processed[pdf]["Scope"])
+    ner_pdfs = [pdf for pdf in ner_pdfs if pdf not in errors]
+    pipe_extraction_contexts([contexts[pdf] for pdf in ner_pdfs], batch_size, n_process)
+
+    scope_texts = [component_matrix_text(scope_sections[pdf]['text_between'], sections[pdf]['text_between'], test_pdfs[pdf])
+                   for pdf in ner_pdfs]
+    scope_docs = {}
+    if scope_texts:
+        scope_docs = dict(zip(ner_pdfs, get_spacy_model(SCOPE_MODEL).pipe(scope_texts, batch_size=batch_size,
+                                                                          n_process=n_process)))
+
+    results = []
+    for pdf in range(0,len(test_pdfs)):
+        if pdf not in errors:
+            result = document_stage(pdf, final_precision, test_pdfs[pdf], sections[pdf], scope_sections.get(pdf),
+                                    contexts.get(pdf), scope_docs.get(pdf))
+        results.append(errors[pdf] if pdf in errors else result)
+    if fast_paths is not None:
+        fast_paths.extend(sorted(paths) for paths in document_fast_paths)
+    return results
+
+
 ####Code for table  metadata
-def final_table(tabledata):
-    final_tabledata =pd.DataFrame(columns=['Dow_id','matrix','component','precision','unit','precision_type','distribution','condition'])
+FINAL_TABLE_COLUMNS = ['Dow_id','matrix','component','precision','unit','precision_type','distribution','condition']
+
+
+def _table_metadata(data):
 
-    for table in range(0,len(tabledata[0])):
+    '''This function returns the metadata rows of one precision table, assigning each output column at once.'''
 
-        data = tabledata[0][table]
-        data.columns = data.iloc[0]
-        data =data.drop(0,0).reset_index().drop('index',1)
-        final_data = pd.DataFrame(columns=['Dow_id','matrix','component','precision','unit','precision_type','distribution','condition'],index=range(0,len(data)))
+    data.columns = data.iloc[0]
+    data =data.drop(0,axis=0).reset_index().drop('index',axis=1)
 
-        precision_list = ['precision','standarddeviation',"standardvalue"]
-        condition_list = ['averangeconcentration','average']
-        component_list = ['sample','analyte','resin','analysis','resin#']
-        actual_columns = data.columns
+    precision_list = ['precision','standarddeviation',"standardvalue"]
+    condition_list = ['averangeconcentration','average']
 
-        columns = []
+    columns = []
+    for i in range(0,len(data.columns)):
+        columns.append(re.sub(r"\r|\s","",str(data.columns[i])).lower())
+    data.columns =columns
+    cols=[]
+    if str(data.columns).count("standarddeviation")>1:
         for i in range(0,len(data.columns)):
-            columns.append(re.sub(r"\r|\s","",str(data.columns[i])).lower())
-        data.columns =columns
-        cols=[]
-        if str(data.columns).count("standarddeviation")>1:
-            for i in range(0,len(data.columns)):
-                col=data.columns[i]
-                if "standarddeviation" in col and col != "standarddeviation":
-                    cols.append(col)
-        data = data.drop(cols,1)
-        for col in data.columns:
-            if "95%confidence" in col:
-                data = data.drop(col,1)
-
-        for k in range(0,len(final_data)):
-            final_data["component"][k]=re.sub(r"\r"," ",str(data[data.columns[0]][k]))
-
-        for k in range(0,len(final_data)):
-            final_data["matrix"][k] = data.columns[0].upper()
-        for col in data.columns:
-            if "distribution" in col:
-                for k in range(0,len(final_data)):
-                    final_data["distribution"][k]=col
-            else:
-                for k in range(0,len(final_data)):
-                    final_data["distribution"][k]= "normal(if Null)"
-        for col in data.columns:
-            for name in precision_list:
-                if name in col:
-                    if col == "standarddeviation":
-                        for k in range(0,len(final_data)):
-                            final_data["precision_type"][k]="absolute"
-                        for k in range(0,len(final_data)):
-                            final_data["precision"][k]=data[col][k]
-                    else:
-                        temp = re.sub(r"standarddeviation","",col)
-                        if len(temp) < 2:
-                            temp = "absolute"
-                        for k in range(0,len(final_data)):
-                            final_data["precision_type"][k]=temp
-                        for k in range(0,len(final_data)):
-                            final_data["precision"][k]=data[col][k]
-
-            precision_unit = final_data['precision'].values
-            precision_unit = re.search(r"\[(.+?)\]",str(precision_unit))
-            if precision_unit != None:
-                precision_unit = precision_unit.group(0)
-                precision_unit = re.sub(r"(N|n)ote(s|)|\d|\.|\\r|\'|\[|\]|\(|\)","",str(precision_unit))
-            for k in range(0,len(final_data)):
-                final_data['unit'][k] = precision_unit
-
-            for name in condition_list:
-                if name in col:
-                    for k in range(0,len(final_data)):
-                        final_data["condition"][k]=data[col][k]
-                    condition_unit = final_data['condition'].values
-                    condition_unit = re.search(r"\[(.+?)\]",str(condition_unit))
-                    if condition_unit != None:
-                        condition_unit = condition_unit.group(0)
-                        condition_unit = re.sub(r"\d|\.|\\r|\'|\[|\]","",str(condition_unit))
-                    for k in range(0,len(final_data)):
-                        final_data["condition"][k]= str(final_data['condition'][k]) + " " +str(condition_unit)+" " + str(col)
-
-        final_data = final_data.drop(0,0)
-        final_tabledata = pd.concat([final_tabledata,final_data],axis=0)
-        final_tabledata.index = range(0,len(final_tabledata))
-        for k in range(0,len(final_tabledata)):
-            final_tabledata['Dow_id'][k] = re.sub(r"\/home/cdsw/data/MethodsForSoothsayer_181105/","",test_pdf)
+            col=data.columns[i]
+            if "standarddeviation" in col and col != "standarddeviation":
+                cols.append(col)
+    data = data.drop(cols,axis=1)
+    for col in data.columns:
+        if "95%confidence" in col:
+            data = data.drop(col,axis=1)
+
+    rows = len(data)
+    missing = np.full(rows, np.nan, dtype=object)
+    metadata = {}
+
+    metadata['component'] = data[data.columns[0]].map(str).str.replace("\r", " ", regex=False).values
+    metadata['matrix'] = data.columns[0].upper()
+    # the last column decides, as every column overwrote the distribution of the previous one
+    last = data.columns[-1]
+    metadata['distribution'] = last if "distribution" in last else "normal(if Null)"
+
+    precision_col, condition_col = None, None
+    for col in data.columns:
+        if any(name in col for name in precision_list):
+            precision_col = col
+        if any(name in col for name in condition_list):
+            condition_col = col
+
+    precision = missing
+    if precision_col is not None:
+        temp = re.sub(r"standarddeviation","",precision_col)
+        if precision_col == "standarddeviation" or len(temp) < 2:
+            temp = "absolute"
+        metadata['precision_type'] = temp
+        precision = data[precision_col].values.astype(object)
+        metadata['precision'] = precision
+
+    if rows > 0:
+        precision_unit = re.search(r"\[(.+?)\]",str(precision))
+        if precision_unit != None:
+            precision_unit = precision_unit.group(0)
+            precision_unit = re.sub(r"(N|n)ote(s|)|\d|\.|\\r|\'|\[|\]|\(|\)","",str(precision_unit))
+        metadata['unit'] = precision_unit
+
+    if condition_col is not None and rows > 0:
+        condition = data[condition_col].values.astype(object)
+        condition_unit = re.search(r"\[(.+?)\]",str(condition))
+        if condition_unit != None:
+            condition_unit = condition_unit.group(0)
+            condition_unit = re.sub(r"\d|\.|\\r|\'|\[|\]","",str(condition_unit))
+        metadata['condition'] = [str(value) + " " +str(condition_unit)+" " + str(condition_col) for value in condition]
+
+    final_data = pd.DataFrame({column: metadata.get(column, missing) for column in FINAL_TABLE_COLUMNS},
+                              index=range(0,rows), columns=FINAL_TABLE_COLUMNS, dtype=object)
+    return final_data.drop(0,axis=0)
+
+
+@profiled('final_table')
+def final_table(tabledata, test_pdf):
+
+    '''This function returns the precision metadata of the tables found under the Precision header.
+
+    Parameters:
+
+    tabledata(list): table_data() output, the tables of its first entry are used. None or [] (no tables under the
+    header) give no rows
+
+    test_pdf(str): Path of the pdf file
+
+    returns:
+
+    final_tabledata(DataFrame): One row per table row with the FINAL_TABLE_COLUMNS columns
+
+    '''
+
+    frames = [pd.DataFrame(columns=FINAL_TABLE_COLUMNS)]
+    if tabledata:
+        frames = frames + [_table_metadata(tabledata[0][table]) for table in range(0,len(tabledata[0]))]
+
+    final_tabledata = pd.concat(frames,axis=0)
+    final_tabledata.index = range(0,len(final_tabledata))
+    if len(final_tabledata) > 0:
+        final_tabledata['Dow_id'] = re.sub(r"\/home/cdsw/data/MethodsForSoothsayer_181105/","",test_pdf)
 
     return final_tabledata
 
 
-# In[114]:
+def precision_table_metadata(test_pdf):
 
+    '''This function returns the metadata of the precision tables of a pdf by calling final_table().
 
-import os
-os.getcwd()
-os.chdir("/home/cdsw/Dow_Codes")
+    Parameters:
 
-test_pdf="./data/101500-TE94A.pdf"
+    test_pdf(str): Path to read a pdf file from a directory.
 
-precision_data,data,final_data=final_precision(test_pdf)
-final_data
+    returns:
 
+    final_tabledata(DataFrame): Precision metadata extracted from the tables under the Precision header
 
-# In[115]:
+    '''
 
+    preprocessed_text, start, end, pdf_name,corpus,header,pages=pdf_processor(file_path=test_pdf, header="Precision")
+    if section_fast_path(preprocessed_text, start, header) is not None:
+        # table_data() finds no tables without a header, so the result has no rows
+        return final_table(None, test_pdf)
+    index=section_index(preprocessed_text, [header])
+    text_between=text_data(preprocessed_text, start, end, index)
+    prefetch_section_tables(test_pdf, preprocessed_text, text_between, pdf_name, start, index, references=False)
+    tabledata=table_data(test_pdf, preprocessed_text, text_between, pdf_name, start, header, index)
+    return final_table(tabledata, test_pdf)
+
+
+def _init_corpus_worker(model_names, page_cache=None, tabula_server=False, table_cache=None, stream_pages=False,
+                        text_backend=None):
+
+    '''Warms the spaCy models (and the tabula server) of a corpus worker once, so every document it processes reuses them.'''
+
+    if page_cache is not None:
+        set_page_text_cache(page_cache)
+    if tabula_server:
+        start_tabula_server(sys.executable if tabula_server is True else tabula_server)
+    if table_cache is not None:
+        set_table_cache(table_cache)
+    if stream_pages:
+        set_page_streaming(True)
+    if text_backend is not None:
+        set_text_backend(text_backend)
+    try:
+        warm_spacy_models(model_names)
+    except Exception:
+        # the models are loaded again on first use, and the failure is reported per document
+        traceback.print_exc()
+
+
+def _process_settings():
+
+    '''Returns the settings of this process that _init_corpus_worker() changes, for _restore_process_settings().'''
+
+    return _page_text_cache, _table_backend, _table_cache, _stream_pages, _text_backend
+
+
+def _restore_process_settings(settings):
+
+    '''Puts back the settings _process_settings() returned, stopping a tabula server started since.'''
+
+    global _page_text_cache, _table_cache, _stream_pages, _text_backend
+    _page_text_cache, table_backend, _table_cache, _stream_pages, _text_backend = settings
+    set_table_backend(table_backend)
+
+
+def _corpus_worker(task_pdf):
+    task, test_pdf, profile = task_pdf
+    _fast_paths.clear()
+    if not profile:
+        try:
+            return test_pdf, task(test_pdf), None, None, sorted(_fast_paths)
+        except Exception:
+            return test_pdf, None, traceback.format_exc(), None, sorted(_fast_paths)
+
+    with profile_document(test_pdf) as document_profile:
+        try:
+            result, error = task(test_pdf), None
+        except Exception:
+            result, error = None, traceback.format_exc()
+            document_profile.error = error
+    return test_pdf, result, error, document_profile.to_dict(), sorted(_fast_paths)
+
+
+def _corpus_batch_worker(batch):
+    test_pdfs, batch_size, n_process, profile = batch
+    document_fast_paths, profiles = [], [None] * len(test_pdfs)
+    try:
+        if profile:
+            # the stages of a batch run for all its pdfs together, so the batch has one profile
+            with profile_document(", ".join(test_pdfs)) as batch_profile:
+                results = final_precision_batch(test_pdfs, batch_size, n_process, True, document_fast_paths)
+            profiles[0] = batch_profile.to_dict()
+        else:
+            results = final_precision_batch(test_pdfs, batch_size, n_process, True, document_fast_paths)
+    except Exception as error:
+        results, document_fast_paths = [error] * len(test_pdfs), [[]] * len(test_pdfs)
+
+    documents = []
+    for test_pdf, result, document_profile, fast_paths in zip(test_pdfs, results, profiles, document_fast_paths):
+        if isinstance(result, Exception):
+            error = "".join(traceback.format_exception(type(result), result, result.__traceback__))
+            documents.append((test_pdf, None, error, document_profile, fast_paths))
+        else:
+            documents.append((test_pdf, result, None, document_profile, fast_paths))
+    return documents
 
-columns_list = ['Dow_id', 'matrix', 'component', 'condition', 'distribution','precision_type', 'unit', 'precision']
-meta_df = pd.DataFrame(columns = columns_list)
-count =0
-globaldata = glob.glob("/home/cdsw/data/MethodsForSoothsayer_181105/*.pdf")
-for pdf in range(0,100):
-    test_pdf = globaldata[pdf]
-    print("Document Number ----",pdf+1)
-    precision_data,data,final_data=final_precision(test_pdf)
 
+def run_corpus(test_pdfs, task=final_precision, processes=None, chunksize=1, model_names=SPACY_MODELS, page_cache=None,
+               tabula_server=False, table_cache=None, profile=None, stream_pages=False, text_backend=None,
+               fast_paths=None, batch_size=None, n_process=1):
+
+    '''This function runs task (final_precision, precision_table_metadata, ...) over the pdfs with a process pool.
+
+    Parameters:
+
+    test_pdfs(list): Paths of the pdf files
+
+    task(function): Module level function called with the path of each pdf
+
+    processes(number): Number of worker processes, os.cpu_count() when None, 1 runs in this process (the settings
+    below then only apply during the run)
+
+    chunksize(number): Number of pdfs sent to a worker at a time
+
+    model_names(list): spaCy models loaded once by each worker when it starts
+
+    page_cache(str): Path of the PageTextCache database the workers read page texts from, None for no cache
+
+    tabula_server: Give each worker a TabulaServer that keeps its JVM warm across documents, True to run it with this
+    python or the path of a python with tabula-py >= 2.8
+
+    table_cache: True or the directory of an on-disk TableCache for the tabula results of each worker (see set_table_cache)
+
+    profile(object): ProfileReport that receives the DocumentProfile of every pdf, None to run without profiling
+
+    stream_pages(bool): Read the pages of each pdf only as far as its sections need them (see set_page_streaming).
+    This only saves work for section_texts(): table_data() and out_tables() look for the tables on every page,
+    so the table tasks still read the whole pdf when it has the header
+
+    text_backend: TEXT_BACKENDS name of the text extraction engine of the workers, None for PyPDF2 (see set_text_backend)
+
+    fast_paths(Counter): Receives the number of pdfs that took each fast path of section_fast_path() (image_format,
+    no_header.<header>), skipping the section stages
+
+    batch_size(number): Only for task=final_precision: send the pdfs to the workers in batches of batch_size, which
+    run through final_precision_batch() so their NER goes through nlp.pipe together. None runs final_precision()
+    per pdf. Profiles are then recorded per batch
+
+    n_process(number): Number of processes nlp.pipe uses in a batch, more than 1 only with processes=1 (the pool
+    workers can not start processes)
+
+    returns:
+
+    results(generator): (test_pdf, result, error) per pdf in the order of test_pdfs. error is the traceback
+    of a failing document (result is None then) and None otherwise
+
+    '''
+
+    worker, tasks = _corpus_worker, [(task, test_pdf, profile is not None) for test_pdf in test_pdfs]
+    if batch_size is not None:
+        if task is not final_precision:
+            raise ValueError("batch_size is only supported for task=final_precision")
+        if n_process != 1 and processes != 1:
+            raise ValueError("n_process > 1 needs processes=1")
+        worker, chunksize = _corpus_batch_worker, 1
+        tasks = [(test_pdfs[first:first + batch_size], batch_size, n_process, profile is not None)
+                 for first in range(0, len(test_pdfs), batch_size)]
+
+    if tabula_server and processes != 1:
+        # a helper that can not start would fail every worker the pool starts, so it is checked once here
+        TabulaServer(sys.executable if tabula_server is True else tabula_server).start().stop()
+
+    # with processes=1 the worker settings are made in this process, and put back once the run is over
+    settings, pool = _process_settings(), None
+    try:
+        if processes == 1:
+            _init_corpus_worker(model_names, page_cache, tabula_server, table_cache, stream_pages, text_backend)
+            results = map(worker, tasks)
+        else:
+            pool = multiprocessing.Pool(processes, initializer=_init_corpus_worker, initargs=(model_names, page_cache, tabula_server, table_cache, stream_pages, text_backend))
+            results = pool.imap(worker, tasks, chunksize)
+
+        if batch_size is not None:
+            results = (document for batch in results for document in batch)
+        for test_pdf, result, error, document_profile, document_fast_paths in results:
+            if profile is not None and document_profile is not None:
+                profile.add(document_profile)
+            if fast_paths is not None:
+                fast_paths.update(document_fast_paths)
+            yield test_pdf, result, error
+    finally:
+        if pool is not None:
+            pool.terminate()
+        if processes == 1:
+            _restore_process_settings(settings)
+
+
+
+OUTPUT_COLUMNS = ['Dow_id','matrix','component','average','precision','precision_type','unit','distribution','condition']
+
+
+class ResultWriter(object):
+
+    '''Streaming sink that appends the result rows of each document to an output as they are produced, instead of
+    concatenating everything in memory and writing at the end. At most flush_rows rows are held in memory, and
+    everything written before a crash stays on disk.
+
+    Parameters:
+
+    path(str): Output path
+
+    columns(list): Output columns, rows are reindexed to them
+
+    flush_rows(number): Buffered rows that trigger a write, 1 writes every document as soon as it arrives
+
+    append(bool): Keep the rows of an existing output instead of starting a new one
+
+    '''
+
+    def __init__(self, path, columns=OUTPUT_COLUMNS, flush_rows=1, append=False):
+        self.path = path
+        self.columns = list(columns)
+        self.flush_rows = flush_rows
+        self.rows_written = 0
+        self._frames = []
+        self._buffered_rows = 0
+        if not append:
+            self._clear()
+
+    def write(self, frame):
+        frame = frame.reindex(columns=self.columns)
+        self._frames.append(frame)
+        self._buffered_rows += len(frame)
+        if self._buffered_rows >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        if self._frames:
+            frame = pd.concat(self._frames, axis=0)
+            if len(frame) > 0:
+                self._write_frame(frame)
+            self.rows_written += len(frame)
+            self._frames = []
+            self._buffered_rows = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _clear(self):
+        raise NotImplementedError
+
+    def _write_frame(self, frame):
+        raise NotImplementedError
+
+
+class CsvResultWriter(ResultWriter):
+
+    '''ResultWriter appending to one csv file. The header is written once, when the file is empty.'''
+
+    def _clear(self):
+        open(self.path, 'w').close()
+
+    def _write_frame(self, frame):
+        header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, 'a', newline='') as output:
+            frame.to_csv(output, header=header, index=False)
+            output.flush()
+            os.fsync(output.fileno())
+
+
+class ParquetResultWriter(ResultWriter):
+
+    '''ResultWriter writing a directory of parquet part files (one per flush), readable with pd.read_parquet(path).
+    Values are stored as strings since the metadata columns mix strings, numbers and lists. Needs pyarrow or fastparquet.'''
+
+    def _clear(self):
+        for part in glob.glob(os.path.join(self.path, "part-*.parquet")):
+            os.remove(part)
+
+    def _write_frame(self, frame):
+        os.makedirs(self.path, exist_ok=True)
+        part = len(glob.glob(os.path.join(self.path, "part-*.parquet")))
+        frame = frame.astype(object).where(frame.notna(), None)
+        frame = frame.apply(lambda column: column.map(lambda value: None if value is None else str(value)))
+        frame.to_parquet(os.path.join(self.path, "part-%05d.parquet" % part), index=False)
+
+
+
+PIPELINE_VERSION = "1"
+
+
+def _task_name(task):
+    if isinstance(task, functools.partial):
+        return task.func.__name__
+    return task.__name__
+
+
+def precision_rows(result):
+
+    '''Returns the output rows of a final_precision() result, None when the document has none.'''
+
+    precision_data,data,final_data=result
     if str(type(final_data)) == "<class 'pandas.core.frame.DataFrame'>":
-        count=count+1
-        print(test_pdf,count)
-        frames = [meta_df,final_data]
-        meta_df = pd.concat(frames,axis=0)
-meta_df.index = range(0,len(meta_df))
+        final_data['average'] = " "
+        return final_data
+    return None
 
 
-# In[117]:
+def table_rows(result):
 
+    '''Returns the output rows of a precision_table_metadata() result.'''
+
+    result['average'] = " "
+    return result
+
+
+class CorpusManifest(object):
+
+    '''On-disk manifest (SQLite) of the documents a corpus run has processed: per (pdf path, task) the size, mtime and
+    content hash of the file, the pipeline version that processed it and the output rows it produced. update_manifest()
+    uses it to only run the pipeline on new or changed pdfs, and frames() returns the stored rows to rebuild the output.
+
+    Parameters:
+
+    path(str): Path of the SQLite database file
+
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = None
+
+    def _connect(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, timeout=60)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS documents (path TEXT, task TEXT, size INTEGER, "
+                                     "mtime INTEGER, content_hash TEXT, version TEXT, rows BLOB, processed REAL, "
+                                     "PRIMARY KEY (path, task))")
+            self._connection.commit()
+        return self._connection
+
+    def entries(self, task):
+
+        '''Returns path -> (size, mtime, content_hash, version) of the documents stored for task.'''
+
+        return {row[0]: row[1:] for row in self._connect().execute(
+            "SELECT path, size, mtime, content_hash, version FROM documents WHERE task=?", (task,))}
+
+    def put(self, path, task, size, mtime, content_hash, version, frame):
+        if frame is None:
+            frame = pd.DataFrame()
+        frame = frame.astype(object).where(frame.notna(), None)
+        rows = json.dumps({'columns': [str(column) for column in frame.columns], 'data': frame.values.tolist()},
+                          default=str)
+        with self._connect() as connection:
+            connection.execute("INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                               (path, task, size, mtime, content_hash, version,
+                                zlib.compress(rows.encode('utf-8')), time.time()))
+
+    def touch(self, path, task, size, mtime):
+        with self._connect() as connection:
+            connection.execute("UPDATE documents SET size=?, mtime=? WHERE path=? AND task=?", (size, mtime, path, task))
+
+    def remove(self, paths, task):
+        with self._connect() as connection:
+            connection.executemany("DELETE FROM documents WHERE path=? AND task=?", [(path, task) for path in paths])
+
+    def frames(self, test_pdfs, task):
+
+        '''Yields the stored output rows of task for the pdfs, in the order of test_pdfs, skipping pdfs without rows.'''
+
+        connection = self._connect()
+        task = task if isinstance(task, str) else _task_name(task)
+        for test_pdf in test_pdfs:
+            row = connection.execute("SELECT rows FROM documents WHERE path=? AND task=?", (test_pdf, task)).fetchone()
+            if row is None:
+                continue
+            rows = json.loads(zlib.decompress(row[0]).decode('utf-8'))
+            if rows['data']:
+                yield pd.DataFrame(rows['data'], columns=rows['columns'])
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def update_manifest(manifest, test_pdfs, rows=precision_rows, task=final_precision, version=PIPELINE_VERSION, **options):
+
+    '''This function brings the manifest up to date with the pdfs: it runs task (through run_corpus) only on the pdfs
+    that are new, changed or were processed by another pipeline version, and drops the entries of pdfs that are
+    no longer in test_pdfs. A file whose size and mtime are unchanged is not hashed again.
+
+    Parameters:
+
+    manifest(object): CorpusManifest
+
+    test_pdfs(list): Paths of the pdf files of the corpus
+
+    rows(function): Turns a task result into its output rows (DataFrame, or None for no rows)
+
+    task(function): Module level function called with the path of each pdf
+
+    version(str): Pipeline version, stored entries of other versions are processed again
+
+    options: Other run_corpus() arguments (processes, model_names, page_cache, ...)
+
+    returns:
+
+    results(generator): (test_pdf, rows, error) per processed pdf. error is the traceback of a failing document,
+    which is removed from the manifest (with the rows of its earlier version) so the next run tries it again
+
+    '''
+
+    task_name = _task_name(task)
+    version = version + "/" + _text_backend.version
+    entries = manifest.entries(task_name)
+    manifest.remove([path for path in entries if path not in set(test_pdfs)], task_name)
+
+    stale = {}
+    for test_pdf in test_pdfs:
+        stat = os.stat(test_pdf)
+        size, mtime = stat.st_size, stat.st_mtime_ns
+        entry = entries.get(test_pdf)
+        if entry is not None and entry[3] == version and entry[0:2] == (size, mtime):
+            continue
+        content_hash = file_content_hash(test_pdf)
+        if entry is not None and entry[3] == version and entry[2] == content_hash:
+            manifest.touch(test_pdf, task_name, size, mtime)
+            continue
+        stale[test_pdf] = (size, mtime, content_hash)
+
+    for test_pdf, result, error in run_corpus(list(stale), task=task, **options):
+        if error is not None:
+            # the stored rows belong to the earlier version of the file and must not be published for this one
+            manifest.remove([test_pdf], task_name)
+            yield test_pdf, None, error
+            continue
+        frame = rows(result)
+        manifest.put(test_pdf, task_name, *stale[test_pdf], version=version, frame=frame)
+        yield test_pdf, frame, None
+
+
+SECTION_COLUMNS = ['Dow_id','header','start','end','text']
+
+
+def section_texts(test_pdf, headers=("Precision",)):
+
+    '''This function returns the text under each of the headers of a pdf, reading the pdf once.
+
+    Parameters:
+
+    test_pdf(str): Path to read a pdf file from a directory.
+
+    headers(list): The headings of interest, for example ['Precision', 'Scope']
+
+    returns:
+
+    sections(DataFrame): One row per header with the SECTION_COLUMNS columns, start and end are empty
+    for a header the pdf does not have
+
+    '''
+
+    return _section_rows(pdf_multi_processor(test_pdf, list(headers)))
+
+
+def _section_rows(processed):
+    rows = []
+    for header, processed_header in processed.items():
+        preprocessed_text, start, end, pdf_name,corpus,header,pages=processed_header
+        text_between = None
+        if section_fast_path(preprocessed_text, start, header) is None:
+            text_between = text_data(preprocessed_text, start, end, section_index(preprocessed_text, [header]))
+        rows.append([pdf_name, header, "" if str(start) == 'nan' else start, "" if str(end) == 'nan' else end,
+                     text_between or ""])
+    return pd.DataFrame(rows, columns=SECTION_COLUMNS)
+
+
+def _section_boundary(text, length=32):
+    # the engines space words differently, so the section is compared by its first and last characters without spaces
+    text = re.sub(r"\s", "", str(text))
+    return text[0:length], text[-length:]
+
+
+def compare_text_backends(test_pdfs, headers=("Precision",), backends=('pypdf2', 'pdfium', 'pdfminer'), golden=None):
+
+    '''This function extracts the pdfs with every text backend, times the extraction per page and checks that
+    the sections text_data() cuts out of the texts still have the golden boundaries, to pick the fastest correct engine.
+
+    Parameters:
+
+    test_pdfs(list): Paths of the pdf files
+
+    headers(list): The headings whose sections are checked
+
+    backends(list): TEXT_BACKENDS names or TextBackend objects
+
+    golden: section_texts() rows (DataFrame, or the path of a csv written by the sections command) with the expected
+    start, end and text of every (Dow_id, header), by default the sections of the first backend
+
+    returns:
+
+    report(DataFrame): Per backend the pages, the extraction seconds (total, mean and slowest page), the sections
+    checked, the sections whose start, end and text boundaries match golden and the error of a backend that failed
+
+    '''
+
+    if isinstance(golden, str):
+        golden = pd.read_csv(golden, dtype=str, keep_default_na=False)
+    expected = {}
+    if golden is not None:
+        expected = {(row['Dow_id'], row['header']): row for row in golden.to_dict('records')}
+
+    previous_backend, previous_cache = _text_backend, _page_text_cache
+    set_page_text_cache(None)
+    rows = []
+    try:
+        for number, backend in enumerate(backends):
+            set_text_backend(backend)
+            row = {'backend': _text_backend.name, 'version': _text_backend.version, 'documents': 0, 'pages': 0,
+                   'seconds': 0.0, 'mean_page_seconds': None, 'max_page_seconds': 0.0, 'sections': 0, 'matching': 0,
+                   'error': None}
+            try:
+                for test_pdf in test_pdfs:
+                    pdf_name = test_pdf.split('/')[-1].split('\\')[-1].split('.')[0]
+                    document = _text_backend.open(test_pdf)
+                    page_texts = [document.text(page) for page in range(0, document.pages)]
+                    document.close()
+                    row['documents'] += 1
+                    row['pages'] += document.pages
+                    row['seconds'] += sum(document.page_seconds.values())
+                    row['max_page_seconds'] = max([row['max_page_seconds']] + list(document.page_seconds.values()))
+
+                    sections = _section_rows({header: _header_processor(page_texts, None, pdf_name, header)
+                                              for header in headers})
+                    if golden is None and number == 0:
+                        expected.update(((section['Dow_id'], section['header']), section)
+                                        for section in sections.to_dict('records'))
+                    for section in sections.to_dict('records'):
+                        reference = expected.get((section['Dow_id'], section['header']))
+                        if reference is None:
+                            continue
+                        row['sections'] += 1
+                        if (section['start'] == reference['start'] and section['end'] == reference['end']
+                                and _section_boundary(section['text']) == _section_boundary(reference['text'])):
+                            row['matching'] += 1
+            except Exception as error:
+                row['error'] = type(error).__name__ + ": " + str(error)
+            if row['pages']:
+                row['mean_page_seconds'] = row['seconds'] / row['pages']
+            rows.append(row)
+    finally:
+        set_text_backend(previous_backend)
+        set_page_text_cache(previous_cache)
+    return pd.DataFrame(rows, columns=['backend', 'version', 'documents', 'pages', 'seconds', 'mean_page_seconds',
+                                       'max_page_seconds', 'sections', 'matching', 'error'])
+
+
+TASKS = {'precision': (final_precision, precision_rows, OUTPUT_COLUMNS, SPACY_MODELS),
+         'tables': (precision_table_metadata, table_rows, OUTPUT_COLUMNS, []),
+         'sections': (section_texts, None, SECTION_COLUMNS, [])}
+
+
+class ServiceBusy(Exception):
+
+    '''Raised by ExtractionService.submit() when its queue is full.'''
+
+
+class ExtractionService(object):
+
+    '''Local asyncio HTTP service (on a tcp port or a unix socket) that extracts the precision metadata of one pdf per
+    request. The spaCy models and the tabula backend are loaded once when it starts. Incoming documents wait in a bounded
+    queue and are taken in micro-batches, so the NER stages of concurrent requests run through nlp.pipe together
+    (see final_precision_batch). A request arriving while the queue is full is refused with 503 (backpressure).
+
+    Requests:
+
+    POST /precision, POST /tables with a json body {"pdf": "<path>"}, or with the pdf itself as an application/pdf body
+    and ?name=<file name>. The response is {"Dow_id", "task", "rows", "message", "error"}, rows being the precision_rows()
+    or table_rows() records and message the text final_precision() returns when it has no rows.
+
+    GET /stats: the counters of stats()
+
+    '''
+
+    def __init__(self, queue_size=32, batch_size=8, batch_wait=0.05, model_names=SPACY_MODELS, page_cache=None,
+                 tabula_server=False, table_cache=None, stream_pages=False, text_backend=None):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.worker_options = (model_names, page_cache, tabula_server, table_cache, stream_pages, text_backend)
+        self.counts = collections.Counter()
+        self._queue = None
+        self._server = None
+        self._batcher = None
+        # one thread runs all extraction, so the warm models and the tabula backend are never used concurrently
+        self._executor = concurrent.futures.ThreadPoolExecutor(1)
+
+    async def start(self, host="127.0.0.1", port=8080, path=None):
+
+        '''Warms the models and the tabula backend, then listens on host:port, or on the unix socket path when given.'''
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, _init_corpus_worker, *self.worker_options)
+        self._queue = asyncio.Queue(self.queue_size)
+        self._batcher = loop.create_task(self._run_batches())
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        return self
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+        self._executor.shutdown(wait=True)
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    def stats(self):
+        stats = dict(self.counts)
+        stats['queued'] = self._queue.qsize() if self._queue is not None else 0
+        stats['queue_size'] = self.queue_size
+        return stats
+
+    async def submit(self, task, test_pdf):
+
+        '''Queues test_pdf for task ('precision' or 'tables') and returns its result, raises ServiceBusy when the
+        queue is full.'''
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((task, test_pdf, future))
+        except asyncio.QueueFull:
+            self.counts['rejected'] += 1
+            raise ServiceBusy("%d documents are queued" % self.queue_size)
+        self.counts['received'] += 1
+        return await future
+
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.batch_wait
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            wait = deadline - loop.time()
+            if wait <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), wait))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            for task in ('precision', 'tables'):
+                requests = [(test_pdf, future) for request_task, test_pdf, future in batch if request_task == task]
+                if requests == []:
+                    continue
+                self.counts['batches'] += 1
+                self.counts['batched_documents'] += len(requests)
+                try:
+                    results = await loop.run_in_executor(self._executor, _service_batch, task,
+                                                         [test_pdf for test_pdf, future in requests])
+                except Exception as error:
+                    results = [error] * len(requests)
+                for (test_pdf, future), result in zip(requests, results):
+                    self.counts['failed' if isinstance(result, Exception) else 'processed'] += 1
+                    if not future.done():
+                        future.set_result(result)
+
+    async def _handle(self, reader, writer):
+        upload = None
+        try:
+            status, payload = 400, {'error': "bad request"}
+            method, target, headers, body = await _read_http_request(reader)
+            url = urllib.parse.urlsplit(target)
+            task = url.path.strip("/")
+            if method == "GET" and task == "stats":
+                status, payload = 200, self.stats()
+            elif method != "POST" or task not in ('precision', 'tables'):
+                status, payload = 404, {'error': "unknown request " + method + " " + url.path}
+            else:
+                if headers.get('content-type', '').startswith('application/pdf'):
+                    name = os.path.basename(urllib.parse.parse_qs(url.query).get('name', ["upload.pdf"])[0])
+                    if name in ("", ".", ".."):
+                        raise ValueError("the name of the uploaded pdf is not a file name")
+                    upload = tempfile.mkdtemp(prefix="extraction_service")
+                    test_pdf = os.path.join(upload, name)
+                    with open(test_pdf, 'wb') as pdf:
+                        pdf.write(body)
+                else:
+                    request = json.loads(body.decode('utf-8'))
+                    if not isinstance(request, dict) or not isinstance(request.get('pdf'), str):
+                        raise ValueError('the body must be a json object with the path of the pdf as "pdf"')
+                    test_pdf = request['pdf']
+                status, payload = 200, _service_payload(task, test_pdf, await self.submit(task, test_pdf))
+                if upload is not None:
+                    for row in payload['rows']:
+                        row['Dow_id'] = str(row.get('Dow_id')).replace(upload + os.sep, "")
+                if payload['error'] is not None:
+                    status = 500
+        except ServiceBusy as error:
+            status, payload = 503, {'error': str(error)}
+        except (ValueError, asyncio.IncompleteReadError) as error:
+            # json and unicode decoding errors are ValueErrors too
+            status, payload = 400, {'error': "bad request: " + str(error)}
+        except Exception as error:
+            status, payload = 500, {'error': type(error).__name__ + ": " + str(error)}
+        finally:
+            if upload is not None:
+                for name in os.listdir(upload):
+                    os.remove(os.path.join(upload, name))
+                os.rmdir(upload)
+
+        body = json.dumps(payload, default=str).encode('utf-8')
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error",
+                  503: "Service Unavailable"}[status]
+        head = "HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\nConnection: close\r\n" % (
+            status, reason, len(body))
+        if status == 503:
+            head = head + "Retry-After: 1\r\n"
+        writer.write(head.encode('ascii') + b"\r\n" + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+
+async def _read_http_request(reader):
+    method, target, version = (await reader.readline()).decode('latin-1').split()
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode('latin-1').strip()
+        if line == "":
+            break
+        name, value = line.split(":", 1)
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get('content-length', 0)))
+    return method, target, headers, body
+
+
+def _service_batch(task, test_pdfs):
+    if task == 'precision':
+        return final_precision_batch(test_pdfs, return_exceptions=True)
+    results = []
+    for test_pdf in test_pdfs:
+        try:
+            results.append(precision_table_metadata(test_pdf))
+        except Exception as error:
+            results.append(error)
+    return results
+
+
+def _service_payload(task, test_pdf, result):
+    payload = {'Dow_id': test_pdf.split('/')[-1].split('\\')[-1], 'task': task, 'rows': [], 'message': None,
+               'error': None}
+    if isinstance(result, Exception):
+        payload['error'] = type(result).__name__ + ": " + str(result)
+        return payload
+    frame = TASKS[task][1](result)
+    if frame is not None:
+        payload['rows'] = json.loads(frame.to_json(orient='records', default_handler=str))
+    if task == 'precision' and isinstance(result[0], str):
+        payload['message'] = result[0]
+    return payload
+
+
+async def service_request(task, test_pdf, host="127.0.0.1", port=8080, path=None, upload=False):
+
+    '''Local client of an ExtractionService: sends test_pdf (its path, or the file itself when upload is True) and
+    returns (status, response). task is 'precision', 'tables' or 'stats'.'''
+
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    target, content_type, body = "/" + task, "application/json", b""
+    if task == 'stats':
+        method = "GET"
+    elif upload:
+        method, content_type = "POST", "application/pdf"
+        target = target + "?" + urllib.parse.urlencode({'name': os.path.basename(test_pdf)})
+        with open(test_pdf, 'rb') as pdf:
+            body = pdf.read()
+    else:
+        method, body = "POST", json.dumps({'pdf': test_pdf}).encode('utf-8')
+    writer.write(("%s %s HTTP/1.1\r\nHost: localhost\r\nContent-Type: %s\r\nContent-Length: %d\r\n\r\n" % (
+        method, target, content_type, len(body))).encode('ascii') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    response = await reader.read()
+    writer.close()
+    return status, json.loads(response.split(b"\r\n\r\n", 1)[1].decode('utf-8'))
+
+
+async def serve(address, **options):
+
+    '''Runs an ExtractionService on address (host:port, or the path of a unix socket) until it is cancelled.'''
+
+    service = ExtractionService(**options)
+    if ":" in address and not address.startswith(("/", ".")):
+        host, port = address.rsplit(":", 1)
+        await service.start(host or "127.0.0.1", int(port))
+    else:
+        await service.start(path=address)
+    print("extraction service listening on " + address, file=sys.stderr)
+    try:
+        await service.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+
+    '''Command line entry point: runs a task over the pdfs of a corpus directory and writes the rows to a csv file
+    (or a directory of parquet files for an output ending in .parquet). See --help.'''
+
+    parser = argparse.ArgumentParser(description="Extract precision metadata or section texts from a directory of method pdfs.")
+    parser.add_argument('corpus', nargs='?', help="Directory of the pdf files (searched recursively)")
+    parser.add_argument('--headers', nargs='+', default=["Precision"],
+                        help="Headings whose text the sections task extracts (default: Precision)")
+    parser.add_argument('--output', '-o', default="output.csv", help="Output csv file, or a .parquet directory")
+    parser.add_argument('--task', choices=sorted(TASKS), default='sections',
+                        help="sections: text under each header, precision: final_precision() metadata, "
+                             "tables: final_table() metadata of the Precision tables (default: sections)")
+    parser.add_argument('--processes', '-p', type=int, default=None, help="Worker processes (default: one per cpu, "
+                                                                           "at most one per pdf)")
+    parser.add_argument('--manifest', default=None, help="CorpusManifest database, only new or changed pdfs are processed")
+    parser.add_argument('--page-cache', default=None, help="PageTextCache database of the page texts")
+    parser.add_argument('--table-cache', default=None, help="Directory of an on-disk TableCache of the tabula results")
+    parser.add_argument('--tabula-server', nargs='?', const=True, default=False, metavar='PYTHON',
+                        help="Keep one tabula JVM running per worker in a helper process. Needs tabula-py >= 2.8 "
+                             "(with jpype1) in this python, or in the PYTHON given")
+    parser.add_argument('--text-backend', choices=sorted(TEXT_BACKENDS), default=None,
+                        help="Text extraction engine (default: pypdf2)")
+    parser.add_argument('--compare-backends', nargs='+', choices=sorted(TEXT_BACKENDS), default=None,
+                        help="Instead of a task, write the compare_text_backends() report of these engines to the output")
+    parser.add_argument('--golden', default=None, help="Sections csv the --compare-backends boundaries are checked against")
+    parser.add_argument('--stream', action='store_true',
+                        help="Only read the pages of a pdf up to the end of its sections. Only the sections task "
+                             "reads less: the table stages of the other tasks look at every page")
+    parser.add_argument('--profile', default=None, help="Write a ProfileReport of the run to this json file")
+    parser.add_argument('--limit', type=int, default=None, help="Only process the first LIMIT pdfs")
+    parser.add_argument('--flush-rows', type=int, default=1,
+                        help="Rows buffered before they are written to the output. The default 1 writes the rows of "
+                             "every pdf as soon as it is done, so a killed run keeps them; a larger value writes "
+                             "fewer, larger chunks (one parquet file per chunk)")
+    parser.add_argument('--serve', default=None, metavar='ADDRESS',
+                        help="Instead of a corpus run, start an ExtractionService on host:port or a unix socket path")
+    parser.add_argument('--queue-size', type=int, default=32, help="Documents the service queues before refusing requests")
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help="Pdfs whose NER runs together through nlp.pipe: per worker batch of the precision task "
+                             "(default: one pdf at a time), or per micro-batch of the service (default: 8)")
+    parser.add_argument('--n-process', type=int, default=1,
+                        help="Processes nlp.pipe uses per batch of the precision task (needs --processes 1)")
+    parser.add_argument('--batch-wait', type=float, default=0.05,
+                        help="Seconds the service waits for more documents before starting a micro-batch")
+    arguments = parser.parse_args(argv)
+
+    if arguments.serve is not None:
+        try:
+            asyncio.run(serve(arguments.serve, queue_size=arguments.queue_size, batch_size=arguments.batch_size or 8,
+                              batch_wait=arguments.batch_wait, page_cache=arguments.page_cache,
+                              tabula_server=arguments.tabula_server, table_cache=arguments.table_cache,
+                              stream_pages=arguments.stream, text_backend=arguments.text_backend))
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if arguments.corpus is None:
+        parser.error("the corpus directory is required unless --serve is given")
+
+    test_pdfs = sorted(glob.glob(os.path.join(arguments.corpus, "**", "*.pdf"), recursive=True))[0:arguments.limit]
+    if arguments.compare_backends:
+        report = compare_text_backends(test_pdfs, arguments.headers, arguments.compare_backends, arguments.golden)
+        report.to_csv(arguments.output, index=False)
+        print(report.to_string(index=False), file=sys.stderr)
+        return 0
+    task, rows, columns, model_names = TASKS[arguments.task]
+    version = PIPELINE_VERSION
+    if arguments.text_backend is not None:
+        set_text_backend(arguments.text_backend)
+    if arguments.task == 'sections':
+        task = functools.partial(section_texts, headers=tuple(arguments.headers))
+        rows = lambda result: result
+        version = version + "/" + ",".join(arguments.headers)
+
+    processes = arguments.processes
+    if processes is None:
+        processes = max(1, min(os.cpu_count() or 1, len(test_pdfs)))
+    report = ProfileReport() if arguments.profile else None
+    fast_paths = collections.Counter()
+    options = {'processes': processes, 'model_names': model_names, 'page_cache': arguments.page_cache,
+               'tabula_server': arguments.tabula_server, 'table_cache': arguments.table_cache, 'profile': report,
+               'stream_pages': arguments.stream, 'text_backend': arguments.text_backend,
+               'fast_paths': fast_paths}
+    if arguments.batch_size is not None:
+        if arguments.task != 'precision':
+            parser.error("--batch-size is only supported by the precision task")
+        options.update(batch_size=arguments.batch_size, n_process=arguments.n_process)
+    if arguments.output.endswith(".parquet"):
+        writer = ParquetResultWriter(arguments.output, columns, flush_rows=arguments.flush_rows)
+    else:
+        writer = CsvResultWriter(arguments.output, columns, flush_rows=arguments.flush_rows)
+
+    failed = 0
+    with writer:
+        if arguments.manifest is not None:
+            manifest = CorpusManifest(arguments.manifest)
+            for test_pdf, frame, error in update_manifest(manifest, test_pdfs, rows, task, version, **options):
+                if error is not None:
+                    failed += 1
+                    print(test_pdf, error, file=sys.stderr)
+            for frame in manifest.frames(test_pdfs, task):
+                writer.write(frame)
+            manifest.close()
+        else:
+            for test_pdf, result, error in run_corpus(test_pdfs, task=task, **options):
+                if error is not None:
+                    failed += 1
+                    print(test_pdf, error, file=sys.stderr)
+                    continue
+                frame = rows(result)
+                if frame is not None:
+                    writer.write(frame)
+
+    if report is not None:
+        report.write(arguments.profile)
+    print("%d pdfs, %d failed, %d rows written to %s" % (len(test_pdfs), failed, writer.rows_written, arguments.output),
+          file=sys.stderr)
+    if fast_paths:
+        print("fast paths: " + ", ".join("%s %d" % (name, fast_paths[name]) for name in sorted(fast_paths)),
+              file=sys.stderr)
+    return 1 if failed else 0
+
+
+def demo():
+
+    '''The driver cells of the original notebook, on the corpus of the notebook environment.'''
+
+    # In[114]:
+
+
+    os.getcwd()
+    os.chdir("/home/cdsw/Dow_Codes")
+
+    test_pdf="./data/101500-TE94A.pdf"
+
+    precision_data,data,final_data=final_precision(test_pdf)
+    final_data
+
+
+    # In[115]:
+
+
+    manifest = CorpusManifest("demo_output_manifest.db")
+    report = ProfileReport()
+    count =0
+    globaldata = glob.glob("/home/cdsw/data/MethodsForSoothsayer_181105/*.pdf")
+    for pdf, results in enumerate(update_manifest(manifest, globaldata[0:100], profile=report)):
+        test_pdf, final_data, error = results
+        print("Document Number ----",pdf+1)
+        if error is not None:
+            print(test_pdf, error)
+            continue
+
+        if final_data is not None:
+            count=count+1
+            print(test_pdf,count)
+
+
+    # In[117]:
+
+
+    pdfs = ['102375-E18F.pdf','102170-E11B.pdf','102755-E14A.pdf','102727-E17A.pdf','101212-E17D.pdf','101567-ME97B.pdf','102176-E06A.pdf']
+    pdfs = ["/home/cdsw/data/MethodsForSoothsayer_181105/"+pdf for pdf in pdfs]
+    for test_pdf, final_tabledata, error in update_manifest(manifest, pdfs, rows=table_rows, task=precision_table_metadata,
+                                                            model_names=[], profile=report):
+        if error is not None:
+            print(test_pdf, error)
 
-pdfs = ['102375-E18F.pdf','102170-E11B.pdf','102755-E14A.pdf','102727-E17A.pdf','101212-E17D.pdf','101567-ME97B.pdf','102176-E06A.pdf']
-table_dataframe = pd.DataFrame(columns=['Dow_id','matrix','component','precision','unit','precision_type','distribution','condition'])
-for pdf in range(0,len(pdfs)):
-    test_pdf = "/home/cdsw/data/MethodsForSoothsayer_181105/"+pdfs[pdf]
-    preprocessed_text, start, end, pdf_name,corpus,header,pages=pdf_processor(file_path=test_pdf, header="Precision")
-    text_between=text_data(preprocessed_text, start, end)
-    tabledata=table_data(test_pdf, preprocessed_text, text_between, pdf_name, start, header)
-    final_tabledata = final_table(tabledata)
-    table_dataframe = pd.concat([table_dataframe,final_tabledata],axis=0)
-    table_dataframe.index = range(0,len(table_dataframe))
 
+    # In[118]:
 
-# In[120]:
 
+    with CsvResultWriter("demo_output_dataframe.csv", flush_rows=10000) as writer:
+        for frame in manifest.frames(globaldata[0:100], final_precision):
+            writer.write(frame)
+        for frame in manifest.frames(pdfs, precision_table_metadata):
+            writer.write(frame)
+    manifest.close()
+    report.write("demo_profile_report.json")
 
-data = pd.concat([meta_df,table_dataframe],axis=0)
-data.index = range(0,len(data))
-data['average'] = " "
-data = data[['Dow_id','matrix','component','average','precision','precision_type','unit','distribution','condition']]
-data.to_csv("demo_output_dataframe.csv",index=False)
 
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,396 @@
+'''Verbatim copies of the original notebook implementations, used by the regression tests as the oracle the
+optimised functions of information_retrieval are compared against. Do not change them.'''
+
+import re
+
+import numpy as np
+import pandas as pd
+import roman
+
+# the original loads its models with spacy.load(), the tests set this to a spaCy with fake models
+spacy = None
+
+
+def string_comp_match(text_between, tabledata):
+
+    '''This is a function that returns the tables which are having the information provided in the required text data.
+
+    Parameters:
+    text_between(str): The text in between the start and end patterns in the text of the pdf
+
+    tabledata(list): The list of table data sets which are in the pdf
+
+    Returns:
+
+    tabledata(list): List of table data sets in which the table values matched with text between start and end patterns. 
+
+    '''
+
+    final_table = []
+    textdata1 = re.sub(r"\n\s+|TM", "", str(text_between))
+    textdata1 = re.sub(r"[^0-9a-zA-Z]+", "", str(textdata1))       
+    for i in range(0, len(tabledata)):
+        tabledata1 = tabledata[i].dropna(how='all')
+        temp_table = tabledata1.values
+        for row in range(2, len(temp_table)):
+            string = str(temp_table[row])
+            string = re.sub(r"\\r|nan|NaN|[^0-9a-zA-Z]+|TM","", string)
+            string = string.replace("x80x9c","")
+            string = string.replace("x80x93","")
+
+            if string in textdata1:
+                final_table = final_table + [tabledata1]
+                break
+    return final_table
+
+
+def out_tables_list(text_between):
+
+    '''This function takes the text between start and end patterns of heading as input and returns 
+    the list of table names referenced in the text but presented some where else in pdf.
+
+    Parameters:
+
+    text_between(str): The text in between the start and end patterns in the text of the pdf
+
+    returns:
+
+    table_start_list(list): List of tables referenced in the heading (like 'Precision') text
+
+    table_end_list(list): List of table names which are expected as the end patterns for table_start_list
+
+    '''
+
+    integers = list(range(1,50))
+    roman_num = list(range(1,50))
+
+    for integer in range(0, len(roman_num)):
+        roman_num[integer] = roman.toRoman(int(roman_num[integer]))
+
+    table_start, table_start1, table_end, table_end1="","","",""  
+    textdata_temp = str(text_between).split(" ")       
+
+    for word in range(0,len(textdata_temp)):    
+        textdata_temp[word]=re.sub('\'|\"|\,|\.|\\\\|\[|\]',"",textdata_temp[word])
+
+        for number in range(0, len(roman_num)):
+
+            if textdata_temp[word] == roman_num[number] or textdata_temp[word]==str(integers[number]) and "ble" in textdata_temp[word-1]:   
+                table_start=table_start+",Table "+roman_num[number]    
+                table_end=table_end+",Table "+roman_num[number+1]    
+                table_start1=table_start1+",Table "+str((integers[number]))    
+                table_end1=table_end1+",Table "+str(integers[number+1])
+
+    table_start=pd.DataFrame(table_start[1:len(table_start)].split(","))[0].unique() 
+    table_start1=pd.DataFrame(table_start1[1:len(table_start1)].split(","))[0].unique()  
+    table_end=pd.DataFrame(table_end[1:len(table_end)].split(","))[0].unique()     
+    table_end1=pd.DataFrame((table_end1[1:len(table_end1)].split(",")))[0].unique()
+
+    table_start=table_start+","+table_start1
+    table_end=table_end+","+table_end1
+
+    for tablename in range(0,len(table_start)):     
+        table_start[tablename]=table_start[tablename].split(",")
+        table_end[tablename]=table_end[tablename].split(",")
+
+    table_start=re.sub(r'\)|\(|\[|\]|\'',"",str(table_start))    
+    table_start=re.sub(r'list|\n',",",str(table_start))    
+    table_start=re.sub(r"\s*T|\s*able \d{1,2}T",'T',str(table_start))   
+    table_start=re.sub(r"\s\,",',',str(table_start))   
+    table_start_list=table_start.split(",")[1:len(table_start)]
+    table_end=re.sub(r'\)|\(|\[|\]|\'',"",str(table_end))
+    table_end=re.sub(r'list|\n',",",str(table_end))
+    table_end=re.sub(r"\s*T",'T',str(table_end)) 
+    table_end=re.sub(r"\s\,",',',str(table_end))
+    table_end_list=table_end.split(",")[1:len(table_end)]
+
+    return table_start_list,table_end_list
+
+
+def text_data(preprocessed_text, start, end):
+    '''This is a function that returns the text in between the given start and end patterns.
+
+    Parameters:
+
+    preprocessed_text(list): The list of preprocessed text in a list
+
+    start(str): This is a start pattern 
+
+    end (str): This is an end pattern
+
+    Returns:
+
+    text_between(str): The output is the text between the given patterns
+
+    ''' 
+    text_between=''
+    if str(start) != 'nan':
+        text = ' '.join(preprocessed_text)
+        end1= re.sub(r'\\\.','',end)
+        pattern1 = r'' + start + "(.+?)" + end + "\s*[A-Z]"
+        pattern2 = r'' + start + "(.+?)" + end1 + "\s+[A-Z]"
+        pattern3 = r'' + start + "(.+?)" + end + "\s*[a-z]"
+        pattern4 = r'' + start + "(.+?)" + "THE INFORMATION HEREIN"
+        pattern5 = r'' + start + "(.+?)" + "The information herein"
+        pattern6 = r'' + start + "(.+?)" + "Appendix"
+        patterns= [pattern1,pattern2,pattern3,pattern4,pattern5,pattern6]
+
+        for pattern in patterns:
+            temp = re.findall(pattern,text)
+            if temp!=[]:
+                text_between = temp[0]
+                break
+        return text_between
+
+
+def value_unit_spacy(text_data):
+    '''To extract the value and unit of the precision in text_data
+    Parameters:
+    text_data(str): The extracted data under precision
+
+    Returns:
+    value(int): The precision value
+    unit(str): The unit type of precision value
+    len_value(int): Number of precision values in the text_data'''
+
+
+
+
+    nlp=spacy.load("./text_final_1")
+
+    value_unit=[]
+    value_list=[]
+    unit_list=[]
+
+    define_words = 'standard'
+    match_sentence =re.findall(r"([^.]*?%s.*?\.)(?!\d)" % define_words,str(text_data))
+    doc_value_unit=nlp(str(match_sentence))
+
+    for ent in doc_value_unit.ents:
+        if ent.label_=='value_unit':
+            value_unit.append(ent.text)
+            value_unit=''.join(value_unit)
+            value_temp=re.findall(r'(\d+?\.*\d*)',value_unit)
+            unit_temp=re.sub(r'\d+?\.*\d*',"",value_unit)
+
+            if '/' in str(unit_temp) and len(value_temp)>1:
+                uni=unit_temp.split('/')
+                val_1=value_temp
+                value_temp=value_temp[0]
+                unit_temp=str(uni[0]+'/'+str(val_1[1]+unit_temp[1]))
+            value_list.append(value_temp)    
+            unit_list.append(unit_temp)    
+            value_unit=[]
+
+    if value_list==[]:
+        value_list.append("No Value")
+
+    if unit_list==[]:
+        unit_list.append("No Unit")
+
+    value=pd.Series(value_list)
+    unit=pd.Series(unit_list)
+
+    temp_unit=re.search(r'wt\.(.+?)(\.|\%)',str(text_data))
+    if temp_unit != None and "wt/wt" not in str(text_data):
+        temp_unit=temp_unit.group(0)
+        for uni_1 in range(0,len(unit)):
+            unit[uni_1]=temp_unit
+
+    len_value=len(value)        
+
+    return value,unit,len_value
+
+
+
+def precision_type_spacy(text_data):
+    '''To extract the precision type 
+    Parameters:
+    text_data(str): The extracted data under precision
+
+    Returns:
+    precision_type(str): List of precision types for the precision values'''
+
+    precision_type=[]
+
+    type_list=['relative','absolute','pooled','arelative']
+
+    define_words = 'standard'
+    match_sentence =re.findall(r"([^.]*?%s.*?\.)(?!\d)" % define_words,str(text_data))
+    match_precision_type= re.findall(r'((?:\w+\s+){0,2}\bstandard\b\s*(?:\w+\s+){0})',str(match_sentence))
+    for match in match_precision_type:
+        temp=match.split( )
+        if len(temp) !=1 and temp[1] != 'ASTM':
+            if ((temp[0] in type_list) and (temp[1] in type_list)):
+                precision_type.append(temp[0]+temp[1])
+            elif temp[1] in type_list:
+                if temp[1]=='pooled':
+                    temp[1]='pooled absolute'
+                if temp[1]=='arelative':
+                    temp[1]='relative'
+                precision_type.append(temp[1])
+            else:
+                precision_type.append('nan')   
+
+    if precision_type==[]:
+        precision_type.append("No Precision type")
+    precision_type_list=pd.Series(precision_type)   
+    precision_type_list=precision_type_list.replace('nan','absolute')
+
+    length_value=value_unit_spacy(text_data)[2]
+
+    precision_type_list=precision_type_list.tolist()
+    if length_value==2 and len(precision_type_list)==1:
+        precision_type_list.extend([0] * (length_value-1))
+        precision_type_list[1]=precision_type_list[0]
+
+    precision_type_list=pd.Series(precision_type_list)
+
+    return precision_type_list
+
+
+def distribution_spacy(text_data):
+    '''To extract the distribution of the component(s) or matrix 
+    Parameters:
+    text_data(str): The extracted data under precision
+
+    Returns:
+    distribution: List of distribution(s) for the component(s) or matrix'''
+
+
+    nlp=spacy.load("./text_model_1")
+
+    distribution=[]
+
+    length_value=value_unit_spacy(text_data)[2]
+    match_distribution = re.findall(r'((?:\w+\s+){0,5}\bnormal\b\s*(?:\S+\s+){1})',str(text_data))
+
+    for dist in range(0,len(match_distribution)):
+        if match_distribution[dist] == 'did not originate from a normal distribution.  ':
+            match_distribution[dist]='assumes a non- normal distribution'
+
+    doc_distribution=nlp(str(match_distribution))
+
+    for ent in doc_distribution.ents:
+        distribution.append(ent.text)
+
+    if len(distribution)==0:
+        distribution.append('normal(if null)')
+
+    if length_value>1 and len(distribution)==1:
+        distribution.extend([0] * (length_value-1))
+        for d in range(0,len(distribution)-1):
+            distribution[d+1]=distribution[d]
+
+    distribution=pd.DataFrame(distribution,columns=['dist'])    
+
+    list1=['Assuming normal distribution ','normal distributions','assumes a normal distribution','assumes a normal','assumes a non- normal','assumes a non- normal distribution','assumed to be normal','Assuming a normal distribution']
+    list2=['assumed normal','normal distribution','assumed normal','assumed normal','unknown','unknown','non','assumed normal']
+    distribution.replace(list1,list2,inplace=True)
+    distribution=[x for x in distribution['dist'] if str(x) != 'non']
+    distribution=pd.Series(distribution)
+
+    value=value_unit_spacy(text_data)[0]
+    value_list=pd.Series(value)
+    frames=[distribution,value_list]
+    distribution_df=pd.concat(frames,axis=1)
+    distribution_df.columns=['distribution','value']
+
+    if len(distribution)>=len(value_list):
+        count=len(distribution)
+    elif len(value_list)>len(distribution):
+        count=len(value_list)
+
+    for i in range(0,count):        
+        if len(distribution)>=len(value_list) and i<(len(distribution)-1):
+            if distribution_df["distribution"].iloc[i-1]=='assumed normal' and distribution_df['distribution'].iloc[i]=='normal distribution':
+                distribution_df['distribution'].iloc[i-1]='normal distribution'    
+            if distribution_df["distribution"][0]=='assumed normal' and distribution_df['distribution'][1]=='normal distribution':
+                distribution_df['distribution'][0]='normal distribution'
+
+        if len(value_list)>len(distribution):
+            distribution_df.replace(np.nan,"non",inplace=True)
+            for k in range(0,len(distribution_df)):
+                if distribution_df['distribution'][k]=="non":
+                    distribution_df['distribution'].iloc[k]=distribution_df['distribution'].iloc[k-1]
+
+    distribution=distribution_df['distribution']
+
+    return distribution
+
+
+def condition_spacy(text_data):
+    '''To extract the condition of the component(s) 
+    Parameters:
+    text_data(str): The extracted data under precision
+
+    Returns:
+    condition: List of condition(s) for the component(s)'''
+
+    con = []
+    condition = []
+    nlp = spacy.load("./text_final_1")
+    doc_con=nlp(text_data)
+    for ent in doc_con.ents:
+        if ent.label_=='condition':
+            con.append(ent.text)
+#     print('condition \n',con,'\n\nlength of condition\n',len(con),'\n\nlength of value:\n',len(value))
+    if len(con)==4 and con[0]=='Repeatability':
+        con[0]=con[0]+" "+(con[1])
+        con[2]=con[2]+" "+con[3]
+        del con[1]
+        del con[2]
+
+    len_of_value=value_unit_spacy(text_data)[2]
+    if len_of_value>len(con):
+        con.extend([0] * (len_of_value-1))
+        for x in range(0,len(con)-1):
+            con[x+1]=con[x]
+
+    if con==[]:
+        con.append("No Condition Given")
+    temp_unit=re.search(r'wt\.(.+?)(\.|\%)',str(text_data))
+    if temp_unit != None: 
+        temp_con=re.search(r'\s*an\s*average(.+?)\.\s*\%(.+?)\.',str(text_data))
+        if temp_con != None:
+            temp_con=temp_con.group(0)
+            con=temp_con
+    condition=pd.Series(con)
+
+    return condition
+
+
+def precision_dataframe_spacy(text_data,test_pdf):
+    '''To get a dataframe returning precision value, unit, precision_type, distribution
+    Parameters:
+    text_data(str): The extracted data under precision
+
+    Returns:
+    data: A dataftrame with columns of value,unit,precision_type,distribution
+    value: List of precision value(s)
+    unit: List of unit(s) of precision value(s)
+    precision_type: List of precision types for the precision value(s)
+    distribution: List of distribution(s) for the component(s) or matrix'''
+    dowid=[]    
+    col=col=['Dow_id','precision','unit','distribution','precision_type']
+    data=pd.DataFrame(columns=col)
+
+    value=value_unit_spacy(text_data)[0]
+    unit=value_unit_spacy(text_data)[1]
+    prec_type=precision_type_spacy(text_data)
+    dis=distribution_spacy(text_data)
+    len_of_val=value_unit_spacy(text_data)[2]
+    id1=re.sub(r'\/home/cdsw/data/MethodsForSoothsayer_181105/','',test_pdf)
+    condition = condition_spacy(text_data)
+
+    data_frame={'precision': pd.Series(value),'unit': pd.Series(unit), 'precision_type': pd.Series(prec_type),'distribution':pd.Series(dis),'condition':condition}
+    data_frame =pd.DataFrame(data_frame)
+    dataframe_final=data_frame.dropna()
+    frames=[data,dataframe_final]
+    data=pd.concat(frames,axis=0)
+    data.index=range(0,len(data))
+    for i in range(0,len(data)):
+        dowid.append(id1)
+    data['Dow_id']=dowid
+
+    return data
@@ -0,0 +1,6 @@
+import os
+import sys
+
+
+# the pipeline is the information_retrieval.py module at the root of the repo, not an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
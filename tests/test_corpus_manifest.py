@@ -0,0 +1,92 @@
+import os
+
+import pandas as pd
+import pytest
+
+import information_retrieval as ir
+
+
+processed = []
+
+
+def _stub_task(test_pdf):
+    processed.append(os.path.basename(test_pdf))
+    with open(test_pdf) as pdf_file:
+        text = pdf_file.read()
+    if "broken" in text:
+        raise ValueError("can not read " + test_pdf)
+    return pd.DataFrame({'Dow_id': [os.path.basename(test_pdf)], 'text': [text]})
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    del processed[:]
+    for name in ["a", "b", "c"]:
+        (tmp_path / (name + ".pdf")).write_text("text of " + name)
+    return tmp_path
+
+
+def _pdfs(corpus, names="abc"):
+    return [str(corpus / (name + ".pdf")) for name in names]
+
+
+def _update(manifest, test_pdfs, version="v1"):
+    del processed[:]
+    results = list(ir.update_manifest(manifest, test_pdfs, rows=lambda result: result, task=_stub_task,
+                                      version=version, processes=1, model_names=[]))
+    return sorted(processed), [os.path.basename(test_pdf) for test_pdf, frame, error in results if error is not None]
+
+
+def _texts(manifest, test_pdfs):
+    return [frame['text'][0] for frame in manifest.frames(test_pdfs, _stub_task)]
+
+
+def test_unchanged_pdfs_are_skipped(corpus, tmp_path):
+    manifest = ir.CorpusManifest(str(tmp_path / "manifest.sqlite"))
+
+    assert _update(manifest, _pdfs(corpus)) == (["a.pdf", "b.pdf", "c.pdf"], [])
+    assert _update(manifest, _pdfs(corpus)) == ([], [])
+
+    # a new modification time with the same content is only recorded
+    os.utime(_pdfs(corpus)[0], (1, 1))
+    assert _update(manifest, _pdfs(corpus)) == ([], [])
+    assert manifest.entries("_stub_task")[_pdfs(corpus)[0]][1] == 1000000000
+    assert _texts(manifest, _pdfs(corpus)) == ["text of a", "text of b", "text of c"]
+
+
+def test_changed_pdfs_and_versions_are_processed_again(corpus, tmp_path):
+    manifest = ir.CorpusManifest(str(tmp_path / "manifest.sqlite"))
+    _update(manifest, _pdfs(corpus))
+
+    (corpus / "b.pdf").write_text("new text of b")
+    assert _update(manifest, _pdfs(corpus)) == (["b.pdf"], [])
+    assert _texts(manifest, _pdfs(corpus)) == ["text of a", "new text of b", "text of c"]
+
+    # the sections task puts its headers in the version, so changing them processes every pdf again
+    assert _update(manifest, _pdfs(corpus), version="v1/Precision,Scope") == (["a.pdf", "b.pdf", "c.pdf"], [])
+
+
+def test_deleted_pdfs_are_dropped(corpus, tmp_path):
+    manifest = ir.CorpusManifest(str(tmp_path / "manifest.sqlite"))
+    _update(manifest, _pdfs(corpus))
+
+    os.remove(_pdfs(corpus)[1])
+    assert _update(manifest, _pdfs(corpus, "ac")) == ([], [])
+
+    assert sorted(manifest.entries("_stub_task")) == _pdfs(corpus, "ac")
+    assert _texts(manifest, _pdfs(corpus)) == ["text of a", "text of c"]
+
+
+def test_failed_changed_pdf_is_dropped_and_retried(corpus, tmp_path):
+    manifest = ir.CorpusManifest(str(tmp_path / "manifest.sqlite"))
+    _update(manifest, _pdfs(corpus))
+
+    (corpus / "b.pdf").write_text("broken b")
+    assert _update(manifest, _pdfs(corpus)) == (["b.pdf"], ["b.pdf"])
+    # the rows of the earlier b.pdf are not published for the new one
+    assert _texts(manifest, _pdfs(corpus)) == ["text of a", "text of c"]
+    assert _update(manifest, _pdfs(corpus)) == (["b.pdf"], ["b.pdf"])
+
+    (corpus / "b.pdf").write_text("fixed b")
+    assert _update(manifest, _pdfs(corpus)) == (["b.pdf"], [])
+    assert _texts(manifest, _pdfs(corpus)) == ["text of a", "fixed b", "text of c"]
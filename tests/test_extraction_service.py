@@ -0,0 +1,169 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import information_retrieval as ir
+
+
+def _result(task, test_pdf):
+    frame = pd.DataFrame({'Dow_id': [test_pdf], 'precision': ['0.05']})
+    if task == 'precision':
+        return "This is table data", None, frame
+    return frame
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    '''Replaces the extraction of a batch (spaCy and tabula) by canned results, recording each batch.'''
+
+    calls = []
+
+    def service_batch(task, test_pdfs):
+        calls.append((task, list(test_pdfs)))
+        return [_result(task, test_pdf) for test_pdf in test_pdfs]
+
+    monkeypatch.setattr(ir, '_service_batch', service_batch)
+    return calls
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return str(tmp_path / "service.sock")
+
+
+def _serve(socket_path, client, **options):
+    async def run():
+        service = await ir.ExtractionService(model_names=[], **options).start(path=socket_path)
+        try:
+            return await client(service)
+        finally:
+            await service.close()
+    return asyncio.run(run())
+
+
+async def _raw_request(socket_path, request):
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    writer.write(request)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return response
+
+
+def test_precision_rows(batches, socket_path):
+    status, response = _serve(socket_path, lambda service: ir.service_request('precision', "/data/a.pdf",
+                                                                              path=socket_path))
+
+    assert status == 200
+    assert response['Dow_id'] == "a.pdf"
+    assert response['error'] is None
+    assert response['rows'] == [{'Dow_id': "/data/a.pdf", 'precision': "0.05", 'average': " "}]
+    assert batches == [('precision', ["/data/a.pdf"])]
+
+
+def test_concurrent_requests_share_a_batch(batches, socket_path):
+    async def client(service):
+        return await asyncio.gather(*[ir.service_request('tables', "/data/%d.pdf" % pdf, path=socket_path)
+                                      for pdf in range(0, 3)])
+
+    responses = _serve(socket_path, client, batch_size=8, batch_wait=0.5)
+
+    assert [status for status, response in responses] == [200, 200, 200]
+    assert len(batches) == 1
+    assert sorted(batches[0][1]) == ["/data/0.pdf", "/data/1.pdf", "/data/2.pdf"]
+
+
+def test_full_queue_is_refused(monkeypatch, socket_path):
+    started, release = threading.Event(), threading.Event()
+
+    def service_batch(task, test_pdfs):
+        started.set()
+        release.wait(10)
+        return [_result(task, test_pdf) for test_pdf in test_pdfs]
+
+    monkeypatch.setattr(ir, '_service_batch', service_batch)
+
+    async def client(service):
+        running = asyncio.ensure_future(ir.service_request('tables', "/data/running.pdf", path=socket_path))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 10)
+        queued = asyncio.ensure_future(ir.service_request('tables', "/data/queued.pdf", path=socket_path))
+        deadline = time.monotonic() + 10
+        while service.stats()['queued'] < 1 and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        refused = await ir.service_request('tables', "/data/refused.pdf", path=socket_path)
+        release.set()
+        return await running, await queued, refused, service.stats()
+
+    running, queued, refused, stats = _serve(socket_path, client, queue_size=1, batch_size=1, batch_wait=0)
+
+    assert running[0] == 200 and queued[0] == 200
+    assert refused[0] == 503
+    assert stats['rejected'] == 1
+    assert stats['processed'] == 2
+
+
+def test_upload(monkeypatch, tmp_path, socket_path):
+    test_pdf = tmp_path / "101500-TE94A.pdf"
+    test_pdf.write_bytes(b"%PDF-1.4 uploaded")
+    uploads = []
+
+    def service_batch(task, test_pdfs):
+        uploads.extend((path, open(path, 'rb').read()) for path in test_pdfs)
+        return [_result(task, path) for path in test_pdfs]
+
+    monkeypatch.setattr(ir, '_service_batch', service_batch)
+
+    status, response = _serve(socket_path, lambda service: ir.service_request('precision', str(test_pdf),
+                                                                              path=socket_path, upload=True))
+
+    assert status == 200
+    assert response['rows'][0]['Dow_id'] == "101500-TE94A.pdf"
+    (path, content), = uploads
+    assert os.path.basename(path) == "101500-TE94A.pdf" and content == b"%PDF-1.4 uploaded"
+    assert not os.path.exists(os.path.dirname(path))
+
+
+def test_stats(batches, socket_path):
+    async def client(service):
+        await ir.service_request('tables', "/data/a.pdf", path=socket_path)
+        return await ir.service_request('stats', None, path=socket_path)
+
+    status, stats = _serve(socket_path, client)
+
+    assert status == 200
+    assert stats['received'] == 1 and stats['processed'] == 1 and stats['batches'] == 1
+    assert stats['queued'] == 0 and stats['queue_size'] == 32
+
+
+def test_failed_document(monkeypatch, socket_path):
+    monkeypatch.setattr(ir, '_service_batch', lambda task, test_pdfs: [IOError("no such pdf")] * len(test_pdfs))
+
+    status, response = _serve(socket_path, lambda service: ir.service_request('precision', "/data/a.pdf",
+                                                                              path=socket_path))
+
+    assert status == 500
+    assert response['error'] == "OSError: no such pdf"
+    assert response['rows'] == []
+
+
+@pytest.mark.parametrize('body', [b"[1]", b'{"pdf": 5}', b"{}", b"not json", b"\xff"])
+def test_bad_request_body(batches, socket_path, body):
+    request = (b"POST /precision HTTP/1.1\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n"
+               % len(body)) + body
+
+    response = _serve(socket_path, lambda service: _raw_request(socket_path, request))
+
+    assert response.startswith(b"HTTP/1.1 400 ")
+    assert 'error' in json.loads(response.split(b"\r\n\r\n", 1)[1])
+    assert batches == []
+
+
+def test_unknown_request(batches, socket_path):
+    response = _serve(socket_path, lambda service: _raw_request(socket_path, b"GET /precision HTTP/1.1\r\n\r\n"))
+
+    assert response.startswith(b"HTTP/1.1 404 ")
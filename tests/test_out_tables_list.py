@@ -0,0 +1,45 @@
+import random
+
+import roman
+
+import baseline
+import information_retrieval as ir
+
+
+WORDS = ["Table", "Tables", "table", "see", "and", "in", "the", "results", "Appendix", "(Table", "Table,"]
+# the original fails on table 49 (it looks up table 50), so the random texts stay below it
+NUMERALS = [roman.toRoman(number) for number in range(1, 49)] + [str(number) for number in range(1, 49)]
+
+
+def _text(generator):
+    words = []
+    for word in range(0, generator.randint(0, 25)):
+        word = generator.choice(WORDS) if generator.random() < 0.6 else generator.choice(NUMERALS)
+        words.append(word + generator.choice(["", "", "", ",", ".", ")", "]", "'"]))
+    return " ".join(words)
+
+
+def _without_wrap_artifacts(tables):
+    # the original's str() of numpy arrays wraps long lines, which leaves '' entries in its lists
+    return [[name for name in names if name != ''] for names in tables]
+
+
+def test_matches_baseline():
+    generator = random.Random(16)
+    for case in range(0, 3000):
+        text_between = _text(generator)
+
+        expected = baseline.out_tables_list(text_between)
+        found = ir.out_tables_list(text_between)
+
+        if expected == (['', ' '], ['', ' ']):
+            # out_tables() checks for exactly this "no table referenced" result
+            assert found == expected, text_between
+        assert _without_wrap_artifacts(found) == _without_wrap_artifacts(expected), text_between
+
+
+def test_table_49():
+    table_start_list, table_end_list = ir.out_tables_list("shown in Table 49 and Table XLIX")
+
+    assert "Table 49" in table_start_list and "Table XLIX" in table_start_list
+    assert "Table 50" in table_end_list and "Table L" in table_end_list
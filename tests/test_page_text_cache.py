@@ -0,0 +1,98 @@
+import itertools
+import os
+
+import pytest
+
+import information_retrieval as ir
+
+
+class _FakeDocument(ir.TextDocument):
+
+    def __init__(self, texts):
+        ir.TextDocument.__init__(self, len(texts))
+        self.texts = texts
+
+    def _text(self, page):
+        return self.texts[page]
+
+
+class _FakeBackend(ir.TextBackend):
+
+    '''Reads "pdfs" whose pages are separated by "|", counting the documents it opens.'''
+
+    name, version = 'fake', 'fake/1'
+
+    def __init__(self):
+        self.opened = []
+
+    def open(self, file_path):
+        self.opened.append(file_path)
+        with open(file_path) as pdf_file:
+            return _FakeDocument(pdf_file.read().split("|"))
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = _FakeBackend()
+    monkeypatch.setattr(ir, '_text_backend', backend)
+    return backend
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    cache = ir.PageTextCache(str(tmp_path / "pages.sqlite"))
+    monkeypatch.setattr(ir, '_page_text_cache', cache)
+    return cache
+
+
+def test_hit(backend, cache, tmp_path):
+    test_pdf = tmp_path / "a.pdf"
+    test_pdf.write_text("first page|second page")
+
+    assert ir.extract_page_texts(str(test_pdf))[0] == ["first page", "second page"]
+    assert ir.extract_page_texts(str(test_pdf)) == (["first page", "second page"], None)
+    # the key is the content, so a copy of the pdf is a hit too
+    (tmp_path / "copy.pdf").write_text("first page|second page")
+    assert ir.extract_page_texts(str(tmp_path / "copy.pdf"))[0] == ["first page", "second page"]
+
+    assert backend.opened == [str(test_pdf)]
+
+
+def test_miss_after_the_file_changes(backend, cache, tmp_path):
+    test_pdf = tmp_path / "a.pdf"
+    test_pdf.write_text("first page|second page")
+    ir.extract_page_texts(str(test_pdf))
+    stat = os.stat(str(test_pdf))
+
+    # same size and modification time, only the content tells the change
+    test_pdf.write_text("FIRST page|second page")
+    os.utime(str(test_pdf), ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert ir.extract_page_texts(str(test_pdf))[0] == ["FIRST page", "second page"]
+    assert len(backend.opened) == 2
+
+
+def test_text_backends_are_not_mixed(backend, cache):
+    cache.put("hash", ["fake text"])
+    cache.put("hash", ["other text"], extractor="other/1")
+
+    assert cache.get("hash") == ["fake text"]
+    assert cache.get("hash", extractor="other/1") == ["other text"]
+    assert cache.get("other hash") is None
+
+
+def test_least_recently_used_are_evicted(backend, cache, monkeypatch):
+    clock = itertools.count()
+    monkeypatch.setattr(ir.time, 'time', lambda: next(clock))
+    cache.put("a", ["page a"])
+    cache.max_bytes = 3 * cache.size()
+    cache.put("b", ["page b"])
+    cache.put("c", ["page c"])
+
+    cache.get("a")
+    cache.put("d", ["page d"])
+    assert [cache.get(key) is not None for key in "abcd"] == [True, False, True, True]
+
+    cache.put("e", ["page e"])
+    assert [cache.get(key) is not None for key in "acde"] == [False, True, True, True]
+    assert cache.size() <= cache.max_bytes
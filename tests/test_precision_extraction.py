@@ -0,0 +1,80 @@
+import random
+import re
+import types
+
+import pytest
+
+import baseline
+import information_retrieval as ir
+
+
+class _Entity(object):
+    def __init__(self, text, label):
+        self.text, self.label_ = text, label
+
+
+class _Doc(object):
+    def __init__(self, text, ents):
+        self.text, self.ents = text, ents
+
+
+class _FakeModel(object):
+
+    '''Deterministic stand-in for a trained spaCy model: the entities are the matches of (label, regex) rules.'''
+
+    def __init__(self, rules):
+        self.rules = [(label, re.compile(pattern)) for label, pattern in rules]
+
+    def __call__(self, text):
+        ents = [(found.start(), _Entity(found.group(0), label)) for label, pattern in self.rules
+                for found in pattern.finditer(text)]
+        return _Doc(text, [entity for position, entity in sorted(ents, key=lambda ent: ent[0])])
+
+    def pipe(self, texts, batch_size=64, n_process=1):
+        return [self(text) for text in texts]
+
+
+MODELS = {ir.TEXT_MODEL: _FakeModel([('value_unit', r"\d+\.\d+ ?(?:wt\. ?%|%|ppm|mg/kg|g/100g)"),
+                                     ('condition', r"Repeatability|Reproducibility|within-laboratory")]),
+          ir.DISTRIBUTION_MODEL: _FakeModel([('dist', r"Assuming normal distribution |normal distributions|"
+                                                      r"assumes a normal distribution|assumes a non- normal|"
+                                                      r"assumed to be normal|Assuming a normal distribution")])}
+
+SENTENCES = ["The relative standard deviation is 0.05 wt. %.", "The pooled standard deviation was 1.2 ppm.",
+             "The absolute standard deviation is 0.31 mg/kg.", "The arelative standard deviation is 4.5 %.",
+             "A relative absolute standard value of 2.0 wt.%.", "See ASTM standard E691.", "The standard is 0.20 g/100g.",
+             "Repeatability", "Reproducibility", "within-laboratory precision.", "The results assume a normal distribution.",
+             "Assuming normal distribution  of the data.", "The values assumes a normal distribution here.",
+             "The data did not originate from a normal distribution.  ", "assumed to be normal in all cases.",
+             "at an average of 2.5 wt. % of ethylene.", "The method uses wt/wt units.", "Results in Table 1."]
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    monkeypatch.setattr(baseline, 'spacy', types.SimpleNamespace(load=MODELS.__getitem__))
+    monkeypatch.setattr(ir, 'get_spacy_model', MODELS.__getitem__)
+
+
+def _outcome(extract):
+    try:
+        return extract()
+    except Exception as error:
+        return type(error)
+
+
+def test_matches_baseline(fake_models):
+    generator = random.Random(2)
+    for case in range(0, 300):
+        text = " ".join(generator.choice(SENTENCES) for sentence in range(0, generator.randint(0, 6)))
+
+        expected = _outcome(lambda: baseline.precision_dataframe_spacy(text, "/home/cdsw/data/MethodsForSoothsayer_181105/a.pdf"))
+        found = _outcome(lambda: ir.precision_dataframe_spacy(text, "/home/cdsw/data/MethodsForSoothsayer_181105/a.pdf"))
+        piped = _outcome(lambda: ir.precision_dataframe_spacy(
+            text, "/home/cdsw/data/MethodsForSoothsayer_181105/a.pdf",
+            ir.pipe_extraction_contexts([ir.extraction_context(text)])[0]))
+
+        if isinstance(expected, type):
+            assert found is expected and piped is expected, text
+            continue
+        assert found.equals(expected), text
+        assert piped.equals(expected), text
@@ -0,0 +1,24 @@
+import pytest
+
+import information_retrieval as ir
+
+
+def _settings_task(test_pdf):
+    return (ir._page_text_cache is not None, ir._table_cache is not None, ir._stream_pages, ir._text_backend.name)
+
+
+@pytest.mark.parametrize('stop_early', [False, True])
+def test_run_in_this_process_puts_the_settings_back(tmp_path, stop_early):
+    test_pdfs = [str(tmp_path / name) for name in ["a.pdf", "b.pdf"]]
+    settings = ir._process_settings()
+    results = ir.run_corpus(test_pdfs, task=_settings_task, processes=1, model_names=[],
+                            page_cache=str(tmp_path / "pages.sqlite"), table_cache=True, stream_pages=True,
+                            text_backend='pdfminer')
+
+    for test_pdf, result, error in results:
+        assert result == (True, True, True, 'pdfminer')
+        if stop_early:
+            results.close()
+            break
+
+    assert all(found is expected for found, expected in zip(ir._process_settings(), settings))
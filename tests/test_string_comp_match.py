@@ -0,0 +1,67 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import baseline
+import information_retrieval as ir
+
+
+CELLS = ["0.05", "12", "2.5 wt. %", "Ethylene", "n-hexane", "Sample TM", "line\rbreak", "“quoted”",
+         "5 – 10", "RSD (%)", "Precision", "nan", "", " ", "0,37", "Table II"]
+WORDS = ["The", "precision", "of", "the", "method", "is", "given", "in", "Table", "1", "wt.", "%", "TM", "\n  "]
+
+
+def _cell(generator, numeric):
+    if generator.random() < 0.2:
+        return np.nan
+    if numeric:
+        return generator.choice([0.05, 12, 2.5, -1, 1e-05, 1234567.0])
+    return generator.choice(CELLS)
+
+
+def _table(generator):
+    rows, columns = generator.randint(0, 8), generator.randint(1, 5)
+    # tabula gives text and NaN cells, numeric tables take the row by row fallback
+    numeric = generator.random() < 0.15
+    data = [[_cell(generator, numeric) for column in range(0, columns)] for row in range(0, rows)]
+    for row in range(0, rows):
+        if generator.random() < 0.1:
+            data[row] = [np.nan] * columns
+    return pd.DataFrame(data, columns=range(0, columns))
+
+
+def _text(generator, tables):
+    words = [generator.choice(WORDS) for word in range(0, generator.randint(0, 30))]
+    for table in tables:
+        if len(table) > 2 and generator.random() < 0.5:
+            row = table.iloc[generator.randint(2, len(table) - 1)]
+            words.append(" ".join(str(cell) for cell in row if str(cell) != 'nan'))
+    generator.shuffle(words)
+    return " ".join(words)
+
+
+@pytest.mark.parametrize('aho_corasick', [True, False])
+def test_matches_baseline(monkeypatch, aho_corasick):
+    if not aho_corasick:
+        monkeypatch.setattr(ir, 'ahocorasick', None)
+    elif ir.ahocorasick is None:
+        pytest.skip("pyahocorasick is not installed")
+    generator = random.Random(14)
+    for case in range(0, 400):
+        tables = [_table(generator) for table in range(0, generator.randint(0, 4))]
+        text_between = _text(generator, tables)
+
+        expected = baseline.string_comp_match(text_between, [table.copy() for table in tables])
+        found = ir.string_comp_match(text_between, [table.copy() for table in tables])
+
+        assert len(found) == len(expected), (case, text_between)
+        for found_table, expected_table in zip(found, expected):
+            assert found_table.equals(expected_table), (case, text_between)
+
+
+def test_empty_text_matches_every_table_with_empty_rows():
+    table = pd.DataFrame([["a", "b"], ["c", "d"], [" ", "-"]])
+
+    assert len(baseline.string_comp_match("", [table])) == len(ir.string_comp_match("", [table])) == 1
@@ -0,0 +1,119 @@
+import pandas as pd
+import pytest
+
+import information_retrieval as ir
+
+
+class _FakeTabula(object):
+
+    '''read_pdf() giving one table per even page and none on odd pages, in dataframe and json output.'''
+
+    def __init__(self, page_numbers=True):
+        self.page_numbers = page_numbers
+        self.calls = []
+
+    def read_pdf(self, file, pages=None, output_format="dataframe", lattice=False, **kwargs):
+        self.calls.append((output_format, str(pages), lattice))
+        tables = [(page, pd.DataFrame({'page': [page, page], 'lattice': [lattice, lattice]}))
+                  for page in ir.page_numbers(pages) if page % 2 == 0]
+        if output_format == "json":
+            return [dict({'table': table}, **({'page_number': page} if self.page_numbers else {}))
+                    for page, table in tables]
+        return [table for page, table in tables]
+
+
+def _json_to_dataframes(tables):
+    return [table['table'].copy() for table in tables]
+
+
+@pytest.fixture
+def tabula(monkeypatch):
+    tabula = _FakeTabula()
+    monkeypatch.setattr(ir, 'read_pdf', tabula.read_pdf)
+    monkeypatch.setattr(ir, '_tabula_json_converter', lambda: _json_to_dataframes)
+    return tabula
+
+
+@pytest.fixture
+def test_pdf(tmp_path):
+    test_pdf = tmp_path / "doc.pdf"
+    test_pdf.write_bytes(b"%PDF-1.4 doc")
+    return str(test_pdf)
+
+
+def _assert_same_tables(found, expected):
+    assert len(found) == len(expected)
+    for found_table, expected_table in zip(found, expected):
+        assert found_table.equals(expected_table)
+
+
+def test_cached_tables_match_tabula(tabula, test_pdf):
+    cache = ir.TableCache()
+    for pages in ["1-4", "2", "3", "1-4", "2-6", "6"]:
+        for lattice in [True, False]:
+            expected = tabula.read_pdf(test_pdf, pages=pages, lattice=lattice, **ir.TABULA_OPTIONS)
+            _assert_same_tables(cache.read_pdf(test_pdf, pages=pages, lattice=lattice, **ir.TABULA_OPTIONS), expected)
+
+
+def test_only_missing_pages_are_read(tabula, test_pdf):
+    cache = ir.TableCache()
+
+    cache.read_pdf(test_pdf, pages="1-3", lattice=True, **ir.TABULA_OPTIONS)
+    cache.read_pdf(test_pdf, pages="2-5", lattice=True, **ir.TABULA_OPTIONS)
+    cache.read_pdf(test_pdf, pages="1-5", lattice=True, **ir.TABULA_OPTIONS)
+    cache.read_pdf(test_pdf, pages="2-3", lattice=False, **ir.TABULA_OPTIONS)
+
+    # one json call per range, for the pages no earlier call had, and the options are part of the key
+    assert tabula.calls == [("json", "1,2,3", True), ("json", "4,5", True), ("json", "2,3", False)]
+    assert cache.requests == 4 and cache.tabula_calls == 3
+
+
+def test_prefetch_splits_one_call_by_page(tabula, test_pdf):
+    cache = ir.TableCache()
+
+    empty_pages = cache.prefetch(test_pdf, [5, 1, 2, 3, 2], lattice=True, **ir.TABULA_OPTIONS)
+    tables = cache.read_pdf(test_pdf, pages="2-3", lattice=True, **ir.TABULA_OPTIONS)
+
+    assert empty_pages == [1, 3, 5]
+    assert tabula.calls == [("json", "1,2,3,5", True)]
+    assert [table['page'][0] for table in tables] == [2]
+
+
+def test_tables_are_copied(tabula, test_pdf):
+    cache = ir.TableCache()
+
+    cache.read_pdf(test_pdf, pages="2", lattice=True, **ir.TABULA_OPTIONS)[0]['page'] = -1
+
+    assert cache.read_pdf(test_pdf, pages="2", lattice=True, **ir.TABULA_OPTIONS)[0]['page'][0] == 2
+
+
+def test_changed_file_is_read_again(tabula, test_pdf):
+    cache = ir.TableCache()
+    cache.read_pdf(test_pdf, pages="2", lattice=True, **ir.TABULA_OPTIONS)
+
+    with open(test_pdf, 'ab') as changed:
+        changed.write(b" changed")
+    cache.read_pdf(test_pdf, pages="2", lattice=True, **ir.TABULA_OPTIONS)
+
+    assert len(tabula.calls) == 2
+
+
+def test_disk_cache_is_shared_across_caches(tabula, test_pdf, tmp_path):
+    directory = str(tmp_path / "tables")
+    expected = ir.TableCache(directory).read_pdf(test_pdf, pages="1-4", lattice=True, **ir.TABULA_OPTIONS)
+
+    found = ir.TableCache(directory).read_pdf(test_pdf, pages="1-4", lattice=True, **ir.TABULA_OPTIONS)
+
+    assert len(tabula.calls) == 1
+    _assert_same_tables(found, expected)
+
+
+def test_range_is_read_as_asked_without_page_numbers(tabula, test_pdf):
+    tabula.page_numbers = False
+    cache = ir.TableCache()
+
+    found = cache.read_pdf(test_pdf, pages="1-4", lattice=True, **ir.TABULA_OPTIONS)
+
+    assert tabula.calls == [("json", "1,2,3,4", True), ("dataframe", "1-4", True)]
+    assert cache.json_page_numbers is False and cache.prefetch(test_pdf, [1], lattice=True) is None
+    _assert_same_tables(found, tabula.read_pdf(test_pdf, pages="1-4", lattice=True, **ir.TABULA_OPTIONS))
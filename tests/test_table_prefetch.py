@@ -0,0 +1,106 @@
+import random
+
+import pandas as pd
+import pytest
+
+import information_retrieval as ir
+
+
+WORDS = ["Precision", "5. Precision", "6. Calculation", "Table 1", "Table 2", "Table II", "Tables 1 and 2", "table",
+         "Appendix", "THE INFORMATION HEREIN", "Page 1 of 9", "doc", "alpha", "beta", "gamma", "the", "method", "is"]
+
+
+class _FakeTabula(object):
+
+    '''read_pdf() whose tables depend only on the page and the mode, in dataframe and json output.'''
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.calls = []
+
+    def tables(self, page, lattice):
+        generator = random.Random("%s-%s-%s" % (self.seed, page, lattice))
+        return [pd.DataFrame([["Header", "x"], ["Unit", "y"], [generator.choice(["alpha", "beta", "delta"]), str(page)]])
+                for table in range(0, generator.choice([0, 0, 1, 2]))]
+
+    def read_pdf(self, file, pages=None, output_format="dataframe", lattice=False, **kwargs):
+        self.calls.append((pages, lattice))
+        tables = [(page, table) for page in ir.page_numbers(pages) for table in self.tables(page, lattice)]
+        if output_format == "json":
+            return [{'page_number': page, 'table': table} for page, table in tables]
+        return [table for page, table in tables]
+
+
+def _json_to_dataframes(tables):
+    return [table['table'].copy() for table in tables]
+
+
+def _document(generator):
+    return [" ".join(generator.choice(WORDS) for word in range(0, generator.randint(0, 10)))
+            for page in range(0, generator.randint(1, 9))]
+
+
+def _section(test_pdf, preprocessed_text, planned, references=True):
+    start, end = ir._header_start_end(preprocessed_text, "Precision")
+    index = ir.section_index(preprocessed_text, ["Precision"])
+    text_between = ir.text_data(preprocessed_text, start, end, index)
+    if planned:
+        ir.prefetch_section_tables(test_pdf, preprocessed_text, text_between, "doc", start, index, references)
+    tabledata = ir.table_data(test_pdf, preprocessed_text, text_between, "doc", start, "Precision", index)
+    out_tabledata = []
+    if references:
+        table_start_list, table_end_list = ir.out_tables_list(text_between)
+        out_tabledata = ir.out_tables(test_pdf, text_between, preprocessed_text, "Precision", None,
+                                      ir.page_count(preprocessed_text), table_start_list, table_end_list, index)
+    return [table for tables in tabledata or [] for table in tables] + out_tabledata
+
+
+def _predicted_mode(file, pages):
+    modes = [random.Random("mode-%s" % page).choice(['lattice', 'stream', None]) for page in ir.page_numbers(pages)]
+    return 'lattice' if 'lattice' in modes else 'stream' if 'stream' in modes else None
+
+
+@pytest.mark.parametrize('prediction', [False, True])
+@pytest.mark.parametrize('references', [True, False])
+def test_prefetch_never_adds_tabula_calls(monkeypatch, tmp_path, prediction, references):
+    test_pdf = str(tmp_path / "doc.pdf")
+    open(test_pdf, 'wb').close()
+    monkeypatch.setattr(ir, '_tabula_json_converter', lambda: _json_to_dataframes)
+    monkeypatch.setattr(ir, '_predict_table_modes', prediction)
+    monkeypatch.setattr(ir, 'predict_pages_mode', _predicted_mode)
+    generator = random.Random(12)
+    prefetched = 0
+    for case in range(0, 150):
+        preprocessed_text = _document(generator)
+
+        monkeypatch.setattr(ir, '_table_cache', None)
+        unplanned = _FakeTabula(case)
+        monkeypatch.setattr(ir, 'read_pdf', unplanned.read_pdf)
+        expected = _section(test_pdf, preprocessed_text, False, references)
+
+        monkeypatch.setattr(ir, '_table_cache', ir.TableCache())
+        planned = _FakeTabula(case)
+        monkeypatch.setattr(ir, 'read_pdf', planned.read_pdf)
+        found = _section(test_pdf, preprocessed_text, True, references)
+
+        assert len(planned.calls) <= len(unplanned.calls), (preprocessed_text, planned.calls, unplanned.calls)
+        assert len(found) == len(expected), preprocessed_text
+        for found_table, expected_table in zip(found, expected):
+            assert found_table.equals(expected_table), preprocessed_text
+        prefetched += len(planned.calls) < len(unplanned.calls)
+    # the prefetch saves calls in a good share of the cases, so the comparison is not only about empty sections
+    assert prefetched > 10
+
+
+def test_section_without_table_references(monkeypatch, tmp_path):
+    test_pdf = str(tmp_path / "doc.pdf")
+    open(test_pdf, 'wb').close()
+    monkeypatch.setattr(ir, '_tabula_json_converter', lambda: _json_to_dataframes)
+    tabula = _FakeTabula(0)
+    monkeypatch.setattr(ir, 'read_pdf', tabula.read_pdf)
+    monkeypatch.setattr(ir, '_table_cache', ir.TableCache())
+    preprocessed_text = ["5. Precision alpha 6. Calculation THE INFORMATION HEREIN"] + ["THE INFORMATION HEREIN"] * 39
+
+    _section(test_pdf, preprocessed_text, True)
+
+    assert [pages for pages, lattice in tabula.calls if lattice] == ["1"]
@@ -0,0 +1,113 @@
+import textwrap
+
+import pandas as pd
+import PyPDF2
+import pytest
+
+import information_retrieval as ir
+
+
+FAKE_TABULA_IO = '''
+import os
+import time
+
+
+class TabulaVm(object):
+    pass
+
+
+def read_pdf(input_path, output_format=None, encoding="utf-8", multiple_tables=True, pages=None, lattice=False):
+    if "hang" in input_path:
+        time.sleep(600)
+    # the first read of a "crash" pdf kills the helper, as a JVM crash would
+    if "crash" in input_path and not os.path.exists(input_path + ".crashed"):
+        open(input_path + ".crashed", "w").close()
+        os._exit(1)
+    # pandas is imported here so that the helper restarts quickly after the short timeout of the hang test
+    import pandas as pd
+    return [pd.DataFrame({"pages": [str(pages)], "lattice": [lattice]})]
+'''
+
+
+def _fake_tabula(directory, version, io=None):
+    package = directory / "tabula"
+    package.mkdir(parents=True)
+    (package / "__init__.py").write_text("__version__ = %r\n" % version)
+    if io is not None:
+        (package / "io.py").write_text(textwrap.dedent(io))
+    return str(directory)
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    monkeypatch.setenv('PYTHONPATH', _fake_tabula(tmp_path / "helper", "2.9.0", FAKE_TABULA_IO))
+    server = ir.TabulaServer(timeout=60)
+    yield server
+    server.stop()
+
+
+def test_read_pdf(server):
+    server.start()
+
+    tables = server.read_pdf("a.pdf", pages="2", lattice=True, **ir.TABULA_OPTIONS)
+
+    assert server.tabula_version == "2.9.0"
+    assert tables[0].to_dict('records') == [{'pages': "2", 'lattice': True}]
+
+
+def test_unknown_options_are_refused(server):
+    with pytest.raises(ValueError, match="spreadsheet"):
+        server.read_pdf("a.pdf", pages="1", spreadsheet=True, **ir.TABULA_OPTIONS)
+    # an error of a request leaves the helper running
+    assert server.read_pdf("a.pdf", pages="1") != [] and server.restarts == 0
+
+
+def test_crash_restarts_the_helper(server, tmp_path):
+    crash_pdf = str(tmp_path / "crash.pdf")
+    first_helper = server.start()._process
+
+    tables = server.read_pdf(crash_pdf, pages="3", lattice=False)
+
+    assert tables[0]['pages'][0] == "3"
+    assert server.restarts == 1 and server._process is not first_helper and first_helper.poll() is not None
+
+
+def test_hung_helper_is_killed_and_restarted(server):
+    hung_helper = server.start()._process
+    server.timeout = 2
+
+    with pytest.raises(TimeoutError):
+        server.read_pdf("hang.pdf", pages="1")
+
+    assert hung_helper.poll() is not None and server.restarts == 1
+    server.timeout = 60
+    assert server.read_pdf("a.pdf", pages="1")[0]['pages'][0] == "1"
+
+
+def test_helper_starting_java_per_call_is_refused(monkeypatch, tmp_path):
+    monkeypatch.setenv('PYTHONPATH', _fake_tabula(tmp_path / "helper", "1.4.3"))
+
+    with pytest.raises(RuntimeError, match="tabula-py >= 2.8"):
+        ir.TabulaServer(timeout=60).start()
+
+
+def test_report_compares_the_tables_with_this_process(server, monkeypatch, tmp_path):
+    test_pdf = str(tmp_path / "doc.pdf")
+    writer = PyPDF2.PdfFileWriter()
+    for page in range(0, 3):
+        writer.addBlankPage(612, 792)
+    with open(test_pdf, 'wb') as pdf_file:
+        writer.write(pdf_file)
+
+    def read_pdf(file, pages=None, lattice=False, **kwargs):
+        # the in-process tabula finds no stream table on page 2
+        if pages == "2" and not lattice:
+            return []
+        return [pd.DataFrame({"pages": [str(pages)], "lattice": [lattice]})]
+    monkeypatch.setattr(ir, 'read_pdf', read_pdf)
+
+    report, summary = ir.tabula_server_report([test_pdf])
+
+    assert len(report) == 6 and summary['reads'] == 6 and summary['server_tabula'] == "2.9.0"
+    assert report[~report['equal']][['page', 'mode', 'tables', 'server_tables']].to_dict('records') == [
+        {'page': 2, 'mode': 'stream', 'tables': 0, 'server_tables': 1}]
@@ -0,0 +1,31 @@
+import random
+
+import baseline
+import information_retrieval as ir
+
+
+TOKENS = ["5. Precision", "5 Precision", "5.Precision", "15. Precision", "Precision", "6. Calculation", "6.Calculation",
+          "6 Scope", "6. details", "16. Report", "Appendix", "THE INFORMATION HEREIN", "The information herein",
+          "The", "precision", "of", "the", "method", "is", "0.05", "wt. %", "Table", "1", "7.", "A", "b", "."]
+
+
+def _pages(generator):
+    return [" ".join(generator.choice(TOKENS) for token in range(0, generator.randint(0, 12)))
+            for page in range(0, generator.randint(1, 6))]
+
+
+def test_matches_baseline():
+    generator = random.Random(17)
+    sections = 0
+    for case in range(0, 5000):
+        preprocessed_text = _pages(generator)
+        start, end = ir._header_start_end(preprocessed_text, "Precision")
+
+        expected = baseline.text_data(preprocessed_text, start, end)
+
+        assert ir.text_data(preprocessed_text, start, end) == expected, preprocessed_text
+        index = ir.section_index(preprocessed_text, ["Precision"])
+        assert ir.text_data(preprocessed_text, start, end, index) == expected, preprocessed_text
+        sections += bool(expected)
+    # most random layouts have a section, so the comparison is not only about missing ones
+    assert sections > 1000